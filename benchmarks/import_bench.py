@@ -0,0 +1,155 @@
+"""
+Import Benchmark — Start-up cost of viral_bot and its lightweight commands.
+
+Features:
+- `python -X importtime -c "import viral_bot"` in a scratch state dir:
+  total import time plus the slowest modules (cumulative)
+- Fails if importing viral_bot pulls in the heavy stack (Google API
+  clients, Gemini, Whisper, OpenCV, yt-dlp, Pillow, NumPy or any engine)
+  or leaves anything behind (state DB, artifact index) in the scratch dir
+- Wall time of `viral_bot.py stats` (median of a few runs) against a
+  budget (it should stay well under a second)
+- Exit code 1 on any violation, so CI can run it as a regression check
+
+Usage:
+    python -m benchmarks.import_bench
+    python -m benchmarks.import_bench --budget 0.5 --runs 5
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT_DIR = BENCH_DIR.parent
+RESULTS_DIR = BENCH_DIR / "results"
+
+STATS_BUDGET_S = 1.0
+HEAVY_MODULES = (
+    "googleapiclient", "google.genai", "google.oauth2", "google.auth",
+    "faster_whisper", "cv2", "yt_dlp", "PIL", "numpy", "engines",
+)
+
+
+def _scratch_env(scratch: str) -> dict:
+    """Environment that points every piece of state at a scratch dir."""
+    return {
+        **os.environ,
+        "STATE_DB": os.path.join(scratch, "youtyann.db"),
+        "ARTIFACT_DIR": os.path.join(scratch, "artifacts"),
+        "YOUTYANN_CACHE_DIR": os.path.join(scratch, ".cache"),
+        "PYTHONDONTWRITEBYTECODE": "1",
+    }
+
+
+def measure_import(env: dict, module: str = "viral_bot") -> dict:
+    """Cumulative import time per module (µs) from -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=ROOT_DIR, env=env,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            _, cum, name = line[len("import time:"):].split("|")
+            cumulative[name.strip()] = int(cum)
+        except ValueError:
+            continue    # header line
+    return cumulative
+
+
+def heavy_imports(modules: dict) -> list:
+    return sorted(
+        name for name in modules
+        if any(name == heavy or name.startswith(heavy + ".") for heavy in HEAVY_MODULES)
+    )
+
+
+def measure_command(env: dict, args: list, runs: int = 3) -> dict:
+    """Wall time of `viral_bot.py <args>` (first run warms the state DB)."""
+    cmd = [sys.executable, str(ROOT_DIR / "viral_bot.py"), *args]
+    subprocess.run(cmd, capture_output=True, cwd=ROOT_DIR, env=env)
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run(cmd, capture_output=True, text=True, cwd=ROOT_DIR, env=env)
+        times.append(time.perf_counter() - started)
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(args)} failed:\n{result.stderr[-2000:]}")
+    return {"median_s": round(statistics.median(times), 3),
+            "runs_s": [round(t, 3) for t in times]}
+
+
+def run(budget: float = STATS_BUDGET_S, runs: int = 3) -> dict:
+    with tempfile.TemporaryDirectory(prefix="youtyann-import-") as scratch:
+        env = _scratch_env(scratch)
+        modules = measure_import(env)
+        side_effects = sorted(os.listdir(scratch))
+        stats = measure_command(env, ["stats"], runs)
+
+    slowest = sorted(
+        ((name, us) for name, us in modules.items() if name != "viral_bot"),
+        key=lambda x: -x[1],
+    )[:15]
+    heavy = heavy_imports(modules)
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": sys.version.split()[0],
+        "import_s": round(modules.get("viral_bot", 0) / 1e6, 3),
+        "modules_imported": len(modules),
+        "slowest": [{"module": name, "cumulative_ms": round(us / 1000, 1)}
+                    for name, us in slowest],
+        "heavy_imports": heavy,
+        "import_side_effects": side_effects,
+        "stats_command": stats,
+        "budget_s": budget,
+        "ok": not heavy and not side_effects and stats["median_s"] <= budget,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="viral_bot import/start-up benchmark")
+    parser.add_argument("--budget", type=float, default=STATS_BUDGET_S,
+                        help="Max median wall time of `viral_bot.py stats` (s)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", type=Path, help="Results JSON path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    report = run(args.budget, args.runs)
+    logger.info(f"⏱️ import viral_bot: {report['import_s'] * 1000:.0f} ms "
+                f"({report['modules_imported']} modules)")
+    for entry in report["slowest"][:8]:
+        logger.info(f"   {entry['cumulative_ms']:>8.1f} ms  {entry['module']}")
+    logger.info(f"⏱️ viral_bot.py stats: {report['stats_command']['median_s']:.2f}s "
+                f"(budget {args.budget:.2f}s)")
+    if report["heavy_imports"]:
+        logger.error(f"❌ Heavy modules imported eagerly: {', '.join(report['heavy_imports'])}")
+    if report["import_side_effects"]:
+        logger.error(f"❌ Importing viral_bot created: {', '.join(report['import_side_effects'])}")
+
+    output = args.output or RESULTS_DIR / f"imports_{datetime.utcnow():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    logger.info(f"📊 Results saved: {output}")
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
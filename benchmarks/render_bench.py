@@ -0,0 +1,349 @@
+"""
+Render Benchmark — Offline timing of the FFmpeg pipeline on synthetic sources.
+
+Features:
+- Synthetic sources from FFmpeg testsrc2 + sine (16:9 and 9:16,
+  720p / 1080p / 4K, 30 s to 20 min), generated once and reused
+- Runs every render engine stage: cut, vertical crop, originality
+  effects, subtitles (stub transcript), platform export, thumbnail
+- Per stage: wall time, CPU seconds, peak RSS, temp-disk high-water
+  mark and output size (each stage in its own process so the
+  child-process rusage belongs to that stage only)
+- JSON results per run + comparison against a baseline
+
+Usage:
+    python -m benchmarks.render_bench                   # quick matrix
+    python -m benchmarks.render_bench --full            # every mode
+    python -m benchmarks.render_bench --compare old.json new.json
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from engines.export_engine import ExportEngine
+from engines.ffmpeg_editor import FFmpegEditor
+from engines.hook_renderer import HookRenderer
+from engines.originality_engine import OriginalityEngine
+from engines.subtitle_engine import SubtitleEngine
+from engines.thumbnail_engine import ThumbnailEngine
+from utils.ffmpeg_runner import default_runner
+
+logger = logging.getLogger(__name__)
+
+BENCH_DIR = Path(__file__).resolve().parent
+RESULTS_DIR = BENCH_DIR / "results"
+WORK_DIR = BENCH_DIR / ".work"
+
+RESOLUTIONS = {"720p": 720, "1080p": 1080, "4k": 2160}
+ASPECTS = {"16:9": (16, 9), "9:16": (9, 16)}
+DURATIONS = [30, 120, 600, 1200]
+
+QUICK = {"aspects": ["16:9", "9:16"], "resolutions": ["720p", "1080p"], "durations": [30]}
+FULL = {"aspects": list(ASPECTS), "resolutions": list(RESOLUTIONS), "durations": DURATIONS}
+
+STAGES = ["cut", "crop", "effects", "subtitles", "export", "thumbnail"]
+CLIP_SECONDS = 45
+REGRESSION_THRESHOLD = 0.10
+
+
+# ---------------------------------------------------------------------------
+# Synthetic sources
+# ---------------------------------------------------------------------------
+def source_size(aspect: str, resolution: str) -> tuple:
+    """(width, height) with the short side at the resolution's height."""
+    a, b = ASPECTS[aspect]
+    short = RESOLUTIONS[resolution]
+    if a >= b:
+        return short * a // b // 2 * 2, short
+    return short, short * b // a // 2 * 2
+
+
+def make_source(aspect: str, resolution: str, duration: int) -> Path:
+    """testsrc2 video + sine audio, cached across runs."""
+    width, height = source_size(aspect, resolution)
+    path = WORK_DIR / "sources" / f"src_{width}x{height}_{duration}s.mp4"
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    logger.info(f"🧪 Generating source {path.name}...")
+    tmp = path.with_suffix(".part.mp4")
+    cmd = [
+        "ffmpeg", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate=30:duration={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=48000:duration={duration}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-crf", "23", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-b:a", "128k",
+        "-shortest", "-movflags", "+faststart",
+        str(tmp),
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Source generation failed: {result.stderr[-300:]}")
+    tmp.rename(path)
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Stages
+# ---------------------------------------------------------------------------
+class StubSubtitleEngine(SubtitleEngine):
+    """SubtitleEngine with a fixed transcript instead of Whisper."""
+
+    WORDS = "THIS IS A SYNTHETIC BENCHMARK TRANSCRIPT FOR SUBTITLE BURNING".split()
+
+    def __init__(self):
+        self.model_size = "stub"
+        self.whisper_model = None
+        self.runner = default_runner()
+        self.governor = self.runner.governor
+
+    def generate_srt(self, video_path: str, output_srt: str) -> bool:
+        blocks, t, idx = [], 0.0, 1
+        while t < CLIP_SECONDS:
+            text = " ".join(
+                self.WORDS[(idx * 4 + k) % len(self.WORDS)] for k in range(4)
+            )
+            blocks.append(
+                f"{idx}\n{self._format_time(t)} --> {self._format_time(t + 1.5)}\n"
+                f"{text}\n\n"
+            )
+            t += 1.5
+            idx += 1
+        with open(output_srt, "w", encoding="utf-8") as f:
+            f.writelines(blocks)
+        return True
+
+
+def _stage_fns(source: Path, work: Path) -> list:
+    """[(stage, output path, callable)] — each stage reads the previous output."""
+    editor = FFmpegEditor()
+    clip = work / "clip.mp4"
+    cropped = work / "cropped.mp4"
+    effects = work / "effects.mp4"
+    subtitled = work / "subtitled.mp4"
+    final = work / "final_youtube_shorts.mp4"
+    thumb = work / "thumbnail.jpg"
+    outputs = {p: str(work / f"final_{p}.mp4") for p in ExportEngine.PRESETS}
+    stages = [
+        ("cut", clip, lambda: editor.cut_segment(str(source), str(clip), 0, CLIP_SECONDS)),
+        ("crop", cropped, lambda: editor.smart_vertical_crop(str(clip), str(cropped))),
+        ("effects", effects, lambda: OriginalityEngine().apply_effects(
+            str(cropped), str(effects), energy="high", effects=["speed_ramp"])),
+        ("subtitles", subtitled, lambda: StubSubtitleEngine().burn_subtitles(
+            str(effects), str(subtitled))),
+        ("export", final, lambda: ExportEngine(
+            list(outputs), hooks=HookRenderer(work / "hooks")).export(
+            str(subtitled), outputs, "BENCHMARK HOOK TEXT")),
+        ("thumbnail", thumb, lambda: ThumbnailEngine().generate(
+            str(final), str(thumb), title="Benchmark", energy="high")),
+    ]
+    assert [s[0] for s in stages] == STAGES
+    return stages
+
+
+class _DiskSampler(threading.Thread):
+    """Polls the bytes under a directory and keeps the high-water mark."""
+
+    def __init__(self, root: Path, interval: float = 0.2):
+        super().__init__(daemon=True)
+        self.root = root
+        self.interval = interval
+        self.peak = 0
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            self.peak = max(self.peak, _dir_bytes(self.root))
+            self._done.wait(self.interval)
+
+    def stop(self) -> int:
+        self._done.set()
+        self.join()
+        self.peak = max(self.peak, _dir_bytes(self.root))
+        return self.peak
+
+
+def _dir_bytes(root: Path) -> int:
+    total = 0
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+def _run_stage(source: str, work: str, index: int, queue):
+    """Child process: run one stage and report its resource usage."""
+    stage, output, fn = _stage_fns(Path(source), Path(work))[index]
+    sampler = _DiskSampler(Path(work))
+    sampler.start()
+    cpu0 = time.process_time()
+    start = time.perf_counter()
+    error = None
+    with default_runner().recording() as runs:
+        try:
+            fn()
+        except Exception as e:
+            error = str(e)
+    wall = time.perf_counter() - start
+    disk_peak = sampler.stop()
+
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    media_s = sum(r["media_s"] for r in runs)
+    ffmpeg_wall = sum(r["wall_s"] for r in runs)
+    queue.put({
+        "stage": stage,
+        "wall_s": round(wall, 3),
+        "cpu_s": round(children.ru_utime + children.ru_stime
+                       + time.process_time() - cpu0, 3),
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": round(max(children.ru_maxrss, own.ru_maxrss) / 1024, 1),
+        "disk_peak_mb": round(disk_peak / 1024 ** 2, 1),
+        # Encoded media seconds per wall second, from ffmpeg -progress
+        "encode_speed": round(media_s / ffmpeg_wall, 2) if ffmpeg_wall else None,
+        "ffmpeg_runs": len(runs),
+        "output_mb": round(output.stat().st_size / 1024 ** 2, 2) if output.exists() else None,
+        "error": error,
+    })
+
+
+def bench_source(source: Path) -> list:
+    """Run every stage on one source, each in a fresh process."""
+    work = WORK_DIR / "run"
+    shutil.rmtree(work, ignore_errors=True)
+    work.mkdir(parents=True)
+
+    ctx = multiprocessing.get_context("fork")
+    results = []
+    for index in range(len(STAGES)):
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run_stage, args=(str(source), str(work), index, queue))
+        proc.start()
+        result = queue.get()
+        proc.join()
+        results.append(result)
+        status = "❌" if result["error"] else "✅"
+        logger.info(
+            f"  {status} {result['stage']:<10} {result['wall_s']:>8.2f}s wall "
+            f"{result['cpu_s']:>8.2f}s cpu {result['peak_rss_mb']:>7.1f} MB rss"
+        )
+    shutil.rmtree(work, ignore_errors=True)
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Runs and comparison
+# ---------------------------------------------------------------------------
+def run(matrix: dict) -> dict:
+    """Benchmark every (aspect, resolution, duration) mode in the matrix."""
+    report = {"meta": _meta(), "results": []}
+    for aspect in matrix["aspects"]:
+        for resolution in matrix["resolutions"]:
+            for duration in matrix["durations"]:
+                source = make_source(aspect, resolution, duration)
+                mode = {"aspect": aspect, "resolution": resolution, "duration": duration}
+                logger.info(f"⏱️ {aspect} {resolution} {duration}s")
+                for result in bench_source(source):
+                    report["results"].append({**mode, **result})
+    return report
+
+
+def _meta() -> dict:
+    try:
+        ffmpeg_version = subprocess.run(
+            ["ffmpeg", "-version"], capture_output=True, text=True
+        ).stdout.split("\n")[0]
+    except Exception:
+        ffmpeg_version = None
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+            text=True, cwd=BENCH_DIR,
+        ).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "commit": commit,
+        "host": platform.node(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "ffmpeg": ffmpeg_version,
+    }
+
+
+def compare(baseline: dict, current: dict,
+            threshold: float = REGRESSION_THRESHOLD) -> list:
+    """Rows (mode, stage, metric, old, new, change) that got worse than threshold."""
+    def index(report):
+        return {
+            (r["aspect"], r["resolution"], r["duration"], r["stage"]): r
+            for r in report["results"]
+        }
+
+    old, new = index(baseline), index(current)
+    regressions = []
+    for key in sorted(old.keys() & new.keys(), key=str):
+        for metric in ("wall_s", "cpu_s", "peak_rss_mb", "disk_peak_mb"):
+            a, b = old[key].get(metric), new[key].get(metric)
+            if not a or b is None:
+                continue
+            change = (b - a) / a
+            flag = "🔺" if change > threshold else "  "
+            print(f"{flag} {' '.join(map(str, key)):<32} {metric:<13} "
+                  f"{a:>9.2f} → {b:>9.2f} ({change:+.0%})")
+            if change > threshold:
+                regressions.append((key, metric, a, b, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline render pipeline benchmark")
+    parser.add_argument("--full", action="store_true", help="Every aspect/resolution/length")
+    parser.add_argument("--aspects", nargs="+", choices=list(ASPECTS))
+    parser.add_argument("--resolutions", nargs="+", choices=list(RESOLUTIONS))
+    parser.add_argument("--durations", nargs="+", type=int)
+    parser.add_argument("--output", type=Path, help="Results JSON path")
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("BASELINE", "CURRENT"),
+                        help="Compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.compare:
+        baseline, current = (json.loads(p.read_text()) for p in args.compare)
+        regressions = compare(baseline, current, args.threshold)
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+        sys.exit(1 if regressions else 0)
+
+    matrix = dict(FULL if args.full else QUICK)
+    for name in ("aspects", "resolutions", "durations"):
+        if getattr(args, name):
+            matrix[name] = getattr(args, name)
+
+    report = run(matrix)
+    output = args.output or RESULTS_DIR / f"bench_{datetime.utcnow():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    logger.info(f"📊 Results saved: {output}")
+
+
+if __name__ == "__main__":
+    main()
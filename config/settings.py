@@ -20,11 +20,130 @@ class Settings:
         self.TEMP_DIR = self.BASE_DIR / "temp"
         self.TEMP_DIR.mkdir(exist_ok=True)
 
+        # Persistent state (SQLite, WAL mode)
+        self.STATE_DB = Path(
+            os.environ.get("STATE_DB", str(self.BASE_DIR / "youtyann.db"))
+        )
+
+        # Perceptual fingerprints of used sources and posted shorts (kept in
+        # the state DB; FINGERPRINT_INDEX is the pre-DB file, imported once)
+        self.PERCEPTUAL_DEDUP = os.environ.get("PERCEPTUAL_DEDUP", "1") == "1"
+        self.FINGERPRINT_INDEX = Path(
+            os.environ.get("FINGERPRINT_INDEX", str(self.BASE_DIR / "fingerprints.npz"))
+        )
+        self.FINGERPRINT_SECONDS = int(os.environ.get("FINGERPRINT_SECONDS", "180"))
+
+        # Artifact cache (survives _cleanup_temp, LRU-bounded)
+        self.ARTIFACT_DIR = Path(
+            os.environ.get("ARTIFACT_DIR", str(self.BASE_DIR / "artifacts"))
+        )
+        self.ARTIFACT_MAX_GB = float(os.environ.get("ARTIFACT_MAX_GB", "2"))
+
+        # Portable state snapshot shared between CI runs (--export-state)
+        self.STATE_SNAPSHOT = Path(
+            os.environ.get("STATE_SNAPSHOT", str(self.BASE_DIR / "youtyann-state.json.gz"))
+        )
+
+        # Whisper model size (also keys the cached transcripts and subtitles)
+        self.WHISPER_MODEL = os.environ.get("WHISPER_MODEL", "base")
+
+        # Downloaded Whisper models (cached in CI by model + deps hash)
+        self.WHISPER_MODEL_DIR = os.environ.get(
+            "WHISPER_MODEL_DIR", str(self.BASE_DIR / ".models" / "whisper")
+        )
+
+        # Small runner-local caches (discovery documents, client state)
+        self.CACHE_DIR = Path(
+            os.environ.get("YOUTYANN_CACHE_DIR", str(self.BASE_DIR / ".cache"))
+        )
+
         # Pipeline config
         self.MAX_ATTEMPTS = int(os.environ.get("MAX_ATTEMPTS", "5"))
         self.SHORTS_PER_RUN = int(os.environ.get("SHORTS_PER_RUN", "3"))
         self.LOOKBACK_DAYS = int(os.environ.get("LOOKBACK_DAYS", "14"))
 
+        # Daemon mode (--daemon): daily publish slots in UTC ("auto" = the
+        # AUTO_SLOTS best hours from upload analytics), shorts per slot,
+        # how early a slot's job starts, and the local control endpoint
+        # (port 0 = off)
+        self.DEFAULT_PUBLISH_SLOTS = "14:00,18:00,22:00"
+        self.PUBLISH_SLOTS = os.environ.get("PUBLISH_SLOTS", self.DEFAULT_PUBLISH_SLOTS)
+        self.AUTO_SLOTS = int(os.environ.get("AUTO_SLOTS", "3"))
+        self.SHORTS_PER_SLOT = int(
+            os.environ.get("SHORTS_PER_SLOT", str(self.SHORTS_PER_RUN))
+        )
+        self.PUBLISH_LEAD_MINUTES = float(os.environ.get("PUBLISH_LEAD_MINUTES", "45"))
+        self.DAEMON_HOST = os.environ.get("DAEMON_HOST", "127.0.0.1")
+        self.DAEMON_PORT = int(os.environ.get("DAEMON_PORT", "8780"))
+
+        # Upload analytics: how often our uploads' stats are pulled and
+        # for how many days after upload
+        self.ANALYTICS_REFRESH_HOURS = float(os.environ.get("ANALYTICS_REFRESH_HOURS", "6"))
+        self.ANALYTICS_STATS_DAYS = int(os.environ.get("ANALYTICS_STATS_DAYS", "30"))
+
+        # Channel scheduling: daily search.list budget (units, 100 per
+        # call) and how long a searched channel waits before it's due again
+        self.SEARCH_QUOTA_UNITS = int(os.environ.get("SEARCH_QUOTA_UNITS", "3000"))
+        self.SEARCH_COOLDOWN_HOURS = float(os.environ.get("SEARCH_COOLDOWN_HOURS", "6"))
+
+        # Source prefilter (metadata checks before download): length
+        # bounds (vertical shorts may go down to SHORT_MIN_SOURCE_SECONDS),
+        # the region sources must play in ("" = any) and whether sources
+        # without captions are skipped
+        self.MIN_SOURCE_SECONDS = int(os.environ.get("MIN_SOURCE_SECONDS", "30"))
+        self.SHORT_MIN_SOURCE_SECONDS = int(os.environ.get("SHORT_MIN_SOURCE_SECONDS", "15"))
+        self.MAX_SOURCE_MINUTES = float(os.environ.get("MAX_SOURCE_MINUTES", "60"))
+        self.SOURCE_REGION = os.environ.get("SOURCE_REGION", "US").upper()
+        self.REQUIRE_CAPTIONS = os.environ.get("REQUIRE_CAPTIONS", "0") == "1"
+
+        # Trend ranking: search results gathered per needed candidate, and
+        # how far ahead (hours) view momentum is projected
+        self.TREND_POOL_FACTOR = int(os.environ.get("TREND_POOL_FACTOR", "3"))
+        self.TREND_HORIZON_HOURS = float(os.environ.get("TREND_HORIZON_HOURS", "6"))
+
+        # Candidates ranked per Gemini call (batched analysis)
+        self.ANALYSIS_BATCH_SIZE = int(os.environ.get("ANALYSIS_BATCH_SIZE", "8"))
+
+        # Media job governor (0 = derive from cores / free memory)
+        self.MAX_MEDIA_JOBS = int(os.environ.get("MAX_MEDIA_JOBS", "0"))
+        self.FFMPEG_THREADS = int(os.environ.get("FFMPEG_THREADS", "0"))
+        # Abort an FFmpeg job whose output hasn't advanced for this long (s)
+        self.FFMPEG_STALL_TIMEOUT = float(os.environ.get("FFMPEG_STALL_TIMEOUT", "60"))
+
+        # Source prefetch (downloads run while the current short renders)
+        self.PREFETCH_DEPTH = int(os.environ.get("PREFETCH_DEPTH", "3"))
+        self.PREFETCH_WORKERS = int(os.environ.get("PREFETCH_WORKERS", "2"))
+        # Disk held by downloaded, not yet rendered sources (capped at half
+        # of ARTIFACT_MAX_GB: they're pinned in the artifact store)
+        self.PREFETCH_MAX_GB = float(os.environ.get("PREFETCH_MAX_GB", "1"))
+        # Per-download bandwidth cap in bytes/s (0 = unlimited)
+        self.DOWNLOAD_RATE_LIMIT = int(os.environ.get("DOWNLOAD_RATE_LIMIT", "0"))
+
+        # Analysis proxy: auto = derive from a cached source, else fetch a
+        # low-res stream; fetch | derive | off
+        self.PROXY_MODE = os.environ.get("PROXY_MODE", "auto").lower()
+        self.PROXY_HEIGHT = int(os.environ.get("PROXY_HEIGHT", "360"))
+
+        # Uploads (resumable sessions persist across process restarts)
+        self.UPLOAD_ENDPOINT = os.environ.get(
+            "UPLOAD_ENDPOINT", "https://www.googleapis.com/upload/youtube/v3/videos"
+        )
+        self.UPLOAD_SESSION_FILE = self.BASE_DIR / "upload_sessions.json"
+        self.UPLOAD_MAX_RETRIES = int(os.environ.get("UPLOAD_MAX_RETRIES", "8"))
+        self.UPLOAD_CONCURRENCY = int(os.environ.get("UPLOAD_CONCURRENCY", "2"))
+        # Daily units of the API project, shared by searches and uploads
+        self.YOUTUBE_QUOTA_UNITS = int(os.environ.get("YOUTUBE_QUOTA_UNITS", "10000"))
+
+        # Platform exports (one decode, one encode per platform)
+        self.EXPORT_PLATFORMS = [
+            p.strip() for p in os.environ.get(
+                "EXPORT_PLATFORMS", "youtube_shorts,tiktok,reels"
+            ).split(",") if p.strip()
+        ]
+        self.EXPORT_DIR = Path(
+            os.environ.get("EXPORT_DIR", str(self.BASE_DIR / "exports"))
+        )
+
         # Subtitle style
         self.SUBTITLE_FONT = os.environ.get("SUBTITLE_FONT", "Montserrat-Bold")
         self.SUBTITLE_SIZE = int(os.environ.get("SUBTITLE_SIZE", "22"))
@@ -0,0 +1,278 @@
+"""
+Video Downloader — In-process yt-dlp with player-client memory.
+
+Features:
+- yt-dlp Python API: one long-lived YoutubeDL per run (per thread),
+  no interpreter/extractor start-up per attempt
+- Cookie file written once per run
+- Progress via yt-dlp hooks instead of stderr parsing
+- Remembers the player client that last worked on this runner and
+  tries it first next time
+- Thread-safe: prefetch workers each get their own YoutubeDL
+- Optional per-download bandwidth cap
+- Low-bitrate proxy downloads (e.g. 360p) for analysis stages
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from utils.failures import FailureCause, PipelineFailure
+
+logger = logging.getLogger(__name__)
+
+# Try importing yt-dlp (required for downloads)
+YTDLP_AVAILABLE = False
+try:
+    import yt_dlp
+    from yt_dlp.utils import DownloadError
+    YTDLP_AVAILABLE = True
+except ImportError:
+    logger.info("ℹ️ yt-dlp not installed — downloads disabled")
+
+# Player clients to try — iOS bypasses bot checks on CI IPs
+PLAYER_CLIENTS = ["ios", "android_vr", "web_creator"]
+
+EXPIRED_COOKIES = "EXPIRED_COOKIES"
+BOT_BLOCK = "BOT_BLOCK"
+
+
+class _YtdlpLogger:
+    """Routes yt-dlp output into our logger (quietly)."""
+
+    def debug(self, msg):
+        logger.debug(f"yt-dlp: {msg}")
+
+    def info(self, msg):
+        logger.debug(f"yt-dlp: {msg}")
+
+    def warning(self, msg):
+        logger.debug(f"yt-dlp warning: {msg}")
+
+    def error(self, msg):
+        logger.debug(f"yt-dlp error: {msg}")
+
+
+class VideoDownloader:
+    """Downloads sources with reusable YoutubeDL instances."""
+
+    def __init__(self, output_dir: Path, fmt: str, state_dir: Path,
+                 cookies: str = "", ratelimit: int = 0):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.ratelimit = ratelimit
+        self.fmt = fmt
+        self.state_file = Path(state_dir) / "ytdlp_state.json"
+        self.cache_dir = Path(state_dir) / "yt-dlp"
+        self._cookies = cookies
+        self._cookie_file = None
+        self._cookies_expired = False
+        self._instances = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def download(self, url: str, fmt: str = None, tag: str = "source") -> str:
+        """
+        Download a video and return its local path.
+
+        `fmt` overrides the default format selector (e.g. a low-res proxy);
+        `tag` prefixes the output file name so variants don't collide.
+
+        Strategy: player clients in order (last successful first), each
+        with cookies if available, then without.
+        Raises PipelineFailure (BOT_BLOCK / DOWNLOAD_FAILED) on failure.
+        """
+        if not YTDLP_AVAILABLE:
+            raise PipelineFailure(FailureCause.DOWNLOAD_FAILED, "yt-dlp not installed")
+
+        profile = (fmt or self.fmt, tag)
+        logger.info(f"📥 Downloading {tag}: {url}")
+        for client in self._client_order():
+            logger.info(f"  🎯 Trying player client: {client}")
+
+            if self._cookie_path():
+                res = self._attempt(url, client, profile, use_cookies=True)
+                if res == EXPIRED_COOKIES:
+                    logger.warning("🍪 Cookies expired, skipping cookies for all clients")
+                    self._cookies_expired = True
+                    res = self._attempt(url, client, profile, use_cookies=False)
+            else:
+                res = self._attempt(url, client, profile, use_cookies=False)
+
+            if res and res not in (EXPIRED_COOKIES, BOT_BLOCK):
+                self._remember(client)
+                return res
+
+            if res != BOT_BLOCK:
+                # Non-bot error — no point trying other clients
+                raise PipelineFailure(
+                    FailureCause.DOWNLOAD_FAILED, f"yt-dlp failed ({client})"
+                )
+
+        logger.error("❌ All player clients blocked by YouTube")
+        raise PipelineFailure(FailureCause.BOT_BLOCK, "All player clients blocked")
+
+    def close(self):
+        """Release YoutubeDL instances and the run's cookie file."""
+        with self._lock:
+            for ydl in self._instances:
+                try:
+                    ydl.close()
+                except Exception:
+                    pass
+            self._instances.clear()
+            if self._cookie_file:
+                try:
+                    os.unlink(self._cookie_file)
+                except Exception:
+                    pass
+                self._cookie_file = None
+
+    # ------------------------------------------------------------------
+    # Attempts
+    # ------------------------------------------------------------------
+    def _attempt(self, url: str, client: str, profile: tuple,
+                 use_cookies: bool) -> Optional[str]:
+        ydl = self._ydl(profile, use_cookies)
+        ydl.params["extractor_args"] = {"youtube": {"player_client": [client]}}
+        self._local.last_pct = -1
+
+        try:
+            info = ydl.extract_info(url, download=True)
+        except DownloadError as e:
+            err = str(e)
+            if use_cookies and "cookies are no longer valid" in err:
+                return EXPIRED_COOKIES
+            if "Sign in to confirm" in err or "bot" in err.lower():
+                return BOT_BLOCK
+            logger.warning(f"  ⚠️ [{client}] failed: {err[:200]}")
+            return None
+        except Exception as e:
+            logger.warning(f"  ⚠️ [{client}] exception: {e}")
+            return None
+
+        path = self._output_file(ydl, info)
+        if path:
+            logger.info(f"✅ Downloaded: {Path(path).name} (client={client})")
+        return path
+
+    def _ydl(self, profile: tuple, use_cookies: bool):
+        """Long-lived YoutubeDL for this thread, format profile and cookie mode."""
+        if not hasattr(self._local, "instances"):
+            self._local.instances = {}
+        fmt, tag = profile
+        ydl = self._local.instances.get((profile, use_cookies))
+        if ydl is None:
+            params = {
+                "format": fmt,
+                "merge_output_format": "mp4",
+                "outtmpl": str(self.output_dir / f"{tag}_%(id)s.%(ext)s"),
+                "noplaylist": True,
+                "nocheckcertificate": True,
+                "quiet": True,
+                "noprogress": True,
+                "cachedir": str(self.cache_dir),
+                "logger": _YtdlpLogger(),
+                "progress_hooks": [self._on_progress],
+            }
+            if self.ratelimit:
+                params["ratelimit"] = self.ratelimit
+            if use_cookies:
+                params["cookiefile"] = self._cookie_path()
+            ydl = yt_dlp.YoutubeDL(params)
+            self._local.instances[(profile, use_cookies)] = ydl
+            with self._lock:
+                self._instances.append(ydl)
+        return ydl
+
+    @staticmethod
+    def _output_file(ydl, info: dict) -> Optional[str]:
+        """Final (merged) file path reported by yt-dlp."""
+        for d in info.get("requested_downloads") or []:
+            if d.get("filepath") and os.path.exists(d["filepath"]):
+                return d["filepath"]
+        path = ydl.prepare_filename(info)
+        merged = os.path.splitext(path)[0] + ".mp4"
+        for candidate in (merged, path):
+            if os.path.exists(candidate):
+                return candidate
+        return None
+
+    def _on_progress(self, d: dict):
+        """yt-dlp progress hook: log every 25%."""
+        if d.get("status") == "finished":
+            logger.info(f"  📥 Fragment done: {Path(d.get('filename', '')).name}")
+            return
+        if d.get("status") != "downloading":
+            return
+        total = d.get("total_bytes") or d.get("total_bytes_estimate")
+        if not total:
+            return
+        pct = int(d.get("downloaded_bytes", 0) / total * 100) // 25 * 25
+        if pct > getattr(self._local, "last_pct", -1):
+            self._local.last_pct = pct
+            speed = (d.get("speed") or 0) / 1024 / 1024
+            logger.info(f"  📥 {pct}% ({speed:.1f} MiB/s)")
+
+    # ------------------------------------------------------------------
+    # Cookies
+    # ------------------------------------------------------------------
+    def _cookie_path(self) -> Optional[str]:
+        """Write the cookie file once per run; None if unavailable/expired."""
+        if not self._cookies or self._cookies_expired:
+            return None
+        with self._lock:
+            if self._cookie_file is None:
+                try:
+                    cookie_file = tempfile.NamedTemporaryFile(
+                        mode="w", suffix=".txt", delete=False, encoding="utf-8"
+                    )
+                    if not self._cookies.strip().startswith("# Netscape HTTP Cookie File"):
+                        cookie_file.write("# Netscape HTTP Cookie File\n")
+                    cookie_file.write(self._cookies)
+                    cookie_file.close()
+                    self._cookie_file = cookie_file.name
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not write cookie file: {e}")
+                    self._cookies = ""
+            return self._cookie_file
+
+    # ------------------------------------------------------------------
+    # Player-client memory
+    # ------------------------------------------------------------------
+    def _client_order(self) -> list:
+        """PLAYER_CLIENTS with the last successful one first."""
+        last = self._load_state().get("last_client")
+        if last in PLAYER_CLIENTS:
+            return [last] + [c for c in PLAYER_CLIENTS if c != last]
+        return list(PLAYER_CLIENTS)
+
+    def _remember(self, client: str):
+        with self._lock:
+            state = self._load_state()
+            if state.get("last_client") == client:
+                return
+            state.update(last_client=client, updated_at=time.time())
+            try:
+                self.state_file.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.state_file, "w", encoding="utf-8") as f:
+                    json.dump(state, f, indent=2)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not save yt-dlp state: {e}")
+
+    def _load_state(self) -> dict:
+        if self.state_file.exists():
+            try:
+                with open(self.state_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except Exception:
+                pass
+        return {}
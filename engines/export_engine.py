@@ -0,0 +1,138 @@
+"""
+Export Engine — One decode, many platform encodes.
+
+Features:
+- Decodes the edited master once and fans out with split/asplit
+  in a single FFmpeg process
+- Per-platform bitrate, duration cap and loudness target (video-only
+  outputs when the master has no audio stream)
+- Hook overlay placed inside each platform's safe area: a pre-rendered
+  PNG (engines.hook_renderer) composited only inside the hook window,
+  drawtext when Pillow is unavailable
+"""
+
+import logging
+
+from engines.ffmpeg_editor import FFmpegEditor
+from engines.hook_renderer import HookRenderer
+from utils.ffmpeg_runner import FFmpegRunner, default_runner
+
+logger = logging.getLogger(__name__)
+
+HOOK_START = 0.3
+HOOK_FADE = 0.5
+
+
+class ExportEngine:
+    """Renders the final platform variants from one master."""
+
+    # hook_y: fraction of the height, below each app's top UI chrome
+    PRESETS = {
+        "youtube_shorts": {
+            "bitrate": "6M", "max_duration": 60, "loudness": -14, "hook_y": 0.15,
+        },
+        "tiktok": {
+            "bitrate": "4M", "max_duration": 60, "loudness": -14, "hook_y": 0.20,
+        },
+        "reels": {
+            "bitrate": "5M", "max_duration": 90, "loudness": -16, "hook_y": 0.22,
+        },
+    }
+
+    def __init__(self, platforms: list = None, runner: FFmpegRunner = None,
+                 hooks: HookRenderer = None):
+        self.runner = runner or default_runner()
+        self.hooks = hooks
+        platforms = platforms or ["youtube_shorts"]
+        unknown = [p for p in platforms if p not in self.PRESETS]
+        if unknown:
+            logger.warning(f"⚠️ Unknown export platforms ignored: {unknown}")
+        self.platforms = [p for p in platforms if p in self.PRESETS] or ["youtube_shorts"]
+
+    def export(self, master_path: str, outputs: dict, hook_text: str = "",
+               hook_duration: float = 3.0, duration: float = None):
+        """
+        Encode every platform in `outputs` ({platform: path}) from one
+        decode of `master_path` (`duration`: its length, probed if None).
+        """
+        platforms = [p for p in self.platforms if p in outputs]
+        n = len(platforms)
+        hook_image = self.hooks.render(hook_text) if hook_text and self.hooks else None
+        info = self.runner.probe(master_path)
+        # Unprobeable masters keep the audio path (FFmpeg reports the error)
+        has_audio = info is None or info.has_audio
+
+        cmd = ["ffmpeg", "-y", "-i", master_path]
+        graph = []
+        if n > 1:
+            graph.append(f"[0:v]split={n}" + "".join(f"[v{i}]" for i in range(n)))
+            if has_audio:
+                graph.append(f"[0:a]asplit={n}" + "".join(f"[a{i}]" for i in range(n)))
+            v_in = [f"[v{i}]" for i in range(n)]
+            a_in = [f"[a{i}]" for i in range(n)]
+        else:
+            v_in, a_in = ["[0:v]"], ["[0:a]"]
+
+        if hook_image:
+            # The still only exists for the hook window; the alpha fades
+            # run on that small image, not on the full frame
+            cmd += ["-loop", "1", "-framerate", "30",
+                    "-t", f"{hook_duration:g}", "-i", hook_image]
+            fades = (
+                f"format=rgba,"
+                f"fade=t=in:st={HOOK_START:g}:d={HOOK_FADE:g}:alpha=1,"
+                f"fade=t=out:st={max(hook_duration - HOOK_FADE, HOOK_START):g}:"
+                f"d={HOOK_FADE:g}:alpha=1"
+            )
+            if n > 1:
+                graph.append(f"[1:v]{fades},split={n}" + "".join(f"[h{i}]" for i in range(n)))
+                h_in = [f"[h{i}]" for i in range(n)]
+            else:
+                graph.append(f"[1:v]{fades}[h0]")
+                h_in = ["[h0]"]
+
+        for i, platform in enumerate(platforms):
+            preset = self.PRESETS[platform]
+            if hook_image:
+                graph.append(
+                    f"{v_in[i]}{h_in[i]}overlay=x=(W-w)/2:y=H*{preset['hook_y']}:"
+                    f"eval=init:eof_action=pass:"
+                    f"enable='between(t,{HOOK_START:g},{hook_duration:g})'[vout{i}]"
+                )
+            else:
+                video = "null"
+                if hook_text:
+                    video = FFmpegEditor.hook_filter(
+                        hook_text, hook_duration, y=preset["hook_y"],
+                        fontsize=self.hooks.font_size if self.hooks else 44,
+                    )
+                graph.append(f"{v_in[i]}{video}[vout{i}]")
+            if has_audio:
+                graph.append(
+                    f"{a_in[i]}loudnorm=I={preset['loudness']}:LRA=11:TP=-1.5[aout{i}]"
+                )
+
+        cmd += ["-filter_complex", ";".join(graph)]
+        for i, platform in enumerate(platforms):
+            preset = self.PRESETS[platform]
+            bufsize = f"{int(preset['bitrate'][:-1]) * 2}M"
+            audio = (["-map", f"[aout{i}]", "-c:a", "aac", "-b:a", "192k", "-ar", "48000"]
+                     if has_audio else ["-an"])
+            cmd += [
+                "-map", f"[vout{i}]",
+                "-t", str(preset["max_duration"]),
+                "-c:v", "libx264", "-preset", "fast",
+                "-b:v", preset["bitrate"], "-maxrate", preset["bitrate"],
+                "-bufsize", bufsize,
+                *audio,
+                "-movflags", "+faststart",
+                outputs[platform],
+            ]
+
+        # The longest capped output bounds the timeout and the progress %
+        if duration is None:
+            duration = info.duration if info and info.duration else 600.0
+        duration = min(duration, max(self.PRESETS[p]["max_duration"] for p in platforms))
+        # Each extra encode adds roughly half a single render
+        self.runner.run(cmd, f"Export ×{n}", duration=duration,
+                        timeout_scale=1 + 0.5 * (n - 1))
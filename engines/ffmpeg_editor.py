@@ -4,25 +4,29 @@ FFmpeg Editor Engine — Local video editing replacing Creatomate.
 Features:
 - Clip cutting with precise timestamps
 - Smart vertical crop (9:16) with face detection
-- Hook text overlays
+- drawtext hook filter (export fallback when Pillow is missing)
 - Audio normalization
 - Quality optimization for social media
+- Low-bitrate analysis proxies (360p, mono 16 kHz audio)
 """
 
 import subprocess
 import logging
-import json
 from pathlib import Path
 
+from utils.ffmpeg_runner import FFmpegRunner, default_runner
+from utils.media_info import MediaInfo
+
 logger = logging.getLogger(__name__)
 
 
 class FFmpegEditor:
     """Handles all video editing operations using FFmpeg."""
 
-    def __init__(self):
+    def __init__(self, runner: FFmpegRunner = None):
         self.width = 1080
         self.height = 1920
+        self.runner = runner or default_runner()
         self._verify_ffmpeg()
 
     def _verify_ffmpeg(self):
@@ -59,9 +63,27 @@ class FFmpegEditor:
             output_path,
         ]
 
-        self._run(cmd, "Cut segment")
+        self._run(cmd, "Cut segment", duration=duration)
 
-    def smart_vertical_crop(self, input_path: str, output_path: str):
+    def make_proxy(self, input_path: str, output_path: str, height: int = 360):
+        """
+        Derive a low-bitrate analysis proxy from a full-quality source.
+        Small video + mono 16 kHz audio: enough for transcription and
+        frame probes at a fraction of the decode cost.
+        """
+        cmd = [
+            "ffmpeg", "-y",
+            "-i", input_path,
+            "-vf", f"scale=-2:{height}",
+            "-c:v", "libx264", "-preset", "ultrafast", "-crf", "32",
+            "-c:a", "aac", "-ac", "1", "-ar", "16000", "-b:a", "48k",
+            "-movflags", "+faststart",
+            output_path,
+        ]
+        self._run(cmd, "Analysis proxy")
+
+    def smart_vertical_crop(self, input_path: str, output_path: str,
+                            info: MediaInfo = None):
         """
         Crop video to 9:16 vertical format.
         Uses FFmpeg's cropdetect + face-aware center cropping.
@@ -71,17 +93,18 @@ class FFmpegEditor:
         2. If already vertical (9:16), just resize
         3. If horizontal (16:9), crop center with face bias
         4. Apply padding if needed
+
+        `info` is the input's MediaInfo when the caller already has it.
         """
-        # Get video info
-        probe = self._probe(input_path)
-        if not probe:
+        info = info or self.runner.probe(input_path)
+        if not info or not info.height:
             # Fallback: simple center crop
             self._simple_vertical_crop(input_path, output_path)
             return
 
-        src_w = probe.get("width", 1920)
-        src_h = probe.get("height", 1080)
-        aspect = src_w / src_h if src_h > 0 else 1.78
+        src_w = info.width
+        src_h = info.height
+        aspect = info.aspect
 
         if aspect < 0.7:
             # Already vertical or nearly vertical — just resize
@@ -138,45 +161,30 @@ class FFmpegEditor:
         ]
         self._run(cmd, "Simple vertical crop")
 
-    def add_hook_overlay(self, input_path: str, output_path: str,
-                         hook_text: str, duration: float = 3.0):
+    @staticmethod
+    def hook_filter(hook_text: str, duration: float = 3.0,
+                    y: float = 0.15, fontsize: int = 44) -> str:
         """
-        Add an attention-grabbing text overlay in the first N seconds.
-        Uses FFmpeg's drawtext filter with animation.
+        drawtext filter for the animated hook (y = fraction of height).
+        Only used when engines.hook_renderer can't pre-render the text.
         """
-        if not hook_text:
-            # No hook → just copy
-            subprocess.run(["cp", input_path, output_path])
-            return
-
         # Escape special characters for FFmpeg
         safe_text = hook_text.replace("'", "'\\''").replace(":", "\\:")
         safe_text = safe_text.replace("%", "%%")
 
         # Animated hook: fade in from top, stays for {duration}s, fade out
-        drawtext_filter = (
+        return (
             f"drawtext=text='{safe_text}':"
-            f"fontsize=44:"
+            f"fontsize={fontsize}:"
             f"fontcolor=white:"
             f"borderw=4:"
             f"bordercolor=black:"
             f"x=(w-text_w)/2:"
-            f"y=h*0.15:"
+            f"y=h*{y}:"
             f"enable='between(t,0.3,{duration})':"
             f"alpha='if(lt(t,0.8),t/0.5,if(gt(t,{duration-0.5}),({duration}-t)/0.5,1))'"
         )
 
-        cmd = [
-            "ffmpeg", "-y",
-            "-i", input_path,
-            "-vf", drawtext_filter,
-            "-c:v", "libx264", "-preset", "fast", "-crf", "20",
-            "-c:a", "copy",
-            output_path,
-        ]
-
-        self._run(cmd, "Hook overlay")
-
     def add_audio_boost(self, input_path: str, output_path: str):
         """Normalize and slightly boost audio for mobile playback."""
         cmd = [
@@ -188,42 +196,6 @@ class FFmpegEditor:
         ]
         self._run(cmd, "Audio boost")
 
-    def _probe(self, path: str) -> dict:
-        """Get video metadata using ffprobe."""
-        try:
-            cmd = [
-                "ffprobe", "-v", "quiet",
-                "-print_format", "json",
-                "-show_streams",
-                path,
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            data = json.loads(result.stdout)
-
-            for stream in data.get("streams", []):
-                if stream.get("codec_type") == "video":
-                    return {
-                        "width": int(stream.get("width", 0)),
-                        "height": int(stream.get("height", 0)),
-                        "duration": float(stream.get("duration", 0)),
-                        "fps": eval(stream.get("r_frame_rate", "30/1")),
-                    }
-        except Exception as e:
-            logger.warning(f"⚠️ ffprobe failed: {e}")
-
-        return {}
-
-    def _run(self, cmd: list, label: str):
-        """Execute FFmpeg command with logging."""
-        logger.info(f"  🎬 FFmpeg [{label}]...")
-        try:
-            result = subprocess.run(
-                cmd, capture_output=True, text=True, timeout=600
-            )
-            if result.returncode != 0:
-                logger.error(f"  ❌ FFmpeg [{label}] failed: {result.stderr[:300]}")
-                raise RuntimeError(f"FFmpeg failed: {label}")
-            logger.info(f"  ✅ FFmpeg [{label}] done")
-        except subprocess.TimeoutExpired:
-            logger.error(f"  ❌ FFmpeg [{label}] timed out (600s)")
-            raise
+    def _run(self, cmd: list, label: str, duration: float = None):
+        """Execute FFmpeg command with progress, stall detection and metrics."""
+        self.runner.run(cmd, label, duration=duration)
@@ -0,0 +1,244 @@
+"""
+Hook Renderer — Hook text drawn once with Pillow, composited by FFmpeg.
+
+Features:
+- Renders the hook into a transparent PNG (white text, black outline)
+  so the export encode overlays an image instead of evaluating
+  drawtext expressions on every frame
+- Word wrapping to the safe width; the font shrinks when the hook
+  would need more than three lines
+- Emoji drawn with a color emoji font when one is installed, dropped
+  otherwise (no tofu boxes)
+- Cached on disk by (text, style): retries and every platform variant
+  reuse the same asset
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Try importing Pillow (optional, falls back to FFmpeg drawtext)
+PIL_AVAILABLE = False
+try:
+    from PIL import Image, ImageDraw, ImageFont
+    PIL_AVAILABLE = True
+except ImportError:
+    logger.info("ℹ️ Pillow not installed — hook overlays use FFmpeg drawtext")
+
+FONT_CANDIDATES = (
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/truetype/noto/NotoSans-Bold.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
+    "/Library/Fonts/Arial Bold.ttf",
+)
+EMOJI_FONT_CANDIDATES = (
+    "/usr/share/fonts/truetype/noto/NotoColorEmoji.ttf",
+    "/usr/share/fonts/noto/NotoColorEmoji.ttf",
+    "/System/Library/Fonts/Apple Color Emoji.ttc",
+)
+# Color emoji fonts only ship fixed-size bitmaps (Noto: 109 px, Apple: 160)
+EMOJI_BITMAP_SIZES = (109, 160, 137, 96, 64)
+
+MAX_LINES = 3
+MIN_SCALE = 0.6
+LINE_SPACING = 1.15
+
+# Codepoints that continue an emoji cluster (VS16, ZWJ, skin tones, tags)
+_EMOJI_JOINERS = {0xFE0F, 0x200D} | set(range(0x1F3FB, 0x1F400)) | set(range(0xE0020, 0xE0080))
+
+
+def _is_emoji(ch: str) -> bool:
+    cp = ord(ch)
+    return (
+        cp >= 0x1F000 or 0x2600 <= cp <= 0x27BF or 0x2B00 <= cp <= 0x2BFF
+        or cp in _EMOJI_JOINERS
+    )
+
+
+def _first_existing(paths: tuple) -> Optional[str]:
+    return next((p for p in paths if os.path.exists(p)), None)
+
+
+def _runs(word: str) -> list:
+    """Split a word into [(is_emoji, text)]; emoji runs are grapheme clusters."""
+    runs = []
+    for ch in word:
+        emoji = _is_emoji(ch)
+        joins = ord(ch) in _EMOJI_JOINERS or (runs and runs[-1][1].endswith("\u200d"))
+        if emoji and runs and runs[-1][0] and joins:
+            runs[-1] = (True, runs[-1][1] + ch)
+        elif not emoji and runs and not runs[-1][0]:
+            runs[-1] = (False, runs[-1][1] + ch)
+        else:
+            runs.append((emoji, ch))
+    return runs
+
+
+class HookRenderer:
+    """Renders hook text to cached transparent PNGs."""
+
+    def __init__(self, cache_dir: Path, font_size: int = 48, width: int = 1080,
+                 max_width: float = 0.86, stroke: int = 4,
+                 font_path: str = None, emoji_font_path: str = None):
+        self.cache_dir = Path(cache_dir)
+        self.font_size = font_size
+        self.width = width
+        self.max_width = max_width
+        self.stroke = stroke
+        # Resolved once: `style` keys cached exports, so it must not change
+        # after the first render
+        self.font_path = self._usable_font(font_path or _first_existing(FONT_CANDIDATES))
+        emoji_font_path = emoji_font_path or _first_existing(EMOJI_FONT_CANDIDATES)
+        self._emoji_font = self._load_emoji_font(emoji_font_path)
+        self.emoji_font_path = emoji_font_path if self._emoji_font else None
+
+    @property
+    def style(self) -> dict:
+        """Everything besides the text that changes the rendered pixels."""
+        return {
+            "pillow": PIL_AVAILABLE,
+            "font": Path(self.font_path).name if self.font_path else None,
+            "emoji_font": Path(self.emoji_font_path).name if self.emoji_font_path else None,
+            "size": self.font_size,
+            "width": self.width,
+            "max_width": self.max_width,
+            "stroke": self.stroke,
+        }
+
+    def render(self, text: str) -> Optional[str]:
+        """
+        Path of the PNG for `text` (rendered on first use), or None when
+        there's nothing to draw or Pillow can't draw it.
+        """
+        text = " ".join(text.split())
+        if not text or not PIL_AVAILABLE:
+            return None
+
+        digest = hashlib.sha1(
+            json.dumps({"text": text, **self.style}, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+        path = self.cache_dir / f"hook_{digest}.png"
+        if path.exists():
+            return str(path)
+
+        try:
+            image, lines = self._draw(text)
+        except Exception as e:
+            logger.warning(f"⚠️ Hook render failed, using drawtext: {e}")
+            return None
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        image.save(tmp, "PNG", optimize=True)
+        os.replace(tmp, path)
+        logger.info(f"🪝 Hook rendered: {image.width}x{image.height}, {lines} line(s)")
+        return str(path)
+
+    # ------------------------------------------------------------------
+    # Drawing
+    # ------------------------------------------------------------------
+    def _draw(self, text: str) -> tuple:
+        emoji_font = self._emoji_font
+        words = []
+        for word in text.split(" "):
+            runs = [(e, s) for e, s in _runs(word) if not e or emoji_font]
+            if runs:
+                words.append(runs)
+        if not words:
+            raise ValueError("nothing drawable in hook text")
+
+        # Largest size (down to MIN_SCALE) that fits in MAX_LINES
+        limit = int(self.width * self.max_width) - 2 * self.stroke
+        size = self.font_size
+        while True:
+            font = self._load_font(size)
+            lines = self._wrap(words, font, limit)
+            if len(lines) <= MAX_LINES or size <= self.font_size * MIN_SCALE:
+                break
+            size = max(int(size * 0.9), int(self.font_size * MIN_SCALE))
+
+        ascent, descent = font.getmetrics()
+        line_h = ascent + descent
+        pad = self.stroke + 2
+        widths = [self._measure(line, font) for line in lines]
+        image = Image.new(
+            "RGBA",
+            (max(widths) + 2 * pad, int(line_h * LINE_SPACING) * len(lines) + 2 * pad),
+            (0, 0, 0, 0),
+        )
+        draw = ImageDraw.Draw(image)
+        y = pad
+        for line, line_w in zip(lines, widths):
+            x = (image.width - line_w) // 2
+            for emoji, chunk in line:
+                if emoji:
+                    glyph = self._emoji_glyph(chunk, emoji_font, line_h)
+                    image.alpha_composite(glyph, (x, y))
+                    x += glyph.width
+                else:
+                    draw.text((x, y), chunk, font=font, fill="white",
+                              stroke_width=self.stroke, stroke_fill="black")
+                    x += int(font.getlength(chunk))
+            y += int(line_h * LINE_SPACING)
+        return image, len(lines)
+
+    def _wrap(self, words: list, font, limit: int) -> list:
+        """Greedy word wrap; a line is a list of (is_emoji, text) runs."""
+        space = [(False, " ")]
+        lines = [list(words[0])]
+        for word in words[1:]:
+            candidate = lines[-1] + space + word
+            if self._measure(candidate, font) <= limit:
+                lines[-1] = candidate
+            else:
+                lines.append(list(word))
+        return lines
+
+    def _measure(self, line: list, font) -> int:
+        ascent, descent = font.getmetrics()
+        return sum(
+            ascent + descent if emoji else int(font.getlength(chunk))
+            for emoji, chunk in line
+        )
+
+    def _emoji_glyph(self, cluster: str, emoji_font, size: int):
+        """One emoji drawn at the font's bitmap size, scaled to the line height."""
+        left, top, right, bottom = emoji_font.getbbox(cluster)
+        glyph = Image.new("RGBA", (max(right - left, 1), max(bottom - top, 1)), (0, 0, 0, 0))
+        ImageDraw.Draw(glyph).text((-left, -top), cluster, font=emoji_font,
+                                   embedded_color=True)
+        return glyph.resize((size, size), Image.LANCZOS)
+
+    # ------------------------------------------------------------------
+    # Fonts
+    # ------------------------------------------------------------------
+    def _usable_font(self, font_path: Optional[str]) -> Optional[str]:
+        if not font_path or not PIL_AVAILABLE:
+            return font_path
+        try:
+            ImageFont.truetype(font_path, self.font_size)
+            return font_path
+        except OSError as e:
+            logger.warning(f"⚠️ Hook font {font_path} unusable: {e}")
+            return None
+
+    def _load_font(self, size: int):
+        if self.font_path:
+            return ImageFont.truetype(self.font_path, size)
+        return ImageFont.load_default(size)
+
+    def _load_emoji_font(self, emoji_font_path: Optional[str]):
+        if not emoji_font_path or not PIL_AVAILABLE:
+            return None
+        for size in EMOJI_BITMAP_SIZES:
+            try:
+                return ImageFont.truetype(emoji_font_path, size)
+            except OSError:
+                continue
+        logger.info(f"ℹ️ No usable emoji font in {emoji_font_path} — emoji dropped")
+        return None
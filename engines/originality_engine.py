@@ -15,12 +15,17 @@ import subprocess
 import logging
 import random
 
+from utils.ffmpeg_runner import FFmpegRunner, default_runner
+
 logger = logging.getLogger(__name__)
 
 
 class OriginalityEngine:
     """Applies visual transformations for content originality."""
 
+    def __init__(self, runner: FFmpegRunner = None):
+        self.runner = runner or default_runner()
+
     # Effect presets by energy level
     EFFECTS = {
         "low": {
@@ -102,9 +107,7 @@ class OriginalityEngine:
         ]
 
         try:
-            result = subprocess.run(
-                cmd, capture_output=True, text=True, timeout=600
-            )
+            result = self._run(cmd, "Effects")
             if result.returncode != 0:
                 # Fallback: simpler effects
                 logger.warning("⚠️ Complex effects failed, trying simpler...")
@@ -127,9 +130,7 @@ class OriginalityEngine:
         ]
 
         try:
-            result = subprocess.run(
-                cmd, capture_output=True, text=True, timeout=300
-            )
+            result = self._run(cmd, "Simple effects")
             if result.returncode != 0:
                 # Last resort: just copy
                 subprocess.run(["cp", input_path, output_path])
@@ -138,3 +139,7 @@ class OriginalityEngine:
                 logger.info("✅ Simple effects applied")
         except Exception:
             subprocess.run(["cp", input_path, output_path])
+
+    def _run(self, cmd: list, label: str):
+        """Run an FFmpeg command; failures come back as a non-zero returncode."""
+        return self.runner.run(cmd, label, check=False)
@@ -10,11 +10,12 @@ Features:
 
 import subprocess
 import logging
-import json
 import tempfile
 import os
 from pathlib import Path
 
+from utils.ffmpeg_runner import FFmpegRunner, default_runner
+
 logger = logging.getLogger(__name__)
 
 # Try importing faster-whisper (optional)
@@ -29,14 +30,19 @@ except ImportError:
 class SubtitleEngine:
     """Generates and burns subtitles into video."""
 
-    def __init__(self, model_size: str = "base"):
+    def __init__(self, model_size: str = "base", runner: FFmpegRunner = None,
+                 download_root: str = None):
         self.model_size = model_size
         self.whisper_model = None
+        self.runner = runner or default_runner()
+        self.governor = self.runner.governor
 
         if WHISPER_AVAILABLE:
             try:
                 self.whisper_model = WhisperModel(
-                    model_size, device="cpu", compute_type="int8"
+                    model_size, device="cpu", compute_type="int8",
+                    cpu_threads=self.governor.thread_budget(),
+                    download_root=download_root,
                 )
                 logger.info(f"✅ Whisper model '{model_size}' loaded")
             except Exception as e:
@@ -50,14 +56,16 @@ class SubtitleEngine:
         # Method 1: Whisper
         if self.whisper_model:
             try:
-                segments, info = self.whisper_model.transcribe(
-                    video_path,
-                    beam_size=5,
-                    word_timestamps=True,
-                )
-                text = " ".join(
-                    seg.text.strip() for seg in segments
-                )
+                # segments is lazy: decoding happens while joining
+                with self.governor.job("Whisper"):
+                    segments, info = self.whisper_model.transcribe(
+                        video_path,
+                        beam_size=5,
+                        word_timestamps=True,
+                    )
+                    text = " ".join(
+                        seg.text.strip() for seg in segments
+                    )
                 if text:
                     logger.info(f"📝 Whisper transcript: {len(text)} chars")
                     return text
@@ -78,11 +86,13 @@ class SubtitleEngine:
         """
         if self.whisper_model:
             try:
-                segments, info = self.whisper_model.transcribe(
-                    video_path,
-                    beam_size=5,
-                    word_timestamps=True,
-                )
+                with self.governor.job("Whisper"):
+                    segments, info = self.whisper_model.transcribe(
+                        video_path,
+                        beam_size=5,
+                        word_timestamps=True,
+                    )
+                    segments = list(segments)
 
                 srt_content = []
                 idx = 1
@@ -159,7 +169,7 @@ class SubtitleEngine:
         ]
 
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+            result = self._run(cmd, "Subtitles")
             if result.returncode != 0:
                 logger.warning(f"⚠️ Subtitle burn failed, trying simpler filter...")
                 # Fallback without force_style
@@ -171,7 +181,7 @@ class SubtitleEngine:
                     "-c:a", "copy",
                     output_path,
                 ]
-                result2 = subprocess.run(cmd2, capture_output=True, text=True, timeout=300)
+                result2 = self._run(cmd2, "Subtitles (plain)")
                 if result2.returncode != 0:
                     logger.warning("⚠️ Subtitle burn failed completely, copying original")
                     subprocess.run(["cp", input_path, output_path])
@@ -185,6 +195,10 @@ class SubtitleEngine:
             if os.path.exists(srt_path):
                 os.remove(srt_path)
 
+    def _run(self, cmd: list, label: str):
+        """Run an FFmpeg command; failures come back as a non-zero returncode."""
+        return self.runner.run(cmd, label, check=False)
+
     def _extract_ytdlp_subs(self, video_path: str) -> str:
         """Try to extract subtitles via yt-dlp (for YouTube sources)."""
         # This only works if the video_path is a YouTube URL
@@ -192,23 +206,9 @@ class SubtitleEngine:
 
     def _generate_srt_ffmpeg(self, video_path: str, output_srt: str) -> bool:
         """Fallback: Create minimal subtitles based on video duration."""
-        try:
-            # Get duration
-            probe_cmd = [
-                "ffprobe", "-v", "quiet",
-                "-show_entries", "format=duration",
-                "-of", "json", video_path,
-            ]
-            result = subprocess.run(probe_cmd, capture_output=True, text=True, timeout=30)
-            data = json.loads(result.stdout)
-            duration = float(data.get("format", {}).get("duration", 30))
-
-            # Without actual transcript, skip subtitles
-            logger.info("ℹ️ No transcript available for subtitle generation")
-            return False
-
-        except Exception:
-            return False
+        # Without actual transcript, skip subtitles
+        logger.info("ℹ️ No transcript available for subtitle generation")
+        return False
 
     @staticmethod
     def _format_time(seconds: float) -> str:
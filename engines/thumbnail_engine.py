@@ -11,7 +11,8 @@ Features:
 import subprocess
 import logging
 import os
-import json
+
+from utils.ffmpeg_runner import FFmpegRunner, default_runner
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +28,9 @@ except ImportError:
 class ThumbnailEngine:
     """Generates thumbnails from video frames."""
 
+    def __init__(self, runner: FFmpegRunner = None):
+        self.runner = runner or default_runner()
+
     def generate(self, video_path: str, output_path: str,
                  title: str = "", energy: str = "high"):
         """
@@ -63,23 +67,14 @@ class ThumbnailEngine:
 
     def _extract_best_frame(self, video_path: str, output_path: str):
         """Extract a visually interesting frame from the video."""
-        # Get duration
-        try:
-            probe_cmd = [
-                "ffprobe", "-v", "quiet",
-                "-show_entries", "format=duration",
-                "-of", "json", video_path,
-            ]
-            result = subprocess.run(
-                probe_cmd, capture_output=True, text=True, timeout=30
-            )
-            data = json.loads(result.stdout)
-            duration = float(data.get("format", {}).get("duration", 10))
-        except Exception:
-            duration = 10
-
-        # Extract frame at 30% (usually where the action is)
+        info = self.runner.probe(video_path, keyframes=True)
+        duration = info.duration if info and info.duration else 10
+
+        # Frame at ~30% (usually where the action is), moved onto a nearby
+        # keyframe so ffmpeg decodes a single frame after the seek
         timestamp = duration * 0.3
+        if info:
+            timestamp = info.nearest_keyframe(timestamp)
 
         cmd = [
             "ffmpeg", "-y",
@@ -91,7 +86,7 @@ class ThumbnailEngine:
         ]
 
         try:
-            subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            self.runner.run(cmd, "Thumbnail frame", duration=0.1, check=False)
             if os.path.exists(output_path):
                 logger.info(f"🖼️ Frame extracted at {timestamp:.1f}s")
         except Exception as e:
@@ -175,7 +170,7 @@ class ThumbnailEngine:
         ]
 
         try:
-            subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            self.runner.run(cmd, "Thumbnail", duration=0.1)
             logger.info(f"🖼️ FFmpeg thumbnail saved: {output_path}")
         except Exception as e:
             logger.error(f"❌ FFmpeg thumbnail failed: {e}")
@@ -0,0 +1,57 @@
+import pytest
+
+from engines.export_engine import ExportEngine
+from utils.media_info import MediaInfo
+
+PLATFORMS = ["youtube_shorts", "tiktok", "reels"]
+
+
+class RecordingRunner:
+    """Probes from a canned MediaInfo and records the commands it is given."""
+
+    def __init__(self, info: MediaInfo):
+        self.info = info
+        self.commands = []
+
+    def probe(self, path, keyframes=False):
+        return self.info
+
+    def run(self, cmd, label, **kwargs):
+        self.commands.append(cmd)
+
+
+def _export(info: MediaInfo) -> list:
+    runner = RecordingRunner(info)
+    ExportEngine(PLATFORMS, runner).export(
+        "master.mp4", {p: f"{p}.mp4" for p in PLATFORMS}, hook_text="",
+    )
+    (cmd,) = runner.commands
+    return cmd
+
+
+def _graph(cmd: list) -> str:
+    return cmd[cmd.index("-filter_complex") + 1]
+
+
+@pytest.fixture
+def silent_master():
+    return MediaInfo("master.mp4", duration=30.0, width=1080, height=1920,
+                     video_codec="h264")
+
+
+def test_silent_master_exports_video_only(silent_master):
+    cmd = _export(silent_master)
+    assert "[0:a]" not in _graph(cmd)
+    assert "loudnorm" not in _graph(cmd)
+    assert not any("aout" in arg for arg in cmd)
+    assert cmd.count("-an") == len(PLATFORMS)
+    assert "-c:a" not in cmd
+
+
+def test_master_with_audio_keeps_loudness_per_platform(silent_master):
+    silent_master.audio_codec = "aac"
+    cmd = _export(silent_master)
+    assert f"[0:a]asplit={len(PLATFORMS)}" in _graph(cmd)
+    assert _graph(cmd).count("loudnorm") == len(PLATFORMS)
+    assert "-an" not in cmd
+    assert cmd.count("-c:a") == len(PLATFORMS)
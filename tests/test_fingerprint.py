@@ -0,0 +1,60 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from utils.failures import FailureCause, PipelineFailure  # noqa: E402
+from utils.fingerprint import Fingerprint, FingerprintIndex  # noqa: E402
+from utils.state_store import StateStore  # noqa: E402
+
+SECONDS = 30
+
+
+def _fingerprint(video_seed: int, audio_seed: int) -> Fingerprint:
+    t = np.arange(SECONDS, dtype=np.int16)
+    video = np.random.default_rng(video_seed).integers(0, 2 ** 63, SECONDS, dtype=np.uint64)
+    audio = np.random.default_rng(audio_seed).integers(0, 2 ** 32, SECONDS, dtype=np.uint32)
+    return Fingerprint(video, t, audio, t.copy())
+
+
+@pytest.fixture
+def index(tmp_path):
+    store = StateStore(tmp_path / "state.db")
+    index = FingerprintIndex(store)
+    index.add("posted", _fingerprint(video_seed=1, audio_seed=100), kind="upload")
+    yield index
+    store.close()
+
+
+def test_same_video_is_a_duplicate(index):
+    match = index.lookup(_fingerprint(video_seed=1, audio_seed=100))
+    assert match["id"] == "posted"
+    assert match["video"] == 1.0
+    assert match["audio"] == 1.0
+
+
+def test_shared_audio_over_different_video_is_audio_only(index):
+    match = index.lookup(_fingerprint(video_seed=2, audio_seed=100))
+    assert match["id"] == "posted"
+    assert match["video"] is None
+    assert match["audio"] == 1.0
+
+
+def test_unrelated_clip_does_not_match(index):
+    assert index.lookup(_fingerprint(video_seed=3, audio_seed=300)) is None
+
+
+def test_check_duplicate_keeps_shared_sound(index, monkeypatch):
+    import utils.fingerprint
+    import viral_bot
+
+    monkeypatch.setattr(viral_bot, "fingerprints", index)
+    monkeypatch.setattr(viral_bot, "analysis_media", lambda video_data: "proxy.mp4")
+
+    fp = _fingerprint(video_seed=2, audio_seed=100)
+    monkeypatch.setattr(utils.fingerprint, "extract_fingerprint", lambda *a, **k: fp)
+    assert viral_bot.check_duplicate({"id": "new"}) is fp
+
+    fp = _fingerprint(video_seed=1, audio_seed=200)
+    with pytest.raises(PipelineFailure) as failure:
+        viral_bot.check_duplicate({"id": "reupload"})
+    assert failure.value.cause == FailureCause.DUPLICATE
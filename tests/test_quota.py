@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta, timezone
+
+from utils.quota import QUOTA_COST, QUOTA_TZ, QuotaLedger
+from utils.state_store import StateStore
+
+
+def _utc(moment: datetime) -> str:
+    """Naive UTC isoformat, as the state tables stamp rows."""
+    return moment.astimezone(timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def test_quota_day_starts_at_pacific_midnight(tmp_path):
+    store = StateStore(tmp_path / "state.db")
+    midnight = datetime.now(QUOTA_TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+    # Yesterday's search (Pacific) can be "today" in UTC; it no longer counts
+    for channel, at in (("before", midnight - timedelta(minutes=30)),
+                        ("after", midnight + timedelta(seconds=1))):
+        store.write(
+            "INSERT INTO searches (channel, searched_at, results, fresh) "
+            "VALUES (?, ?, 0, 0)", (channel, _utc(at)),
+        )
+
+    ledger = QuotaLedger(store, daily_units=1000)
+    assert ledger.spent("search") == QUOTA_COST["search.list"]
+    assert ledger.left() == 1000 - QUOTA_COST["search.list"]
+    store.close()
+
+
+def test_searches_and_uploads_share_the_budget(tmp_path):
+    store = StateStore(tmp_path / "state.db")
+    ledger = QuotaLedger(store, daily_units=2000)
+    assert ledger.reserve("search", "search.list", cap=200)
+    assert ledger.reserve("upload", "videos.insert")
+    # 1700 spent: another upload doesn't fit, nor does a search past its cap
+    assert not ledger.reserve("upload", "videos.insert")
+    assert ledger.reserve("search", "search.list", cap=200)
+    assert not ledger.reserve("search", "search.list", cap=200)
+    store.close()
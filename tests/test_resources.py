@@ -0,0 +1,47 @@
+from utils.resources import ResourceGovernor
+
+
+def _option_values(cmd: list, option: str) -> list:
+    return [cmd[i + 1] for i, arg in enumerate(cmd) if arg == option]
+
+
+def test_single_output_gets_the_whole_budget():
+    cmd = ResourceGovernor.apply(
+        ["ffmpeg", "-y", "-i", "in.mp4", "-c:v", "libx264", "out.mp4"], 8
+    )
+    assert cmd[-1] == "out.mp4"
+    assert _option_values(cmd, "-threads") == ["8"]
+    assert _option_values(cmd, "-x264-params") == ["threads=8:lookahead-threads=4"]
+
+
+def test_budget_is_split_across_outputs():
+    # Multi-output export: one x264 encoder per platform in one process
+    cmd = ["ffmpeg", "-y", "-i", "master.mp4", "-filter_complex", "[0:v]split=3[a][b][c]"]
+    for label in "abc":
+        cmd += ["-map", f"[{label}]", "-c:v", "libx264", "-preset", "fast", f"{label}.mp4"]
+    cmd = ResourceGovernor.apply(cmd, 8)
+
+    threads = [int(t) for t in _option_values(cmd, "-threads")]
+    assert len(threads) == 3
+    assert sum(threads) <= 8
+    x264 = [dict(kv.split("=") for kv in p.split(":"))
+            for p in _option_values(cmd, "-x264-params")]
+    assert sum(int(p["threads"]) for p in x264) <= 8
+    # Outputs keep their order and options
+    assert [a for a in cmd if a.endswith(".mp4")] == ["master.mp4", "a.mp4", "b.mp4", "c.mp4"]
+
+
+def test_existing_x264_params_are_kept():
+    cmd = ResourceGovernor.apply(
+        ["ffmpeg", "-i", "in.mp4", "-c:v", "libx264", "-x264-params", "keyint=60",
+         "out.mp4"], 4
+    )
+    assert _option_values(cmd, "-x264-params") == ["keyint=60"]
+
+
+def test_tiny_budget_gives_each_output_one_thread():
+    cmd = ResourceGovernor.apply(
+        ["ffmpeg", "-i", "in.mp4", "-c:v", "libx264", "a.mp4", "-c:v", "libx264", "b.mp4",
+         "-c:v", "libx264", "c.mp4"], 2
+    )
+    assert _option_values(cmd, "-threads") == ["1", "1", "1"]
@@ -0,0 +1,130 @@
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import utils.resumable_upload as resumable_upload
+from utils.fake_upload_server import FakeUploadServer
+from utils.resumable_upload import (
+    CHUNK_ALIGN, ResumableUploader, UploadError, UploadSessionStore,
+)
+
+SIZE = 3 * CHUNK_ALIGN + 12345    # three full chunks and a short last one
+METADATA = {"snippet": {"title": "test"}, "status": {"privacyStatus": "private"}}
+
+
+@pytest.fixture
+def server():
+    with FakeUploadServer() as server:
+        yield server
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "short.mp4"
+    path.write_bytes(os.urandom(SIZE))
+    return path
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    """Backoff delays, recorded instead of slept."""
+    slept = []
+    monkeypatch.setattr(resumable_upload, "time", SimpleNamespace(
+        sleep=slept.append, monotonic=time.monotonic, time=time.time,
+    ))
+    return slept
+
+
+def _uploader(server, tmp_path, **kwargs) -> ResumableUploader:
+    return ResumableUploader(
+        UploadSessionStore(tmp_path / "upload_sessions.json"),
+        endpoint=server.endpoint, chunk_size=CHUNK_ALIGN, adaptive=False,
+        **kwargs,
+    )
+
+
+def _tokens(on_call: dict = None):
+    """Token provider running on_call[n] before the n-th request is built."""
+    calls = []
+
+    def provider():
+        calls.append(1)
+        action = (on_call or {}).get(len(calls))
+        if action:
+            action()
+        return "token"
+    return provider
+
+
+def _uploaded(server, response: dict) -> bytes:
+    return server.completed[response["id"]]["data"]
+
+
+def _puts(server) -> list:
+    return [r for method, _, r in server.requests if method == "PUT"]
+
+
+def test_resumes_after_dropped_chunk(server, video, tmp_path, delays):
+    server.drop_next(keep_bytes=1000)
+    response = _uploader(server, tmp_path).upload(str(video), METADATA, _tokens())
+
+    assert _uploaded(server, response) == video.read_bytes()
+    puts = _puts(server)
+    # The server's Range (1000 bytes kept) is where the upload picks up
+    assert f"bytes */{SIZE}" in puts
+    assert f"bytes 1000-{1000 + CHUNK_ALIGN - 1}/{SIZE}" in puts
+    assert len(delays) == 1
+
+
+def test_retries_5xx_with_backoff(server, video, tmp_path, delays):
+    server.fail_next(503, count=3)
+    response = _uploader(server, tmp_path, backoff_base=1.0).upload(
+        str(video), METADATA, _tokens()
+    )
+
+    assert _uploaded(server, response) == video.read_bytes()
+    assert len(delays) == 3
+    # Exponential with up to +50% jitter: 1-1.5 s, 2-3 s, 4-6 s
+    for n, delay in enumerate(delays):
+        assert 2 ** n <= delay <= 1.5 * 2 ** n
+
+
+def test_gives_up_after_max_retries(server, video, tmp_path, delays):
+    server.fail_next(503, count=10)
+    with pytest.raises(UploadError):
+        _uploader(server, tmp_path, max_retries=2).upload(str(video), METADATA, _tokens())
+    assert len(delays) == 2
+
+
+def test_expired_session_restarts_upload(server, video, tmp_path, delays):
+    # Requests: POST (1), first chunk (2); the session vanishes before the second
+    tokens = _tokens({3: server.expire_sessions})
+    uploader = _uploader(server, tmp_path)
+    response = uploader.upload(str(video), METADATA, tokens)
+
+    assert _uploaded(server, response) == video.read_bytes()
+    assert sum(1 for method, _, _ in server.requests if method == "POST") == 2
+    assert _puts(server).count(f"bytes 0-{CHUNK_ALIGN - 1}/{SIZE}") == 2
+    assert uploader.sessions.get(uploader._session_key(str(video), METADATA,
+                                                        "snippet,status")) is None
+
+
+def test_resumes_persisted_session_in_new_process(server, video, tmp_path, delays):
+    # First process: the second chunk fails and it gives up, leaving the
+    # session (one chunk acknowledged) on disk
+    tokens = _tokens({3: lambda: server.fail_next(503)})
+    with pytest.raises(UploadError):
+        _uploader(server, tmp_path, max_retries=0).upload(str(video), METADATA, tokens)
+    assert (tmp_path / "upload_sessions.json").exists()
+
+    # Second process: same session file, fresh uploader
+    response = _uploader(server, tmp_path).upload(str(video), METADATA, _tokens())
+
+    assert _uploaded(server, response) == video.read_bytes()
+    assert sum(1 for method, _, _ in server.requests if method == "POST") == 1
+    puts = _puts(server)
+    assert f"bytes */{SIZE}" in puts
+    assert puts.count(f"bytes 0-{CHUNK_ALIGN - 1}/{SIZE}") == 1
+    assert f"bytes {CHUNK_ALIGN}-{2 * CHUNK_ALIGN - 1}/{SIZE}" in puts
@@ -2,115 +2,348 @@
 Analytics Tracker — Logs upload performance for optimization.
 
 Tracks:
-- Upload history with metadata
-- Success/failure rates
-- Best performing niches
-- Time-based patterns
+- Upload history with metadata (niche, source channel, publish hour,
+  effect preset)
+- How each upload performs: views/likes/comments pulled for our own
+  uploads in batches of 50 IDs per videos.list call
+- Success/failure rates per session
+- Incremental rollups per niche, channel, hour of day and effect preset:
+  every upload and every stats pull adds its delta, so summaries,
+  candidate ranking and slot selection never rescan the uploads
+- Columnar export (CSV, or Parquet when pyarrow is installed) for
+  offline analysis
+
+Backed by the SQLite StateStore; aggregates run as indexed SQL queries.
 """
 
-import json
+import csv
+import importlib.util
 import logging
-from datetime import datetime
+import math
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Callable
+
+from utils.state_store import StateStore
 
 logger = logging.getLogger(__name__)
 
+DIMENSIONS = ("niche", "channel", "hour", "effects")
+ROLLUP_VERSION = 1
+STATS_BATCH = 50            # IDs per videos.list call
+PRIOR_UPLOADS = 3           # pseudo-uploads at our average (shrinkage)
+AFFINITY_RANGE = (0.5, 2.0)
+
+# dimension → SQL expression over `uploads u` giving the rollup key
+_DIMENSION_SQL = {
+    "niche": "COALESCE(u.niche, 'unknown')",
+    "channel": "COALESCE(u.source_channel, 'unknown')",
+    "hour": "COALESCE(CAST(u.publish_hour AS TEXT), "
+            "CAST(CAST(strftime('%H', u.timestamp) AS INTEGER) AS TEXT))",
+    "effects": "COALESCE(u.effects, 'unknown')",
+}
+
+_ROLLUP_UPSERT = (
+    "INSERT INTO rollups (dimension, key, uploads, measured, views, likes, comments) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(dimension, key) DO UPDATE SET "
+    "uploads = uploads + excluded.uploads, measured = measured + excluded.measured, "
+    "views = views + excluded.views, likes = likes + excluded.likes, "
+    "comments = comments + excluded.comments"
+)
+
+EXPORT_COLUMNS = (
+    "video_id", "source_id", "source_channel", "niche", "title", "duration",
+    "timestamp", "publish_hour", "effects", "views", "likes", "comments",
+    "fetched_at",
+)
+
+
+def effect_preset(energy: str, effects: list) -> str:
+    """Rollup key for the originality settings of a render."""
+    return f"{energy or 'high'}:{'+'.join(sorted(effects or ())) or 'none'}"
+
 
 class AnalyticsTracker:
     """Tracks and analyzes upload performance."""
 
-    def __init__(self, base_dir: Path):
-        self.analytics_file = base_dir / "analytics.json"
-        self._ensure_file()
-
-    def _ensure_file(self):
-        """Create analytics file if it doesn't exist."""
-        if not self.analytics_file.exists():
-            with open(self.analytics_file, "w", encoding="utf-8") as f:
-                json.dump({"uploads": [], "sessions": []}, f, indent=2)
-
-    def _load(self) -> dict:
-        """Load analytics data."""
-        try:
-            with open(self.analytics_file, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return {"uploads": [], "sessions": []}
-
-    def _save(self, data: dict):
-        """Save analytics data."""
-        # Keep only last 200 entries to prevent bloat
-        if len(data.get("uploads", [])) > 200:
-            data["uploads"] = data["uploads"][-200:]
-        if len(data.get("sessions", [])) > 50:
-            data["sessions"] = data["sessions"][-50:]
-
-        with open(self.analytics_file, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, default=str)
+    def __init__(self, store: StateStore):
+        self.store = store
+        if self.store.get_meta("rollup_version") != ROLLUP_VERSION:
+            self.rebuild()
 
+    # ------------------------------------------------------------------
+    # Logging
+    # ------------------------------------------------------------------
     def log_upload(self, video_id: str, source_id: str,
                    source_channel: str, niche: str,
-                   title: str, duration: float):
-        """Log a successful upload."""
-        data = self._load()
-        data["uploads"].append({
-            "video_id": video_id,
-            "source_id": source_id,
-            "source_channel": source_channel,
-            "niche": niche,
-            "title": title,
-            "duration": round(duration, 1),
-            "timestamp": datetime.utcnow().isoformat(),
-        })
-        self._save(data)
+                   title: str, duration: float, effects: str = None,
+                   publish_at: datetime = None):
+        """Log a successful upload (`publish_at`: scheduled publish time)."""
+        now = datetime.utcnow()
+        hour = (publish_at or now).hour
+        self.store.write(
+            "INSERT OR REPLACE INTO uploads (video_id, source_id, source_channel, "
+            "niche, title, duration, timestamp, effects, publish_hour) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (video_id, source_id, source_channel, niche, title,
+             round(duration, 1), now.isoformat(), effects, hour),
+        )
+        keys = {
+            "niche": niche or "unknown",
+            "channel": source_channel or "unknown",
+            "hour": str(hour),
+            "effects": effects or "unknown",
+        }
+        for dimension in DIMENSIONS:
+            self.store.write(_ROLLUP_UPSERT, (dimension, keys[dimension], 1, 0, 0, 0, 0))
         logger.info(f"📊 Analytics: logged upload {video_id}")
 
     def log_session(self, success_count: int, total_attempts: int):
         """Log a session summary."""
-        data = self._load()
-        data["sessions"].append({
-            "success": success_count,
-            "attempts": total_attempts,
-            "rate": round(success_count / max(total_attempts, 1) * 100, 1),
-            "timestamp": datetime.utcnow().isoformat(),
-        })
-        self._save(data)
+        self.store.write(
+            "INSERT INTO sessions (success, attempts, rate, timestamp) "
+            "VALUES (?, ?, ?, ?)",
+            (success_count, total_attempts,
+             round(success_count / max(total_attempts, 1) * 100, 1),
+             datetime.utcnow().isoformat()),
+        )
+
+    # ------------------------------------------------------------------
+    # Performance stats of our uploads
+    # ------------------------------------------------------------------
+    def stats_due(self, every_hours: float) -> bool:
+        last = self.store.get_meta("stats_refreshed_at")
+        return not last or (
+            datetime.utcnow() - datetime.fromisoformat(last)
+        ) >= timedelta(hours=every_hours)
+
+    def refresh_stats(self, fetch: Callable[[list], dict], max_age_hours: float = 6,
+                      recent_days: int = 30, limit: int = 500) -> int:
+        """
+        Pull views/likes/comments for uploads younger than `recent_days`
+        whose stats are older than `max_age_hours`, STATS_BATCH IDs per
+        `fetch(ids) -> {id: details}` call. Each changed row moves the
+        rollups by its delta. Returns the number of uploads updated.
+        """
+        now = datetime.utcnow()
+        rows = self.store.query(
+            f"SELECT u.video_id, {', '.join(_DIMENSION_SQL[d] + ' AS ' + d for d in DIMENSIONS)}, "
+            "s.views, s.likes, s.comments FROM uploads u "
+            "LEFT JOIN upload_stats s ON s.video_id = u.video_id "
+            "WHERE u.timestamp >= ? AND (s.fetched_at IS NULL OR s.fetched_at < ?) "
+            "ORDER BY s.fetched_at IS NOT NULL, s.fetched_at LIMIT ?",
+            ((now - timedelta(days=recent_days)).isoformat(),
+             (now - timedelta(hours=max_age_hours)).isoformat(), limit),
+        )
+        updated, fetched = 0, True
+        for i in range(0, len(rows), STATS_BATCH):
+            batch = {r["video_id"]: r for r in rows[i:i + STATS_BATCH]}
+            try:
+                details = fetch(list(batch))
+            except Exception as e:
+                logger.warning(f"⚠️ Upload stats fetch failed: {e}")
+                fetched = False
+                break
+            stats_rows, deltas = [], {}
+            for video_id, old in batch.items():
+                d = details.get(video_id)
+                if not d:
+                    continue    # scheduled (still private) or removed
+                new = tuple(int(d.get(k) or 0) for k in ("views", "likes", "comments"))
+                stats_rows.append((video_id, *new, now.isoformat()))
+                first = old["views"] is None
+                delta = (int(first), *(
+                    n - (old[k] or 0) for n, k in zip(new, ("views", "likes", "comments"))
+                ))
+                for dimension in DIMENSIONS:
+                    key = (dimension, old[dimension])
+                    deltas[key] = tuple(a + b for a, b in zip(deltas.get(key, (0,) * 4), delta))
+            if not stats_rows:
+                continue
+            self.store.flush()
+            with self.store.connection() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO upload_stats (video_id, views, likes, "
+                    "comments, fetched_at) VALUES (?, ?, ?, ?, ?)", stats_rows,
+                )
+                conn.executemany(_ROLLUP_UPSERT, [
+                    (dimension, key, 0, *delta) for (dimension, key), delta in deltas.items()
+                ])
+            updated += len(stats_rows)
+
+        # A failed fetch (no API client, quota out) leaves it due for the next
+        # run; a successful one counts even if every upload is still private
+        if fetched:
+            self.store.set_meta("stats_refreshed_at", now.isoformat())
+        if rows:
+            logger.info(f"📊 Upload stats refreshed: {updated}/{len(rows)} uploads")
+        return updated
+
+    # ------------------------------------------------------------------
+    # Rollups
+    # ------------------------------------------------------------------
+    def rebuild(self):
+        """Recompute every rollup from uploads + upload_stats (after merges/upgrades)."""
+        self.store.flush()
+        with self.store.connection() as conn:
+            conn.execute("DELETE FROM rollups")
+            for dimension in DIMENSIONS:
+                conn.execute(
+                    "INSERT INTO rollups (dimension, key, uploads, measured, views, "
+                    f"likes, comments) SELECT ?, {_DIMENSION_SQL[dimension]}, COUNT(*), "
+                    "COUNT(s.video_id), COALESCE(SUM(s.views), 0), "
+                    "COALESCE(SUM(s.likes), 0), COALESCE(SUM(s.comments), 0) "
+                    "FROM uploads u LEFT JOIN upload_stats s ON s.video_id = u.video_id "
+                    "GROUP BY 2",
+                    (dimension,),
+                )
+        self.store.set_meta("rollup_version", ROLLUP_VERSION)
+        self.store.flush()
 
+    def rollup(self, dimension: str) -> dict:
+        """{key: {uploads, measured, views, likes, comments, avg_views}} for one dimension."""
+        rows = self.store.query(
+            "SELECT key, uploads, measured, views, likes, comments FROM rollups "
+            "WHERE dimension = ? ORDER BY uploads DESC, key", (dimension,),
+        )
+        return {
+            r["key"]: {
+                "uploads": r["uploads"], "measured": r["measured"],
+                "views": r["views"], "likes": r["likes"], "comments": r["comments"],
+                "avg_views": round(r["views"] / r["measured"], 1) if r["measured"] else None,
+            }
+            for r in rows
+        }
+
+    def niche_counts(self) -> dict:
+        """Upload count per niche."""
+        return {k: v["uploads"] for k, v in self.rollup("niche").items()}
+
+    def affinity(self, candidates: list) -> dict:
+        """
+        {video_id: multiplier} from how our uploads of each candidate's
+        niche and source channel performed against our average. Keys
+        with few measured uploads shrink towards 1.0.
+        """
+        niches, channels = self.rollup("niche"), self.rollup("channel")
+        measured = sum(v["measured"] for v in niches.values())
+        if not measured:
+            return {}
+        mean = sum(v["views"] for v in niches.values()) / measured
+        if mean <= 0:
+            return {}
+
+        def ratio(entry):
+            if not entry:
+                return 1.0
+            return (entry["views"] + PRIOR_UPLOADS * mean) / (
+                (entry["measured"] + PRIOR_UPLOADS) * mean
+            )
+
+        low, high = AFFINITY_RANGE
+        return {
+            v["id"]: round(min(high, max(low, math.sqrt(
+                ratio(niches.get(v.get("niche"))) * ratio(channels.get(v.get("channel")))
+            ))), 3)
+            for v in candidates
+        }
+
+    def best_hours(self, count: int, min_measured: int = 3) -> list:
+        """Publish hours (UTC) with the most views per measured upload, best first."""
+        hours = [
+            (v["avg_views"], int(k)) for k, v in self.rollup("hour").items()
+            if v["measured"] >= min_measured and k.isdigit()
+        ]
+        return [h for _, h in sorted(hours, reverse=True)[:count]]
+
+    # ------------------------------------------------------------------
+    # Reports
+    # ------------------------------------------------------------------
     def print_summary(self):
         """Print analytics summary to logger."""
-        data = self._load()
-        uploads = data.get("uploads", [])
-
-        if not uploads:
+        niches = self.rollup("niche")
+        total = sum(v["uploads"] for v in niches.values())
+        if not total:
             logger.info("📊 No uploads yet")
             return
 
-        # Count by niche
-        niche_counts = {}
-        for u in uploads:
-            n = u.get("niche", "unknown")
-            niche_counts[n] = niche_counts.get(n, 0) + 1
-
-        # Recent uploads
-        recent = uploads[-10:]
+        recent = self.store.query(
+            "SELECT niche, title, duration, timestamp FROM uploads "
+            "ORDER BY timestamp DESC LIMIT 5"
+        )
 
-        logger.info(f"📊 Total uploads: {len(uploads)}")
-        logger.info(f"📊 By niche: {niche_counts}")
-        logger.info(f"📊 Last 5 uploads:")
-        for u in recent[-5:]:
+        logger.info(f"📊 Total uploads: {total}")
+        logger.info(f"📊 By niche: { {k: v['uploads'] for k, v in niches.items()} }")
+        for dimension in DIMENSIONS:
+            best = sorted(
+                ((v["avg_views"], k) for k, v in self.rollup(dimension).items()
+                 if v["avg_views"] is not None),
+                reverse=True,
+            )[:3]
+            if best:
+                logger.info(
+                    f"📊 Best {dimension} by views/upload: "
+                    + ", ".join(f"{k} ({avg:,.0f})" for avg, k in best)
+                )
+        logger.info("📊 Last 5 uploads:")
+        for u in reversed(recent):
             logger.info(
-                f"   • [{u.get('niche', '?')}] {u.get('title', '?')} "
-                f"({u.get('duration', 0)}s) — {u.get('timestamp', '?')[:10]}"
+                f"   • [{u['niche'] or '?'}] {u['title'] or '?'} "
+                f"({u['duration'] or 0}s) — {(u['timestamp'] or '?')[:10]}"
             )
 
     def get_best_niche(self) -> str:
-        """Return the niche with most successful uploads."""
-        data = self._load()
-        niche_counts = {}
-        for u in data.get("uploads", []):
-            n = u.get("niche", "entertainment")
-            niche_counts[n] = niche_counts.get(n, 0) + 1
-
-        if niche_counts:
-            return max(niche_counts, key=niche_counts.get)
-        return "entertainment"
+        """Return the niche with the most views per upload (most uploads if unmeasured)."""
+        niches = self.rollup("niche")
+        niches.pop("unknown", None)
+        if not niches:
+            return "entertainment"
+        return max(niches, key=lambda k: (niches[k]["avg_views"] or 0, niches[k]["uploads"]))
+
+    def export(self, directory: Path, fmt: str = "csv") -> dict:
+        """
+        Write uploads (joined with their latest stats) and the rollups as
+        columnar files in `directory`; returns {table: path}. "parquet"
+        needs pyarrow.
+        """
+        if fmt not in ("csv", "parquet"):
+            raise ValueError(f"Unknown export format: {fmt}")
+        if fmt == "parquet" and importlib.util.find_spec("pyarrow") is None:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+
+        uploads = self.store.query(
+            "SELECT u.video_id, u.source_id, u.source_channel, u.niche, u.title, "
+            "u.duration, u.timestamp, u.publish_hour, u.effects, s.views, s.likes, "
+            "s.comments, s.fetched_at FROM uploads u "
+            "LEFT JOIN upload_stats s ON s.video_id = u.video_id ORDER BY u.timestamp"
+        )
+        rollups = self.store.query(
+            "SELECT dimension, key, uploads, measured, views, likes, comments "
+            "FROM rollups ORDER BY dimension, key"
+        )
+        tables = {
+            "uploads": (EXPORT_COLUMNS, uploads),
+            "rollups": (("dimension", "key", "uploads", "measured", "views",
+                         "likes", "comments"), rollups),
+        }
+
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        written = {}
+        for name, (columns, rows) in tables.items():
+            path = directory / f"{name}.{fmt}"
+            if fmt == "parquet":
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                pq.write_table(pa.table({
+                    c: [r[i] for r in rows] for i, c in enumerate(columns)
+                }), path)
+            else:
+                with open(path, "w", newline="", encoding="utf-8") as f:
+                    writer = csv.writer(f)
+                    writer.writerow(columns)
+                    writer.writerows(tuple(r) for r in rows)
+            written[name] = str(path)
+            logger.info(f"📤 {name}: {len(rows)} rows → {path}")
+        return written
@@ -0,0 +1,208 @@
+"""
+Artifact Store — Content-addressed cache for pipeline outputs.
+
+Keeps source downloads, transcripts, clips and final renders outside
+TEMP_DIR so a retry (or the next run) can skip every stage whose inputs
+did not change.
+
+Keys are derived from:
+- Source video ID
+- Stage name
+- Hash of the stage parameters
+- Key of the upstream artifact (so a change re-runs only downstream stages)
+
+Size-bounded with least-recently-used eviction; artifacts of pinned
+sources (being rendered or waiting for upload) are never evicted.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactStore:
+    """Content-addressed, size-bounded LRU store for stage artifacts."""
+
+    def __init__(self, root: Path, max_bytes: int = 5 * 1024 ** 3):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index_file = self.root / "index.json"
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = self._load_index()
+        self._pins = {}         # source_id → refcount
+        self._dirty = False     # last_used updates not yet written
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+    @staticmethod
+    def key(source_id: str, stage: str, params: dict = None,
+            parent: str = None) -> str:
+        """Build a stable key for a stage output."""
+        payload = json.dumps(
+            {
+                "source": source_id,
+                "stage": stage,
+                "params": params or {},
+                "parent": parent or "",
+            },
+            sort_keys=True, default=str,
+        )
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+        return f"{source_id}-{stage}-{digest}"
+
+    # ------------------------------------------------------------------
+    # Files
+    # ------------------------------------------------------------------
+    def get(self, key: str) -> Optional[str]:
+        """Return the stored file path for a key, or None on miss."""
+        with self._lock:
+            entry = self._index.get(key)
+            if not entry:
+                return None
+
+            path = self.root / entry["file"]
+            if not path.exists():
+                self._index.pop(key, None)
+                self._dirty = True
+                return None
+
+            # Written with the next put() or flush(), not on every hit
+            entry["last_used"] = time.time()
+            self._dirty = True
+
+        logger.info(f"♻️ Artifact hit: {key}")
+        return str(path)
+
+    def put(self, key: str, src_path: str, move: bool = False,
+            suffix: str = None) -> str:
+        """Store a file under a key and return its stored path."""
+        src = Path(src_path)
+        dest = self.root / f"{key}{suffix if suffix is not None else src.suffix}"
+        tmp = dest.with_name(dest.name + ".part")
+
+        if move:
+            shutil.move(str(src), tmp)
+        else:
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+
+        with self._lock:
+            self._index[key] = {
+                "file": dest.name,
+                "size": dest.stat().st_size,
+                "last_used": time.time(),
+            }
+            self._evict(keep=key)
+            self._save_index()
+
+        return str(dest)
+
+    # ------------------------------------------------------------------
+    # JSON documents (analysis results, transcripts)
+    # ------------------------------------------------------------------
+    def get_json(self, key: str):
+        """Return a stored JSON document, or None on miss."""
+        path = self.get(key)
+        if not path:
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ Corrupt artifact {key}: {e}")
+            return None
+
+    def put_json(self, key: str, data) -> str:
+        """Store a JSON document under a key."""
+        tmp = self.root / f"{key}.json.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, default=str)
+        return self.put(key, str(tmp), move=True, suffix=".json")
+
+    # ------------------------------------------------------------------
+    # Pins
+    # ------------------------------------------------------------------
+    def pin(self, source_id: str):
+        """Protect every artifact of a source from eviction until release()."""
+        with self._lock:
+            self._pins[source_id] = self._pins.get(source_id, 0) + 1
+
+    def release(self, source_id: str):
+        with self._lock:
+            count = self._pins.get(source_id, 0) - 1
+            if count > 0:
+                self._pins[source_id] = count
+            else:
+                self._pins.pop(source_id, None)
+
+    @staticmethod
+    def _source_of(key: str) -> str:
+        # Keys are "{source_id}-{stage}-{digest}"; IDs may contain "-",
+        # stage names don't
+        return key.rsplit("-", 2)[0]
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def flush(self):
+        """Write pending last-used updates to the index."""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def total_bytes(self) -> int:
+        """Return the total size of stored artifacts."""
+        return sum(e.get("size", 0) for e in self._index.values())
+
+    def _evict(self, keep: str = None):
+        """Drop least-recently-used artifacts until under the size cap."""
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+
+        by_age = sorted(self._index.items(), key=lambda kv: kv[1]["last_used"])
+        for key, entry in by_age:
+            if total <= self.max_bytes:
+                break
+            if key == keep or self._source_of(key) in self._pins:
+                continue
+            try:
+                (self.root / entry["file"]).unlink()
+            except FileNotFoundError:
+                pass
+            total -= entry.get("size", 0)
+            del self._index[key]
+            logger.info(f"🗑️ Evicted artifact: {key}")
+
+    def _load_index(self) -> dict:
+        """Load the index, dropping entries whose files are gone."""
+        if not self.index_file.exists():
+            return {}
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ Error loading artifact index: {e}")
+            return {}
+        return {
+            k: v for k, v in index.items()
+            if (self.root / v.get("file", "")).exists()
+        }
+
+    def _save_index(self):
+        """Persist the index atomically."""
+        tmp = self.index_file.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self.index_file)
+        self._dirty = False
@@ -2,12 +2,18 @@
 Cache Manager — Persistent tracking of processed/failed video IDs.
 
 Prevents re-processing the same videos across runs.
-Uses JSON files for simplicity (no DB needed).
+Backed by the SQLite StateStore (indexed lookups, no size cap).
+
+Failures carry a cause (see utils.failures) and a retry-after time:
+transient failures come back as cheap retry candidates instead of
+being blacklisted forever.
 """
 
-import json
 import logging
-from pathlib import Path
+from datetime import datetime
+
+from utils.failures import FailureCause, RETRY_PRIORITY, retry_after
+from utils.state_store import StateStore
 
 logger = logging.getLogger(__name__)
 
@@ -15,58 +21,144 @@ logger = logging.getLogger(__name__)
 class CacheManager:
     """Manages processed and failed video ID caches."""
 
-    def __init__(self, base_dir: Path):
-        self.processed_file = base_dir / "processed_ids.json"
-        self.failed_file = base_dir / "failed_ids.json"
-
-    def _load(self, file_path: Path) -> set:
-        """Load IDs from a JSON file."""
-        if file_path.exists():
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                if isinstance(data, dict) and "ids" in data:
-                    return set(data["ids"])
-                elif isinstance(data, list):
-                    return set(data)
-            except Exception as e:
-                logger.warning(f"⚠️ Error loading {file_path.name}: {e}")
-        return set()
-
-    def _save(self, file_path: Path, video_id: str):
-        """Add an ID to a JSON cache file."""
-        ids = self._load(file_path)
-        ids.add(video_id)
-
-        # Keep only last 500 IDs to prevent file bloat
-        if len(ids) > 500:
-            ids = set(list(ids)[-500:])
-
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(list(ids), f, indent=2)
+    def __init__(self, store: StateStore):
+        self.store = store
+        self._backfill_failures()
+
+    def _backfill_failures(self):
+        """Give pre-taxonomy failures an UNKNOWN cause and a retry time."""
+        if self.store.get_meta("failures_backfilled"):
+            return
+        rows = self.store.query(
+            "SELECT v.video_id, v.updated_at FROM videos v "
+            "LEFT JOIN failures f ON f.video_id = v.video_id "
+            "WHERE v.status = 'failed' AND f.video_id IS NULL"
+        )
+        now = datetime.utcnow()
+        after = retry_after(FailureCause.UNKNOWN, 1, now)
+        self.store.write_many(
+            "INSERT OR IGNORE INTO failures (video_id, cause, attempts, "
+            "last_failed_at, retry_after) VALUES (?, ?, 1, ?, ?)",
+            [(r["video_id"], FailureCause.UNKNOWN, r["updated_at"],
+              after.isoformat()) for r in rows],
+        )
+        self.store.set_meta("failures_backfilled", now.isoformat())
+        if rows:
+            logger.info(f"💾 {len(rows)} legacy failures scheduled for retry")
+
+    def _set_status(self, video_id: str, status: str):
+        self.store.write(
+            "INSERT INTO videos (video_id, status, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(video_id) DO UPDATE SET "
+            "status = excluded.status, updated_at = excluded.updated_at",
+            (video_id, status, datetime.utcnow().isoformat()),
+        )
+
+    # Processed, or failed and not yet due for a retry
+    _BLOCKED = (
+        "SELECT v.video_id FROM videos v "
+        "LEFT JOIN failures f ON f.video_id = v.video_id "
+        "WHERE v.video_id IN ({marks}) AND (v.status = 'processed' "
+        "OR f.retry_after IS NULL OR f.retry_after > ?)"
+    )
 
     def is_processed(self, video_id: str) -> bool:
-        """Check if a video has been processed or previously failed."""
-        p = self._load(self.processed_file)
-        f = self._load(self.failed_file)
-        return video_id in p or video_id in f
+        """Check if a video is processed or failed and still cooling down."""
+        return bool(self.known_ids([video_id]))
+
+    def known_ids(self, video_ids: list) -> set:
+        """Subset of video_ids that must be skipped right now (one query)."""
+        if not video_ids:
+            return set()
+        marks = ",".join("?" * len(video_ids))
+        rows = self.store.query(
+            self._BLOCKED.format(marks=marks),
+            (*video_ids, datetime.utcnow().isoformat()),
+        )
+        return {r["video_id"] for r in rows}
 
     def mark_processed(self, video_id: str):
         """Mark a video as successfully processed."""
-        self._save(self.processed_file, video_id)
+        self._set_status(video_id, "processed")
+        self.store.write("DELETE FROM failures WHERE video_id = ?", (video_id,))
         logger.info(f"💾 Marked as processed: {video_id}")
 
-    def mark_failed(self, video_id: str):
-        """Mark a video as failed."""
-        self._save(self.failed_file, video_id)
-        logger.info(f"💾 Marked as failed: {video_id}")
+    def mark_failed(self, video_id: str, cause: str = FailureCause.UNKNOWN):
+        """Mark a video as failed; schedules a retry according to its cause."""
+        row = self.store.query_one(
+            "SELECT cause, attempts FROM failures WHERE video_id = ?", (video_id,)
+        )
+        attempts = row["attempts"] + 1 if row else 1
+        now = datetime.utcnow()
+        after = retry_after(cause, attempts, now)
+
+        self._set_status(video_id, "failed")
+        self.store.write(
+            "INSERT INTO failures (video_id, cause, attempts, last_failed_at, "
+            "retry_after) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(video_id) DO UPDATE SET cause = excluded.cause, "
+            "attempts = excluded.attempts, last_failed_at = excluded.last_failed_at, "
+            "retry_after = excluded.retry_after",
+            (video_id, cause, attempts, now.isoformat(),
+             after.isoformat() if after else None),
+        )
+        when = f"retry after {after:%Y-%m-%d %H:%M} UTC" if after else "permanent"
+        logger.info(f"💾 Marked as failed: {video_id} ({cause}, #{attempts}, {when})")
+
+    def retry_candidates(self, limit: int = 5) -> list:
+        """Failed candidates due for a retry, cheapest causes first."""
+        rows = self.store.query(
+            "SELECT c.video_id, c.title, c.channel, c.niche, c.url, "
+            "f.cause, f.attempts FROM failures f "
+            "JOIN candidates c ON c.video_id = f.video_id "
+            "JOIN videos v ON v.video_id = f.video_id "
+            "WHERE v.status = 'failed' AND f.retry_after IS NOT NULL "
+            "AND f.retry_after <= ? ORDER BY f.retry_after LIMIT ?",
+            (datetime.utcnow().isoformat(), limit * 4),
+        )
+        rows = sorted(
+            rows, key=lambda r: (RETRY_PRIORITY.get(r["cause"], 99), r["attempts"])
+        )
+        return [
+            {
+                "id": r["video_id"],
+                "title": r["title"],
+                "url": r["url"],
+                "channel": r["channel"],
+                "niche": r["niche"],
+                "retry_of": r["cause"],
+            }
+            for r in rows[:limit]
+        ]
+
+    def record_candidate(self, video_data: dict):
+        """Remember a discovered candidate (for later ranking/retries)."""
+        self.store.write(
+            "INSERT INTO candidates (video_id, title, channel, niche, url, "
+            "discovered_at, query) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(video_id) DO NOTHING",
+            (video_data["id"], video_data.get("title"), video_data.get("channel"),
+             video_data.get("niche"), video_data.get("url"),
+             datetime.utcnow().isoformat(), video_data.get("query")),
+        )
 
     def get_stats(self) -> dict:
         """Return cache statistics."""
-        processed = self._load(self.processed_file)
-        failed = self._load(self.failed_file)
+        counts = {
+            r["status"]: r["n"] for r in self.store.query(
+                "SELECT status, COUNT(*) AS n FROM videos GROUP BY status"
+            )
+        }
+        processed = counts.get("processed", 0)
+        failed = counts.get("failed", 0)
+        by_cause = {
+            r["cause"]: r["n"] for r in self.store.query(
+                "SELECT cause, COUNT(*) AS n FROM failures GROUP BY cause"
+            )
+        }
         return {
-            "processed": len(processed),
-            "failed": len(failed),
-            "total": len(processed) + len(failed),
+            "processed": processed,
+            "failed": failed,
+            "total": processed + failed,
+            "failed_by_cause": by_cause,
         }
@@ -0,0 +1,193 @@
+"""
+Channel Scheduler — Which channels to search, learned from their yield.
+
+Features:
+- Per-channel statistics kept incrementally: searches, results, fresh
+  (never seen) candidates, shorts uploaded, source-attributable failures
+  and the last search time; failure causes per channel on demand
+- Thompson sampling over expected shorts per search call:
+  fresh-candidate rate (Gamma-Poisson) × success rate (Beta-Bernoulli),
+  scaled by how our uploads from that channel and niche performed
+- Channels searched within the cooldown go to the back of the plan
+  (order=viewCount results barely change within a few hours)
+- Daily search quota budget (search.list costs 100 units per call),
+  drawn from the QuotaLedger uploads share: spend is derived from the
+  search log, so fresh CI runners don't start from a full budget
+- The search log is a grow-only table, so state snapshots merge it;
+  the statistics are rebuilt from it after an import
+"""
+
+import logging
+import random
+from datetime import datetime, timedelta
+
+from utils.failures import FailureCause
+from utils.quota import QuotaLedger
+from utils.state_store import StateStore
+
+logger = logging.getLogger(__name__)
+
+PRIOR_FRESH = 5.0           # fresh candidates expected from an unsearched channel
+STATS_VERSION = 1
+
+# Failures that say something about the channel's videos (not about
+# Gemini, our renderer or the upload)
+ATTRIBUTABLE = (
+    FailureCause.TOO_SHORT, FailureCause.DUPLICATE, FailureCause.UNAVAILABLE,
+    FailureCause.BOT_BLOCK, FailureCause.DOWNLOAD_FAILED, FailureCause.LIVE,
+    FailureCause.NO_CAPTIONS, FailureCause.TOO_LONG, FailureCause.AGE_RESTRICTED,
+    FailureCause.REGION_BLOCKED, FailureCause.UNSUITABLE_FORMAT,
+)
+
+_STATS_UPSERT = (
+    "INSERT INTO channel_stats (channel, searches, results, fresh, last_searched) "
+    "VALUES (?, 1, ?, ?, ?) "
+    "ON CONFLICT(channel) DO UPDATE SET searches = searches + 1, "
+    "results = results + excluded.results, fresh = fresh + excluded.fresh, "
+    "last_searched = MAX(COALESCE(last_searched, ''), excluded.last_searched)"
+)
+
+
+class ChannelScheduler:
+    """Orders the configured channels for the next discovery scan."""
+
+    def __init__(self, store: StateStore, channels_by_niche: dict, analytics=None,
+                 daily_units: int = 3000, cooldown_hours: float = 6.0,
+                 rng: random.Random = None, quota: QuotaLedger = None):
+        self.store = store
+        self.channels = [
+            (channel, niche)
+            for niche, channels in channels_by_niche.items() for channel in channels
+        ]
+        self.analytics = analytics
+        self.daily_units = daily_units
+        self.cooldown = timedelta(hours=cooldown_hours)
+        self.rng = rng or random.Random()
+        self.quota = quota or QuotaLedger(store)
+        if self.store.get_meta("channel_stats_version") != STATS_VERSION:
+            self.rebuild()
+
+    # ------------------------------------------------------------------
+    # Quota
+    # ------------------------------------------------------------------
+    def quota_left(self) -> int:
+        """Search units left this quota day (Pacific), within the shared API budget."""
+        return self.quota.left("search", cap=self.daily_units)
+
+    def reserve(self) -> bool:
+        """Take the units of one search call; False once today's budget is spent."""
+        return self.quota.reserve("search", "search.list", cap=self.daily_units)
+
+    # ------------------------------------------------------------------
+    # Statistics
+    # ------------------------------------------------------------------
+    def record_search(self, channel: str, results: int, fresh: int):
+        """One search call: `results` items, `fresh` of them never seen before."""
+        now = datetime.utcnow().isoformat()
+        self.store.write(
+            "INSERT OR IGNORE INTO searches (channel, searched_at, results, fresh) "
+            "VALUES (?, ?, ?, ?)", (channel, now, results, fresh),
+        )
+        self.store.write(_STATS_UPSERT, (channel, results, fresh, now))
+
+    def observe(self, video_id: str, outcome: str):
+        """
+        Credit the channel whose search surfaced `video_id` with an
+        outcome: "processed" or a FailureCause.
+        """
+        if outcome == "processed":
+            column = "uploads"
+        elif outcome in ATTRIBUTABLE:
+            column = "failures"
+        else:
+            return
+        self.store.write(
+            f"UPDATE channel_stats SET {column} = {column} + 1 WHERE channel = "
+            "(SELECT query FROM candidates WHERE video_id = ?)", (video_id,),
+        )
+
+    def rebuild(self):
+        """
+        Recompute the statistics from the search log, candidates, uploads
+        and failures (after snapshot merges and upgrades). Failures of
+        videos that later succeeded are no longer on record, so this
+        undercounts them slightly.
+        """
+        causes = ",".join("?" * len(ATTRIBUTABLE))
+        self.store.flush()
+        with self.store.connection() as conn:
+            conn.execute("DELETE FROM channel_stats")
+            conn.execute(
+                "INSERT INTO channel_stats (channel, searches, results, fresh, "
+                "last_searched) SELECT channel, COUNT(*), SUM(results), SUM(fresh), "
+                "MAX(searched_at) FROM searches GROUP BY channel"
+            )
+            conn.execute(
+                "UPDATE channel_stats SET "
+                "uploads = (SELECT COUNT(*) FROM uploads u JOIN candidates c "
+                "ON c.video_id = u.source_id WHERE c.query = channel_stats.channel), "
+                "failures = (SELECT COALESCE(SUM(f.attempts), 0) FROM failures f "
+                "JOIN candidates c ON c.video_id = f.video_id "
+                f"WHERE c.query = channel_stats.channel AND f.cause IN ({causes}))",
+                ATTRIBUTABLE,
+            )
+        self.store.set_meta("channel_stats_version", STATS_VERSION)
+        self.store.flush()
+
+    def stats(self) -> dict:
+        """{channel: {searches, results, fresh, uploads, failures, last_searched}}."""
+        return {
+            r["channel"]: dict(r) for r in self.store.query(
+                "SELECT channel, searches, results, fresh, uploads, failures, "
+                "last_searched FROM channel_stats"
+            )
+        }
+
+    def report(self) -> dict:
+        """stats() plus hit rate and failure causes per channel."""
+        report = self.stats()
+        for r in self.store.query(
+            "SELECT c.query, f.cause, COUNT(*) AS n FROM failures f "
+            "JOIN candidates c ON c.video_id = f.video_id "
+            "WHERE c.query IS NOT NULL GROUP BY c.query, f.cause"
+        ):
+            if r["query"] in report:
+                report[r["query"]].setdefault("causes", {})[r["cause"]] = r["n"]
+        for entry in report.values():
+            entry["fresh_per_search"] = round(entry["fresh"] / max(entry["searches"], 1), 2)
+            tried = entry["uploads"] + entry["failures"]
+            entry["hit_rate"] = round(entry["uploads"] / tried, 3) if tried else None
+        return report
+
+    # ------------------------------------------------------------------
+    # Planning
+    # ------------------------------------------------------------------
+    def plan(self) -> list:
+        """
+        All configured (channel, niche) pairs, most promising first: one
+        Thompson sample of expected shorts per search for each, channels
+        in their cooldown last.
+        """
+        stats = self.stats()
+        affinity = self.analytics.affinity([
+            {"id": channel, "channel": channel, "niche": niche}
+            for channel, niche in self.channels
+        ]) if self.analytics else {}
+        cutoff = (datetime.utcnow() - self.cooldown).isoformat()
+
+        ready, cooling = [], []
+        for channel, niche in self.channels:
+            s = stats.get(channel) or {}
+            fresh_rate = self.rng.gammavariate(
+                PRIOR_FRESH + s.get("fresh", 0), 1.0 / (1 + s.get("searches", 0))
+            )
+            success = self.rng.betavariate(
+                1 + s.get("uploads", 0), 1 + s.get("failures", 0)
+            )
+            score = fresh_rate * success * affinity.get(channel, 1.0)
+            recent = (s.get("last_searched") or "") > cutoff
+            (cooling if recent else ready).append((score, channel, niche))
+
+        ready.sort(reverse=True)
+        cooling.sort(reverse=True)
+        return [(channel, niche) for _, channel, niche in ready + cooling]
@@ -0,0 +1,392 @@
+"""
+Daemon — Long-running scheduler that keeps the bot warm between shorts.
+
+Features:
+- Daily publish slots ("14:00,18:00,22:00" UTC); each slot becomes a job
+  that starts `lead` minutes early and schedules its upload for the slot
+- Time-ordered job queue; on-demand jobs can be queued over HTTP
+- Idle hook between jobs (reap finished uploads, keep prefetch topped up)
+- Graceful SIGTERM/SIGINT: the running short finishes, nothing new
+  starts, pending uploads complete before exit (second signal = hard stop)
+- Local control/metrics endpoint:
+    GET  /health   liveness
+    GET  /status   queue, recent jobs, counters (JSON)
+    GET  /metrics  Prometheus text format
+    POST /run      queue a job now (?count=N, at most max_job_shorts)
+    POST /stop     graceful shutdown
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import signal
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+
+def parse_slots(spec: str) -> list:
+    """'14:00, 18:00,22:30' → sorted [(14, 0), (18, 0), (22, 30)] (UTC)."""
+    slots = set()
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            hour, _, minute = part.partition(":")
+            hour, minute = int(hour), int(minute or 0)
+        except ValueError:
+            logger.warning(f"⚠️ Ignoring bad publish slot '{part}'")
+            continue
+        if 0 <= hour < 24 and 0 <= minute < 60:
+            slots.add((hour, minute))
+        else:
+            logger.warning(f"⚠️ Ignoring bad publish slot '{part}'")
+    return sorted(slots)
+
+
+class Job:
+    """One unit of work: `count` shorts published at `publish_at`."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, run_at: datetime, count: int = 1,
+                 publish_at: datetime = None, source: str = "slot"):
+        self.id = next(self._ids)
+        self.run_at = run_at
+        self.count = count
+        self.publish_at = publish_at
+        self.source = source
+        self.status = "queued"
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+
+    def to_dict(self) -> dict:
+        def iso(dt):
+            return dt.isoformat() + "Z" if dt else None
+        return {
+            "id": self.id,
+            "source": self.source,
+            "status": self.status,
+            "count": self.count,
+            "run_at": iso(self.run_at),
+            "publish_at": iso(self.publish_at),
+            "started": iso(self.started),
+            "finished": iso(self.finished),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """Thread-safe queue of jobs ordered by their start time."""
+
+    def __init__(self):
+        self._heap = []         # (run_at, job id, job)
+        self._cond = threading.Condition()
+
+    def put(self, job: Job):
+        with self._cond:
+            heapq.heappush(self._heap, (job.run_at, job.id, job))
+            self._cond.notify_all()
+
+    def get(self, timeout: float, stop: threading.Event = None) -> Optional[Job]:
+        """
+        The earliest job once it is due, or None after `timeout` seconds
+        (or as soon as `stop` is set and the queue is woken).
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while not (stop and stop.is_set()):
+                remaining = deadline - time.monotonic()
+                if self._heap:
+                    wait = (self._heap[0][0] - datetime.utcnow()).total_seconds()
+                    if wait <= 0:
+                        return heapq.heappop(self._heap)[2]
+                    remaining = min(remaining, wait)
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            return None
+
+    def wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def jobs(self) -> list:
+        with self._cond:
+            return [job for _, _, job in sorted(self._heap)]
+
+    def drop(self, predicate: Callable[[Job], bool]) -> list:
+        """Remove and return the queued jobs matching `predicate`."""
+        with self._cond:
+            dropped = [job for _, _, job in self._heap if predicate(job)]
+            if dropped:
+                self._heap = [e for e in self._heap if not predicate(e[2])]
+                heapq.heapify(self._heap)
+                self._cond.notify_all()
+            return dropped
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+
+class Daemon:
+    """Runs jobs from the queue on the main thread until stopped."""
+
+    def __init__(self, run_job: Callable[[Job], dict], slots: list,
+                 shorts_per_slot: int = 1, lead_minutes: float = 45,
+                 idle: Callable[[], None] = None, on_stop: Callable[[], None] = None,
+                 gauges: Callable[[], dict] = None, host: str = "127.0.0.1",
+                 port: int = 0, idle_interval: float = 30.0,
+                 max_job_shorts: int = None):
+        self.run_job = run_job
+        self.slots = slots
+        self.shorts_per_slot = shorts_per_slot
+        self.max_job_shorts = max_job_shorts or shorts_per_slot
+        self.lead = timedelta(minutes=lead_minutes)
+        self.idle = idle
+        self.on_stop = on_stop
+        self.gauges = gauges
+        self.idle_interval = idle_interval
+        self.queue = JobQueue()
+        self.history = deque(maxlen=50)
+        self.current = None
+        self.counters = {"jobs_ok": 0, "jobs_failed": 0, "shorts": 0, "job_seconds": 0.0}
+        self.started = time.time()
+        self._planned = set()       # slot datetimes already queued
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.server = None
+        if port:
+            handler = type("Handler", (_ControlHandler,), {"daemon": self})
+            self.server = ThreadingHTTPServer((host, port), handler)
+            self.server.daemon_threads = True
+
+    # ------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------
+    def plan(self, now: datetime = None, horizon: timedelta = timedelta(days=1)):
+        """Queue a job for every slot in the next `horizon` not queued yet."""
+        now = now or datetime.utcnow()
+        for day in range(horizon.days + 2):
+            date = (now + timedelta(days=day)).date()
+            for hour, minute in self.slots:
+                publish_at = datetime(date.year, date.month, date.day, hour, minute)
+                if publish_at in self._planned or publish_at <= now:
+                    continue
+                if publish_at - now > horizon:
+                    continue
+                self._planned.add(publish_at)
+                self.queue.put(Job(
+                    max(now, publish_at - self.lead), self.shorts_per_slot, publish_at,
+                ))
+                logger.info(
+                    f"🗓️ Slot {publish_at:%Y-%m-%d %H:%M} UTC queued "
+                    f"(starts {max(now, publish_at - self.lead):%H:%M})"
+                )
+        self._planned = {t for t in self._planned if t > now - timedelta(days=1)}
+
+    def replan(self, slots: list, now: datetime = None):
+        """Switch to new slots: queued slot jobs of the old plan are dropped."""
+        if slots == self.slots:
+            return
+        dropped = self.queue.drop(lambda job: job.source == "slot")
+        self._planned -= {job.publish_at for job in dropped}
+        self.slots = slots
+        logger.info(
+            f"🗓️ Slots now {', '.join(f'{h:02d}:{m:02d}' for h, m in slots)} UTC "
+            f"({len(dropped)} planned job(s) dropped)"
+        )
+        self.plan(now)
+
+    def submit(self, count: int = 1) -> Job:
+        """Queue an on-demand job that starts now and publishes when done."""
+        count = min(count, self.max_job_shorts)
+        job = Job(datetime.utcnow(), count, source="manual")
+        self.queue.put(job)
+        logger.info(f"📨 Job #{job.id} queued on demand ({count} short(s))")
+        return job
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def stop(self, reason: str = "requested"):
+        if not self._stop.is_set():
+            logger.info(f"🛑 Stopping daemon ({reason}): finishing current work...")
+            self._stop.set()
+            self.queue.wake()
+
+    @property
+    def stopping(self) -> bool:
+        return self._stop.is_set()
+
+    def _on_signal(self, signum, frame):
+        self.stop(signal.Signals(signum).name)
+        # A second signal falls through to the default (immediate) handling
+        signal.signal(signum, signal.SIG_DFL)
+
+    def serve_forever(self):
+        """Run until stopped (blocking; must be called on the main thread)."""
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, self._on_signal)
+        if self.server:
+            threading.Thread(target=self.server.serve_forever,
+                             name="daemon-control", daemon=True).start()
+            host, port = self.server.server_address[:2]
+            logger.info(f"🛰️ Control endpoint on http://{host}:{port}")
+        logger.info(
+            f"😈 Daemon up: slots {', '.join(f'{h:02d}:{m:02d}' for h, m in self.slots)} "
+            f"UTC, {self.shorts_per_slot} short(s) each"
+        )
+
+        try:
+            while not self.stopping:
+                self.plan()
+                job = self.queue.get(self.idle_interval, self._stop)
+                if job is not None:
+                    self._run(job)
+                if self.idle and not self.stopping:
+                    self._safe(self.idle, "idle")
+        finally:
+            if self.on_stop:
+                self._safe(self.on_stop, "shutdown")
+            if self.server:
+                self.server.shutdown()
+                self.server.server_close()
+            logger.info("👋 Daemon stopped")
+
+    def _run(self, job: Job):
+        job.status, job.started = "running", datetime.utcnow()
+        self.current = job
+        logger.info(f"▶️ Job #{job.id} ({job.source}, {job.count} short(s))")
+        started = time.perf_counter()
+        try:
+            job.result = self.run_job(job)
+            job.status = "done"
+        except Exception as e:
+            job.status, job.error = "failed", str(e)
+            logger.error(f"❌ Job #{job.id} failed: {e}")
+        elapsed = time.perf_counter() - started
+        job.finished = datetime.utcnow()
+        with self._lock:
+            self.counters["jobs_ok" if job.status == "done" else "jobs_failed"] += 1
+            self.counters["shorts"] += (job.result or {}).get("shorts", 0)
+            self.counters["job_seconds"] = round(self.counters["job_seconds"] + elapsed, 3)
+            self.current = None
+            self.history.append(job)
+        logger.info(f"⏹️ Job #{job.id} {job.status} in {elapsed:.1f}s")
+
+    @staticmethod
+    def _safe(fn, label: str):
+        try:
+            fn()
+        except Exception as e:
+            logger.warning(f"⚠️ Daemon {label} hook error: {e}")
+
+    # ------------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------------
+    def status(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+            history = [job.to_dict() for job in self.history]
+            current = self.current.to_dict() if self.current else None
+        gauges = {}
+        if self.gauges:
+            try:
+                gauges = self.gauges()
+            except Exception as e:
+                gauges = {"error": str(e)}
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "stopping": self.stopping,
+            "current": current,
+            "queued": [job.to_dict() for job in self.queue.jobs()],
+            "recent": history,
+            "counters": counters,
+            "gauges": gauges,
+        }
+
+    def metrics(self) -> str:
+        """Prometheus text exposition of counters and numeric gauges."""
+        status = self.status()
+        counters = status["counters"]
+        lines = [
+            "# TYPE youtyann_uptime_seconds gauge",
+            f"youtyann_uptime_seconds {status['uptime_s']}",
+            "# TYPE youtyann_jobs_total counter",
+            f'youtyann_jobs_total{{status="ok"}} {counters["jobs_ok"]}',
+            f'youtyann_jobs_total{{status="failed"}} {counters["jobs_failed"]}',
+            "# TYPE youtyann_shorts_total counter",
+            f"youtyann_shorts_total {counters['shorts']}",
+            "# TYPE youtyann_job_seconds_total counter",
+            f"youtyann_job_seconds_total {counters['job_seconds']}",
+            "# TYPE youtyann_queue_depth gauge",
+            f"youtyann_queue_depth {len(status['queued'])}",
+            "# TYPE youtyann_job_running gauge",
+            f"youtyann_job_running {int(status['current'] is not None)}",
+        ]
+        for name, value in sorted(status["gauges"].items()):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines += [f"# TYPE youtyann_{name} gauge", f"youtyann_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+class _ControlHandler(BaseHTTPRequestHandler):
+    daemon: Daemon = None
+
+    def log_message(self, fmt, *args):
+        logger.debug("control: " + fmt, *args)
+
+    def _reply(self, status: int, body, content_type: str = "application/json"):
+        if not isinstance(body, (bytes, str)):
+            body = json.dumps(body, indent=1)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/health":
+            self._reply(200, {"ok": True, "stopping": self.daemon.stopping})
+        elif path == "/status":
+            self._reply(200, self.daemon.status())
+        elif path == "/metrics":
+            self._reply(200, self.daemon.metrics(), "text/plain; version=0.0.4")
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path == "/run":
+            if self.daemon.stopping:
+                self._reply(409, {"error": "daemon is stopping"})
+                return
+            try:
+                count = int(parse_qs(url.query).get("count", ["1"])[0])
+            except ValueError:
+                count = 0
+            if count < 1:
+                self._reply(400, {"error": "count must be a positive integer"})
+                return
+            self._reply(202, self.daemon.submit(count).to_dict())
+        elif url.path == "/stop":
+            self.daemon.stop("control endpoint")
+            self._reply(202, {"stopping": True})
+        else:
+            self._reply(404, {"error": "not found"})
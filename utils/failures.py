@@ -0,0 +1,79 @@
+"""
+Failure Taxonomy — Why a source failed and when it is worth retrying.
+
+Each cause has a retry policy:
+- base TTL before the first retry
+- exponential backoff factor for repeated failures
+- maximum attempts before the source is given up for good
+- retry priority (cheapest retries first: an upload failure reuses the
+  cached final render, a BOT_BLOCK needs a fresh download)
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+
+class FailureCause:
+    """Failure classes recorded by CacheManager.mark_failed."""
+
+    UPLOAD_FAILURE = "upload_failure"
+    GEMINI_FAILURE = "gemini_failure"
+    BOT_BLOCK = "bot_block"
+    DOWNLOAD_FAILED = "download_failed"
+    RENDER_FAILURE = "render_failure"
+    UNAVAILABLE = "unavailable"
+    TOO_SHORT = "too_short"
+    DUPLICATE = "duplicate"
+    UNKNOWN = "unknown"
+    # Rejected from metadata before download (utils.prefilter)
+    LIVE = "live"
+    NO_CAPTIONS = "no_captions"
+    TOO_LONG = "too_long"
+    AGE_RESTRICTED = "age_restricted"
+    REGION_BLOCKED = "region_blocked"
+    UNSUITABLE_FORMAT = "unsuitable_format"
+
+
+# cause → (base TTL hours, backoff factor, max attempts); None TTL = permanent
+RETRY_POLICY = {
+    FailureCause.UPLOAD_FAILURE: (0.5, 2.0, 6),
+    FailureCause.GEMINI_FAILURE: (1.0, 2.0, 5),
+    FailureCause.BOT_BLOCK: (3.0, 2.0, 5),
+    FailureCause.DOWNLOAD_FAILED: (6.0, 2.0, 3),
+    FailureCause.RENDER_FAILURE: (12.0, 2.0, 2),
+    FailureCause.UNAVAILABLE: (24.0, 2.0, 2),
+    FailureCause.UNKNOWN: (24.0, 2.0, 3),
+    FailureCause.LIVE: (12.0, 2.0, 3),          # VOD once the stream ends
+    FailureCause.NO_CAPTIONS: (72.0, 1.0, 2),
+    FailureCause.TOO_SHORT: (None, 1.0, 1),
+    FailureCause.DUPLICATE: (None, 1.0, 1),
+    FailureCause.TOO_LONG: (None, 1.0, 1),
+    FailureCause.AGE_RESTRICTED: (None, 1.0, 1),
+    FailureCause.REGION_BLOCKED: (None, 1.0, 1),
+    FailureCause.UNSUITABLE_FORMAT: (None, 1.0, 1),
+}
+
+# Lower = cheaper to retry (more cached artifacts can be reused)
+RETRY_PRIORITY = {cause: i for i, cause in enumerate(RETRY_POLICY)}
+
+MAX_TTL_HOURS = 7 * 24
+
+
+def retry_after(cause: str, attempts: int,
+                now: datetime = None) -> Optional[datetime]:
+    """When a source that failed `attempts` times may be retried (None = never)."""
+    base, factor, max_attempts = RETRY_POLICY.get(
+        cause, RETRY_POLICY[FailureCause.UNKNOWN]
+    )
+    if base is None or attempts >= max_attempts:
+        return None
+    hours = min(MAX_TTL_HOURS, base * factor ** (attempts - 1))
+    return (now or datetime.utcnow()) + timedelta(hours=hours)
+
+
+class PipelineFailure(Exception):
+    """A pipeline stage failed for a known cause."""
+
+    def __init__(self, cause: str, message: str = ""):
+        super().__init__(message or cause)
+        self.cause = cause
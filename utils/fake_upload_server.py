@@ -0,0 +1,208 @@
+"""
+Fake Resumable Upload Server — Local stand-in for the YouTube upload endpoint.
+
+Implements just enough of the resumable protocol to exercise
+ResumableUploader offline:
+- POST ?uploadType=resumable → session URI in Location
+- PUT chunk with Content-Range → 308 + Range, or 200 + video JSON
+- PUT with 'bytes */N' → status query
+- Fault injection: 5xx responses, dropped connections, expired sessions
+- Optional per-request latency
+
+Usage:
+    python -m utils.fake_upload_server --port 8765
+    UPLOAD_ENDPOINT=http://127.0.0.1:8765/upload/youtube/v3/videos python viral_bot.py
+"""
+
+import argparse
+import json
+import logging
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_PATH = "/upload/youtube/v3/videos"
+
+
+class FakeUploadServer:
+    """Threaded in-process resumable upload server."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        self.latency = latency  # seconds added to every request
+        self.sessions = {}      # session id → {"size", "data", "metadata"}
+        self.completed = {}     # video id → {"metadata", "data"}
+        self.requests = []      # (method, path, content-range) log
+        self.faults = []        # queued faults, consumed one per chunk PUT
+        self._lock = threading.Lock()
+
+        handler = type("Handler", (_Handler,), {"fake": self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{UPLOAD_PATH}"
+
+    def start(self) -> "FakeUploadServer":
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, name="fake-upload", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ------------------------------------------------------------------
+    # Fault injection
+    # ------------------------------------------------------------------
+    def fail_next(self, status: int = 503, count: int = 1):
+        """Answer the next `count` chunk PUTs with an HTTP error."""
+        with self._lock:
+            self.faults.extend([("status", status)] * count)
+
+    def drop_next(self, count: int = 1, keep_bytes: int = 0):
+        """Close the connection mid-chunk, keeping `keep_bytes` of it."""
+        with self._lock:
+            self.faults.extend([("drop", keep_bytes)] * count)
+
+    def expire_sessions(self):
+        """Forget every open session (next request gets 404)."""
+        with self._lock:
+            self.sessions.clear()
+
+    def _next_fault(self):
+        with self._lock:
+            return self.faults.pop(0) if self.faults else None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    fake: FakeUploadServer = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        logger.debug("fake-upload: " + fmt, *args)
+
+    def _reply(self, status: int, body: bytes = b"", headers: dict = None):
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def do_POST(self):
+        fake = self.fake
+        fake.requests.append(("POST", self.path, None))
+        time.sleep(fake.latency)
+        if not self.path.startswith(UPLOAD_PATH) or "uploadType=resumable" not in self.path:
+            self._reply(400)
+            return
+
+        metadata = json.loads(self._read_body() or b"{}")
+        size = int(self.headers.get("X-Upload-Content-Length") or -1)
+        sid = uuid.uuid4().hex
+        with fake._lock:
+            fake.sessions[sid] = {"size": size, "data": bytearray(), "metadata": metadata}
+
+        host, port = fake.httpd.server_address[:2]
+        self._reply(200, headers={
+            "Location": f"http://{host}:{port}{UPLOAD_PATH}?upload_id={sid}",
+        })
+
+    def do_PUT(self):
+        fake = self.fake
+        content_range = self.headers.get("Content-Range", "")
+        fake.requests.append(("PUT", self.path, content_range))
+        time.sleep(fake.latency)
+
+        match = re.search(r"upload_id=(\w+)", self.path)
+        session = fake.sessions.get(match.group(1)) if match else None
+        body = self._read_body()
+        if session is None:
+            self._reply(404)
+            return
+
+        # Status query: 'bytes */total'
+        if content_range.startswith("bytes */"):
+            self._ack(session)
+            return
+
+        fault = fake._next_fault()
+        if fault and fault[0] == "status":
+            self._reply(fault[1])
+            return
+
+        m = re.match(r"bytes (\d+)-(\d+)/(\d+)", content_range)
+        if not m:
+            self._reply(400)
+            return
+        start = int(m.group(1))
+        if start != len(session["data"]):
+            # Client is out of sync; tell it where we are
+            self._ack(session)
+            return
+
+        if fault and fault[0] == "drop":
+            session["data"].extend(body[:fault[1]])
+            self.close_connection = True
+            self.connection.close()
+            return
+
+        session["data"].extend(body)
+        self._ack(session)
+
+    def _ack(self, session: dict):
+        received = len(session["data"])
+        if received >= session["size"]:
+            video_id = session.get("video_id")
+            if not video_id:
+                video_id = session["video_id"] = f"fake_{uuid.uuid4().hex[:11]}"
+                self.fake.completed[video_id] = {
+                    "metadata": session["metadata"],
+                    "data": bytes(session["data"]),
+                }
+            payload = json.dumps({"kind": "youtube#video", "id": video_id})
+            self._reply(200, payload.encode("utf-8"),
+                        {"Content-Type": "application/json"})
+            return
+
+        headers = {"Range": f"bytes=0-{received - 1}"} if received else {}
+        self._reply(308, headers=headers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake resumable upload server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = FakeUploadServer(args.host, args.port)
+    logger.info(f"🧪 Fake upload server on {server.endpoint}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Fake Backends — Offline stand-ins for YouTube, Gemini and yt-dlp.
+
+Lets the whole scheduler run end to end without credentials or network
+(`viral_bot.py --dry-run` / `--bench`):
+- FakeYouTubeService: search.list, videos.list, thumbnails.set
+- FakeGeminiClient: canned clip proposals (single and batched prompts)
+- LocalDownloader: serves local files with a simulated bandwidth
+- FakeCredentials: always-valid OAuth token for the upload sink
+Every call sleeps for a configurable latency so concurrency gains can
+be measured realistically.
+"""
+
+import hashlib
+import json
+import logging
+import random
+import re
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class Latency:
+    """Injected delay: base seconds ± jitter fraction."""
+
+    def __init__(self, seconds: float = 0.0, jitter: float = 0.3):
+        self.seconds = seconds
+        self.jitter = jitter
+        self.total = 0.0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def wait(self, extra: float = 0.0):
+        delay = extra + self.seconds * (1 + random.uniform(-self.jitter, self.jitter))
+        with self._lock:
+            self.total += delay
+            self.calls += 1
+        if delay > 0:
+            time.sleep(delay)
+
+
+class _Request:
+    """googleapiclient-style request: .execute() returns the response."""
+
+    def __init__(self, latency: Latency, respond):
+        self.latency = latency
+        self.respond = respond
+
+    def execute(self):
+        self.latency.wait()
+        return self.respond()
+
+
+class _Resource:
+    def __init__(self, **methods):
+        self.__dict__.update(methods)
+
+
+class FakeYouTubeService:
+    """Deterministic search results and video metadata."""
+
+    def __init__(self, latency: Latency = None, duration_range: tuple = (90, 600)):
+        self.latency = latency or Latency()
+        self.duration_range = duration_range
+        self.calls = {"search.list": 0, "videos.list": 0, "thumbnails.set": 0}
+
+    def _count(self, name: str):
+        self.calls[name] += 1
+
+    @staticmethod
+    def _video_id(seed: str) -> str:
+        return hashlib.sha1(seed.encode()).hexdigest()[:11]
+
+    def search(self):
+        def list_(q="", maxResults=20, **_):
+            def respond():
+                self._count("search.list")
+                channel = q.removesuffix(" shorts")
+                return {"items": [
+                    {
+                        "id": {"videoId": self._video_id(f"{q}:{i}")},
+                        "snippet": {
+                            "title": f"{channel} fake video #{i}",
+                            "channelTitle": channel,
+                            "liveBroadcastContent": "none",
+                        },
+                    }
+                    for i in range(maxResults)
+                ]}
+            return _Request(self.latency, respond)
+        return _Resource(list=list_)
+
+    def videos(self):
+        def list_(id="", part="", **_):
+            def respond():
+                self._count("videos.list")
+                return {"items": [self._video(v) for v in id.split(",") if v]}
+            return _Request(self.latency, respond)
+        return _Resource(list=list_)
+
+    def thumbnails(self):
+        def set_(videoId="", **_):
+            def respond():
+                self._count("thumbnails.set")
+                return {}
+            return _Request(self.latency, respond)
+        return _Resource(set=set_)
+
+    def _video(self, video_id: str) -> dict:
+        rng = random.Random(video_id)
+        duration = rng.randint(*self.duration_range)
+        published = datetime.utcnow() - timedelta(hours=rng.randint(2, 300))
+        return {
+            "id": video_id,
+            "snippet": {
+                "title": f"Fake video {video_id}",
+                "description": "Synthetic metadata for an offline run.",
+                "tags": ["fake", "offline"],
+                "publishedAt": published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "liveBroadcastContent": "none",
+            },
+            "contentDetails": {
+                "duration": f"PT{duration // 60}M{duration % 60}S",
+                "caption": "true",
+                "dimension": "2d",
+                "projection": "rectangular",
+                "contentRating": {},
+            },
+            "statistics": {
+                "viewCount": str(rng.randint(10_000, 5_000_000)),
+                "likeCount": str(rng.randint(100, 200_000)),
+                "commentCount": str(rng.randint(10, 20_000)),
+            },
+            "status": {"uploadStatus": "processed"},
+            "processingDetails": {"processingStatus": "succeeded"},
+        }
+
+
+class FakeGeminiClient:
+    """Gemini client whose models answer with canned clip proposals."""
+
+    def __init__(self, latency: Latency = None):
+        self.latency = latency or Latency()
+        self.models = _Resource(list=self._list, generate_content=self._generate)
+        self.calls = 0
+
+    def _list(self):
+        return [_Resource(name="models/fake-flash")]
+
+    def _generate(self, model: str = "", contents: str = "", config=None):
+        self.latency.wait()
+        self.calls += 1
+        ids = re.findall(r'"video_id":\s*"([\w-]+)"', contents)
+        if ids:
+            payload = [dict(self._proposal(v), video_id=v) for v in ids]
+        else:
+            payload = self._proposal(contents)
+        return _Resource(text=json.dumps(payload))
+
+    @staticmethod
+    def _proposal(seed: str) -> dict:
+        rng = random.Random(seed)
+        start = rng.randint(15, 40)
+        return {
+            "viral_score": rng.randint(10, 95),
+            "start_time": start,
+            "end_time": start + rng.randint(20, 45),
+            "viral_title": "FAKE EPIC MOMENT",
+            "hook_text": "WAIT FOR IT",
+            "description": "🔥 Offline dry-run short #shorts",
+            "tags": ["#shorts", "#dryrun"],
+            "summary": "Canned proposal",
+            "energy_level": rng.choice(["medium", "high", "extreme"]),
+            "suggested_effects": ["zoom_pulse"],
+        }
+
+
+class LocalDownloader:
+    """VideoDownloader stand-in: copies local files at a simulated speed."""
+
+    def __init__(self, sources: list, output_dir: Path, latency: Latency = None,
+                 bandwidth: float = 0.0):
+        if not sources:
+            raise ValueError("LocalDownloader needs at least one source file")
+        self.sources = [Path(s) for s in sources]
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.latency = latency or Latency()
+        self.bandwidth = bandwidth      # bytes/s, 0 = instant
+        self.downloads = 0
+
+    def download(self, url: str, fmt: str = None, tag: str = "source") -> str:
+        video_id = url.rsplit("=", 1)[-1]
+        source = self.sources[int(hashlib.sha1(video_id.encode()).hexdigest(), 16)
+                              % len(self.sources)]
+        size = source.stat().st_size
+        self.latency.wait(size / self.bandwidth if self.bandwidth else 0.0)
+        out = self.output_dir / f"{tag}_{video_id}{source.suffix}"
+        shutil.copyfile(source, out)
+        self.downloads += 1
+        logger.info(f"📥 [fake] {tag} {video_id} ← {source.name}")
+        return str(out)
+
+    def close(self):
+        pass
+
+
+class FakeCredentials:
+    """Always-valid OAuth credentials for the fake upload endpoint."""
+
+    token = "fake-token"
+    valid = True
+    expired = False
+
+    def refresh(self, request):
+        pass
+
+
+class FakeServiceFactory:
+    """YouTubeServiceFactory stand-in handing out one fake service."""
+
+    def __init__(self, service: FakeYouTubeService):
+        self.service = service
+
+    def public(self):
+        return self.service
+
+    def authorized(self, creds):
+        return self.service
@@ -0,0 +1,281 @@
+"""
+FFmpeg Runner — Shared process runner with live progress and early failure.
+
+Features:
+- Reads `-progress pipe:1` while the encode runs (fps, speed, position)
+- Stall detection: aborts when the output position stops advancing
+- Whole process group killed on stall/timeout (no orphaned children)
+- stderr kept as a bounded tail instead of buffered in full
+- Per-run metrics (wall time, speed, fps, threads) recorded per pipeline
+  stage, per thread, so concurrent prefetch work doesn't mix in
+- Thread budget, admission and timeout from the ResourceGovernor
+"""
+
+import logging
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from utils.media_info import MediaInfo
+from utils.resources import ResourceGovernor, default_governor
+
+logger = logging.getLogger(__name__)
+
+
+class FFmpegError(RuntimeError):
+    """An FFmpeg run failed, stalled or timed out."""
+
+    def __init__(self, label: str, reason: str, stderr_tail: str = ""):
+        super().__init__(f"FFmpeg failed: {label} ({reason})")
+        self.label = label
+        self.reason = reason
+        self.stderr_tail = stderr_tail
+
+
+class FFmpegResult:
+    """Outcome of one run: return code, stderr tail and metrics."""
+
+    def __init__(self, returncode: int, stderr_tail: str, metrics: dict):
+        self.returncode = returncode
+        self.stderr = stderr_tail
+        self.metrics = metrics
+
+
+class FFmpegRunner:
+    """Runs ffmpeg commands with progress streaming and a stall watchdog."""
+
+    def __init__(self, governor: ResourceGovernor = None, stall_timeout: float = 60.0,
+                 log_interval: float = 15.0, tail_lines: int = 40):
+        self.governor = governor or default_governor()
+        self.stall_timeout = stall_timeout
+        self.log_interval = log_interval
+        self.tail_lines = tail_lines
+        self._local = threading.local()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def run(self, cmd: list, label: str, duration: float = None,
+            check: bool = True, timeout_scale: float = 1.0) -> FFmpegResult:
+        """
+        Run an ffmpeg command under the governor.
+
+        `duration` is the media length the command produces (for the
+        timeout and progress percentage); taken from the stage hint or
+        probed from the input if None.
+        `timeout_scale` stretches the timeout for multi-output commands.
+        With check=True a non-zero exit, stall or timeout raises FFmpegError;
+        otherwise stalls/timeouts come back as returncode -1.
+        """
+        input_path = cmd[cmd.index("-i") + 1] if "-i" in cmd else None
+        hint = getattr(self._local, "hint", None) or {}
+        if duration is None:
+            duration = hint.get("duration")
+        height = hint.get("height")
+        if duration is None or height is None:
+            probed_duration, probed_height = self.governor.shape(input_path)
+            duration = probed_duration if duration is None else duration
+            height = probed_height if height is None else height
+
+        with self.governor.job(label) as threads:
+            timeout = self.governor.timeout(
+                input_path, threads, duration=duration, height=height
+            ) * timeout_scale
+            full_cmd = self.governor.apply(cmd, threads)
+            full_cmd[1:1] = ["-nostats", "-progress", "pipe:1"]
+
+            logger.info(f"  🎬 FFmpeg [{label}] ({threads} threads)...")
+            returncode, tail, progress, failure = self._execute(
+                full_cmd, label, duration, timeout
+            )
+
+        metrics = {
+            "stage": getattr(self._local, "stage", None),
+            "label": label,
+            "threads": threads,
+            "returncode": returncode,
+            "failure": failure,
+            **progress,
+        }
+        sink = getattr(self._local, "sink", None)
+        if sink is not None:
+            sink.append(metrics)
+
+        if failure or returncode != 0:
+            reason = failure or f"exit {returncode}"
+            tail_short = tail[-300:]
+            logger.error(f"  ❌ FFmpeg [{label}] {reason}: {tail_short}")
+            if check:
+                raise FFmpegError(label, reason, tail)
+            return FFmpegResult(returncode if not failure else -1, tail, metrics)
+
+        logger.info(
+            f"  ✅ FFmpeg [{label}] done in {progress['wall_s']:.1f}s "
+            f"(speed {progress['speed'] or 0:.2f}x, {progress['fps'] or 0:.0f} fps)"
+        )
+        return FFmpegResult(returncode, tail, metrics)
+
+    @contextmanager
+    def recording(self):
+        """Collect the metrics of every run on this thread into a list."""
+        previous = getattr(self._local, "sink", None)
+        self._local.sink = []
+        try:
+            yield self._local.sink
+        finally:
+            self._local.sink = previous
+
+    @contextmanager
+    def stage(self, name: str, duration: float = None, height: int = None):
+        """
+        Tag runs on this thread with a pipeline stage name. `duration` and
+        `height` describe the stage's input when the caller already knows
+        them, so its runs skip the probe.
+        """
+        previous = (getattr(self._local, "stage", None), getattr(self._local, "hint", None))
+        self._local.stage = name
+        self._local.hint = {k: v for k, v in
+                            (("duration", duration), ("height", height)) if v is not None}
+        try:
+            yield
+        finally:
+            self._local.stage, self._local.hint = previous
+
+    def probe(self, path: str, keyframes: bool = False) -> MediaInfo:
+        """Cached MediaInfo for `path` (None if unreadable)."""
+        return self.governor.prober.probe(path, keyframes=keyframes)
+
+    @staticmethod
+    def summarize(runs: list) -> dict:
+        """Per-stage totals: {stage: {runs, wall_s, media_s, speed, failures}}."""
+        stages = {}
+        for run in runs:
+            entry = stages.setdefault(run["stage"] or run["label"], {
+                "runs": 0, "wall_s": 0.0, "media_s": 0.0, "failures": 0,
+            })
+            entry["runs"] += 1
+            entry["wall_s"] = round(entry["wall_s"] + run["wall_s"], 3)
+            entry["media_s"] = round(entry["media_s"] + run["media_s"], 3)
+            entry["failures"] += bool(run["failure"] or run["returncode"])
+        for entry in stages.values():
+            entry["speed"] = (round(entry["media_s"] / entry["wall_s"], 2)
+                              if entry["wall_s"] else None)
+        return stages
+
+    # ------------------------------------------------------------------
+    # Process handling
+    # ------------------------------------------------------------------
+    def _execute(self, cmd: list, label: str, duration: float, timeout: float):
+        started = time.monotonic()
+        proc = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            stdin=subprocess.DEVNULL, text=True, errors="replace",
+            start_new_session=True,     # own process group → clean kill
+        )
+        tail = deque(maxlen=self.tail_lines)
+        state = {"out_time": 0.0, "fps": None, "speed": None, "frame": 0,
+                 "advanced_at": started}
+
+        readers = [
+            threading.Thread(target=self._read_progress, args=(proc.stdout, state),
+                             daemon=True),
+            threading.Thread(target=lambda: tail.extend(proc.stderr), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+
+        failure = None
+        last_log = started
+        while True:
+            try:
+                proc.wait(timeout=1.0)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            now = time.monotonic()
+            if now - started > timeout:
+                failure = f"timed out ({timeout:.0f}s)"
+            elif now - state["advanced_at"] > self.stall_timeout:
+                failure = f"stalled at {state['out_time']:.1f}s for {self.stall_timeout:.0f}s"
+            if failure:
+                self._kill(proc)
+                break
+            if now - last_log >= self.log_interval:
+                last_log = now
+                pct = f"{state['out_time'] / duration:.0%} " if duration else ""
+                logger.info(
+                    f"  ⏳ FFmpeg [{label}] {pct}@ {state['out_time']:.1f}s "
+                    f"(speed {state['speed'] or 0:.2f}x, {state['fps'] or 0:.0f} fps)"
+                )
+
+        # Anything ffmpeg left behind in its group would hold the pipes open
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+        for reader in readers:
+            reader.join(timeout=5)
+        progress = {
+            "wall_s": round(time.monotonic() - started, 3),
+            "media_s": round(state["out_time"], 3),
+            "frames": state["frame"],
+            "fps": state["fps"],
+            "speed": state["speed"],
+        }
+        return proc.returncode, "".join(tail), progress, failure
+
+    @staticmethod
+    def _read_progress(stream, state: dict):
+        """Parse key=value blocks from -progress into the shared state."""
+        for line in stream:
+            key, _, value = line.strip().partition("=")
+            try:
+                if key in ("out_time_us", "out_time_ms"):
+                    # Both are microseconds (out_time_ms is misnamed upstream)
+                    out_time = int(value) / 1_000_000
+                    if out_time > state["out_time"]:
+                        state["out_time"] = out_time
+                        state["advanced_at"] = time.monotonic()
+                elif key == "fps":
+                    state["fps"] = float(value)
+                elif key == "speed":
+                    state["speed"] = float(value.rstrip("x"))
+                elif key == "frame":
+                    frame = int(value)
+                    if frame > state["frame"]:
+                        state["frame"] = frame
+                        state["advanced_at"] = time.monotonic()
+            except ValueError:
+                pass    # "N/A" while ffmpeg is starting up
+
+    @staticmethod
+    def _kill(proc: subprocess.Popen):
+        """SIGTERM the process group, SIGKILL if it doesn't exit."""
+        for sig, grace in ((signal.SIGTERM, 5), (signal.SIGKILL, 5)):
+            try:
+                os.killpg(proc.pid, sig)
+            except (ProcessLookupError, PermissionError):
+                return
+            try:
+                proc.wait(timeout=grace)
+                return
+            except subprocess.TimeoutExpired:
+                continue
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_runner() -> FFmpegRunner:
+    """Process-wide runner for engines built without one."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = FFmpegRunner()
+        return _default
@@ -0,0 +1,482 @@
+"""
+Fingerprint Index — Perceptual duplicate detection for sources and uploads.
+
+Features:
+- Per-second video dHash (64 bits) plus a mirrored variant for queries
+- Per-second audio chroma code (32 bits), robust to re-encodes and crops
+- Both extracted from one ffmpeg decode of the low-res analysis proxy
+- Multi-index hashing: 16-bit chunk tables, so a Hamming lookup probes
+  a handful of buckets instead of every stored hash
+- Offset voting + aligned verification: trimmed, mirrored or re-cropped
+  re-uploads of the same moment still match
+- Video matches are duplicates; audio-only matches (shared sounds and
+  music beds) are reported as such, for callers to treat as a hint
+- Columnar NumPy arrays in memory, persisted one row per entry in the
+  state DB (so state snapshots merge the index of concurrent runs);
+  a legacy .npz index is imported once
+"""
+
+import base64
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from utils.ffmpeg_runner import FFmpegRunner
+from utils.state_store import StateStore
+
+logger = logging.getLogger(__name__)
+
+NUMPY_AVAILABLE = False
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    logger.info("ℹ️ numpy not installed — perceptual dedup disabled")
+
+# dHash grid: 9×8 gray pixels → 8 horizontal gradients × 8 rows = 64 bits
+HASH_W, HASH_H = 9, 8
+AUDIO_RATE = 11025
+AUDIO_FRAME = 2048
+AUDIO_HOP = 1024
+
+# Multi-index hashing: a code within d bits of a stored one shares at
+# least one chunk within d // chunks bits. Only a few frames of a real
+# duplicate need to be found — aligned verification checks the rest.
+CHUNK_BITS = 16
+VIDEO_CHUNKS = 4            # 64-bit hash → 4 chunk tables, exact chunk probes
+AUDIO_CHUNKS = 2            # 32-bit code → 2 chunk tables, 1-bit chunk probes
+
+VIDEO_RADIUS = 10           # Hamming bits for "same frame"
+MIN_VIDEO_MATCH = 0.6       # aligned frames that must match
+AUDIO_MAX_BER = 0.20        # aligned audio bit error rate (unrelated audio ≈ 0.35)
+MIN_OVERLAP = 8             # aligned seconds before anything counts
+TOP_OFFSETS = 5             # (entry, offset) votes verified per query
+
+
+class Fingerprint:
+    """Per-second video hashes and audio codes of one file."""
+
+    __slots__ = ("video", "video_t", "mirror", "audio", "audio_t")
+
+    def __init__(self, video, video_t, audio, audio_t, mirror=None):
+        self.video = video          # uint64 dHash per informative second
+        self.video_t = video_t      # int16 second of each hash
+        self.mirror = mirror        # dHash of the horizontally flipped frame
+        self.audio = audio          # uint32 chroma code per audible second
+        self.audio_t = audio_t
+
+    @property
+    def empty(self) -> bool:
+        return not len(self.video) and not len(self.audio)
+
+
+# ---------------------------------------------------------------------------
+# Extraction
+# ---------------------------------------------------------------------------
+def extract_fingerprint(path: str, max_seconds: float = 180,
+                        runner: FFmpegRunner = None) -> Optional[Fingerprint]:
+    """Fingerprint the first `max_seconds` of a file (None on failure)."""
+    if not NUMPY_AVAILABLE:
+        return None
+    runner = runner or FFmpegRunner()
+    info = runner.probe(path)
+    if not info or not (info.has_video or info.has_audio):
+        return None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Both streams go to files: the runner reads progress from stdout
+        audio_raw = os.path.join(tmp, "audio.raw")
+        video_raw = os.path.join(tmp, "video.raw")
+        cmd = ["ffmpeg", "-v", "error", "-t", str(max_seconds), "-i", path]
+        if info.has_audio:
+            cmd += ["-map", "0:a:0", "-ac", "1", "-ar", str(AUDIO_RATE),
+                    "-f", "s16le", audio_raw]
+        if info.has_video:
+            cmd += ["-map", "0:v:0",
+                    "-vf", f"fps=1,scale={HASH_W}:{HASH_H}:flags=area,format=gray",
+                    "-f", "rawvideo", video_raw]
+        try:
+            result = runner.run(
+                cmd, "Fingerprint", check=False,
+                duration=min(info.duration or max_seconds, max_seconds),
+            )
+            if result.returncode != 0:
+                logger.warning(f"⚠️ Fingerprint decode failed: {result.stderr[-300:]}")
+                return None
+            frames = (np.fromfile(video_raw, dtype=np.uint8)
+                      if os.path.exists(video_raw) else np.zeros(0, np.uint8))
+            samples = (np.fromfile(audio_raw, dtype="<i2")
+                       if os.path.exists(audio_raw) else np.zeros(0, np.int16))
+        except Exception as e:
+            logger.warning(f"⚠️ Fingerprint failed for {os.path.basename(path)}: {e}")
+            return None
+
+    frames = frames[: len(frames) // (HASH_W * HASH_H) * HASH_W * HASH_H]
+    frames = frames.reshape(-1, HASH_H, HASH_W)
+    video, video_t, mirror = _video_hashes(frames)
+    audio, audio_t = _audio_codes(samples.astype(np.float32) / 32768.0)
+    return Fingerprint(video, video_t, audio, audio_t, mirror=mirror)
+
+
+def _dhash(frames) -> "np.ndarray":
+    bits = frames[:, :, 1:] > frames[:, :, :-1]
+    packed = np.packbits(bits.reshape(len(frames), 64), axis=1)
+    return packed.view(">u8").ravel().astype(np.uint64)
+
+
+def _video_hashes(frames):
+    """dHash per second, minus flat frames (black, fades, title cards)."""
+    hashes = _dhash(frames)
+    mirror = _dhash(frames[:, :, ::-1])
+    bits = popcount(hashes)
+    keep = (bits >= 8) & (bits <= 56)
+    t = np.arange(len(hashes), dtype=np.int16)
+    return hashes[keep], t[keep], mirror[keep]
+
+
+def _audio_codes(samples):
+    """
+    32-bit code per second from a chroma/band-energy sketch: 12 bits
+    dominant pitch classes, 12 bits the same over a 2 s window (tolerates
+    misaligned second boundaries), 8 bits louder-than-average bands.
+    Silent seconds are dropped.
+    """
+    empty = np.zeros(0, np.uint32), np.zeros(0, np.int16)
+    n = 1 + (len(samples) - AUDIO_FRAME) // AUDIO_HOP
+    if n < 2:
+        return empty
+
+    freqs = np.fft.rfftfreq(AUDIO_FRAME, 1 / AUDIO_RATE)
+    valid = (freqs >= 80) & (freqs <= 4000)
+    pitch = np.round(12 * np.log2(freqs[valid] / 440.0)).astype(int) % 12
+    edges = np.geomspace(80, 4000, 10)
+    band = np.clip(np.searchsorted(edges, freqs[valid]) - 1, 0, 8)
+    chroma_map = np.zeros((valid.sum(), 12), np.float32)
+    chroma_map[np.arange(len(pitch)), pitch] = 1
+    band_map = np.zeros((valid.sum(), 9), np.float32)
+    band_map[np.arange(len(band)), band] = 1
+
+    seconds = (np.arange(n) * AUDIO_HOP + AUDIO_FRAME // 2) // AUDIO_RATE
+    total = int(seconds[-1]) + 1
+    chroma = np.zeros((total, 12), np.float32)
+    bands = np.zeros((total, 9), np.float32)
+    window = np.hanning(AUDIO_FRAME).astype(np.float32)
+    # Blocks of frames keep the FFT working set small on long inputs
+    for start in range(0, n, 512):
+        idx = np.arange(start, min(n, start + 512))
+        frames = samples[idx[:, None] * AUDIO_HOP + np.arange(AUDIO_FRAME)] * window
+        power = (np.abs(np.fft.rfft(frames, axis=1)) ** 2)[:, valid].astype(np.float32)
+        np.add.at(chroma, seconds[idx], power @ chroma_map)
+        np.add.at(bands, seconds[idx], power @ band_map)
+
+    energy = bands.sum(axis=1)
+    audible = energy > 0.01 * max(float(np.median(energy)), 1e-9)
+    # Threshold against each window's own mean so low-energy (noise) bins
+    # stay 0 instead of flipping at random
+    chroma /= np.maximum(chroma.sum(axis=1, keepdims=True), 1e-12)
+    paired = chroma + np.vstack([chroma[1:], chroma[-1:]])
+    log_bands = np.log(bands[:, 1:] + 1e-9)
+    bits = np.hstack([
+        chroma > 1 / 12,
+        paired > 2 / 12,
+        log_bands > log_bands.mean(axis=1, keepdims=True),
+    ])
+    codes = np.packbits(bits, axis=1).view(">u4").ravel().astype(np.uint32)
+    t = np.arange(total, dtype=np.int16)
+    return codes[audible], t[audible]
+
+
+if NUMPY_AVAILABLE:
+    _POP8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(x) -> "np.ndarray":
+    """Set bits per element of a uint64 array."""
+    x = np.ascontiguousarray(x, dtype=np.uint64)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(x).astype(np.int32)
+    return _POP8[x.view(np.uint8)].reshape(-1, 8).sum(axis=1, dtype=np.int32)
+
+
+def chunk_flips(radius: int) -> "np.ndarray":
+    """Every CHUNK_BITS-bit mask with at most `radius` bits set."""
+    masks = [0]
+    for _ in range(radius):
+        masks = sorted({m | (1 << b) for m in masks for b in range(CHUNK_BITS)} | set(masks))
+    return np.array(masks, dtype=np.int64)
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+class _Table:
+    """One multi-index hashing column set (video or audio)."""
+
+    def __init__(self, chunks: int, dtype, probe_radius: int, max_distance: int):
+        self.chunks = chunks
+        self.flips = chunk_flips(probe_radius)
+        self.max_distance = max_distance
+        self.codes = np.zeros(0, dtype)
+        self.entry = np.zeros(0, np.int32)
+        self.t = np.zeros(0, np.int16)
+        self._tables = None     # [(bucket start offsets, row order)] per chunk
+        self._starts = None     # first row of each entry
+
+    def append(self, codes, t, entry: int):
+        self.codes = np.concatenate([self.codes, codes.astype(self.codes.dtype)])
+        self.t = np.concatenate([self.t, t.astype(np.int16)])
+        self.entry = np.concatenate([self.entry, np.full(len(codes), entry, np.int32)])
+        self._tables = self._starts = None
+
+    def _build(self):
+        codes = self.codes.astype(np.uint64)
+        buckets = np.arange(2 ** CHUNK_BITS + 1)
+        self._tables = []
+        for c in range(self.chunks):
+            keys = ((codes >> np.uint64(c * CHUNK_BITS)) & np.uint64(0xFFFF)).astype(np.int32)
+            order = np.argsort(keys, kind="stable").astype(np.int32)
+            # Rows of chunk value v are order[starts[v]:starts[v + 1]]
+            self._tables.append((np.searchsorted(keys[order], buckets), order))
+
+    def candidates(self, query):
+        """(query index, row) pairs sharing a chunk and within max_distance bits."""
+        if not len(self.codes) or not len(query):
+            return np.zeros(0, np.int64), np.zeros(0, np.int64)
+        if self._tables is None:
+            self._build()
+        query = query.astype(np.uint64)
+        flips = self.flips
+        q_parts, row_parts = [], []
+        for c, (starts, order) in enumerate(self._tables):
+            chunk = ((query >> np.uint64(c * CHUNK_BITS)) & np.uint64(0xFFFF)).astype(np.int64)
+            probes = (chunk[:, None] ^ flips[None, :]).ravel()
+            lo, hi = starts[probes], starts[probes + 1]
+            counts = hi - lo
+            total = int(counts.sum())
+            if not total:
+                continue
+            within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            row_parts.append(order[np.repeat(lo, counts) + within])
+            q_parts.append(np.repeat(np.arange(len(query)).repeat(len(flips)), counts))
+        if not row_parts:
+            return np.zeros(0, np.int64), np.zeros(0, np.int64)
+
+        # A row found through several chunks votes more than once; that
+        # only favours closer matches, so no dedup pass is needed
+        q_idx, rows = np.concatenate(q_parts), np.concatenate(row_parts)
+        close = popcount(query[q_idx] ^ self.codes[rows].astype(np.uint64)) <= self.max_distance
+        return q_idx[close], rows[close]
+
+    def rows_of(self, entry: int) -> slice:
+        # Rows are appended entry by entry, so each entry is contiguous
+        if self._starts is None:
+            entries = int(self.entry[-1]) + 1 if len(self.entry) else 0
+            self._starts = np.searchsorted(self.entry, np.arange(entries + 1))
+        if entry + 1 >= len(self._starts):
+            return slice(0, 0)
+        return slice(int(self._starts[entry]), int(self._starts[entry + 1]))
+
+
+def _pack(values, dtype: str) -> str:
+    return base64.b64encode(np.ascontiguousarray(values, dtype=dtype).tobytes()).decode("ascii")
+
+
+def _unpack(text: str, dtype: str):
+    return np.frombuffer(base64.b64decode(text), dtype=dtype)
+
+
+class FingerprintIndex:
+    """Persistent perceptual index of sources we used and shorts we posted."""
+
+    def __init__(self, store: StateStore, legacy_path: Path = None):
+        self.store = store
+        self.ids = []
+        self.kinds = []
+        self._positions = {}
+        self.video = _Table(VIDEO_CHUNKS, np.uint64, probe_radius=0,
+                            max_distance=VIDEO_RADIUS)
+        self.audio = _Table(AUDIO_CHUNKS, np.uint32, probe_radius=1,
+                            max_distance=int(32 * AUDIO_MAX_BER))
+        self._lock = threading.RLock()
+        self._load()
+        if legacy_path:
+            self._migrate_npz(Path(legacy_path))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, entry_id: str) -> bool:
+        return entry_id in self._positions
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def add(self, entry_id: str, fp: Fingerprint, kind: str = "source",
+            save: bool = True) -> bool:
+        """Index a fingerprint (no-op if the id is already indexed)."""
+        if fp is None or fp.empty:
+            return False
+        with self._lock:
+            if not self._append(entry_id, kind, fp.video, fp.video_t, fp.audio, fp.audio_t):
+                return False
+            self.store.write(
+                "INSERT OR IGNORE INTO fingerprints (entry_id, kind, added_at, video, "
+                "video_t, audio, audio_t) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (entry_id, kind, datetime.utcnow().isoformat(),
+                 _pack(fp.video, "<u8"), _pack(fp.video_t, "<i2"),
+                 _pack(fp.audio, "<u4"), _pack(fp.audio_t, "<i2")),
+            )
+            if save:
+                self.save()
+        logger.info(f"🧬 Fingerprinted {kind} {entry_id} ({len(self)} indexed)")
+        return True
+
+    def save(self):
+        """Commit entries added with save=False."""
+        self.store.flush()
+
+    def _append(self, entry_id: str, kind: str, video, video_t, audio, audio_t) -> bool:
+        if entry_id in self._positions:
+            return False
+        entry = len(self.ids)
+        self.ids.append(entry_id)
+        self.kinds.append(kind)
+        self._positions[entry_id] = entry
+        self.video.append(video, video_t, entry)
+        self.audio.append(audio, audio_t, entry)
+        return True
+
+    def _load(self):
+        rows = self.store.query(
+            "SELECT entry_id, kind, video, video_t, audio, audio_t "
+            "FROM fingerprints ORDER BY added_at, entry_id"
+        )
+        for r in rows:
+            try:
+                self._append(
+                    r["entry_id"], r["kind"],
+                    _unpack(r["video"], "<u8"), _unpack(r["video_t"], "<i2"),
+                    _unpack(r["audio"], "<u4"), _unpack(r["audio_t"], "<i2"),
+                )
+            except ValueError as e:
+                logger.warning(f"⚠️ Skipping unreadable fingerprint {r['entry_id']}: {e}")
+        if rows:
+            logger.info(f"🧬 Fingerprint index: {len(self)} entries, "
+                        f"{len(self.video.codes)} frame hashes")
+
+    def _migrate_npz(self, path: Path):
+        """Import an index saved by older versions (.npz) once."""
+        if self.store.get_meta("fingerprints_migrated") or not path.exists():
+            return
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                ids = [str(i) for i in data["ids"]]
+                kinds = [str(k) for k in data["kinds"]]
+                columns = {name: data[name] for name in (
+                    "v_codes", "v_t", "v_entry", "a_codes", "a_t", "a_entry")}
+        except Exception as e:
+            logger.warning(f"⚠️ Legacy fingerprint index unreadable ({e}), skipped")
+            return
+        added = 0
+        for i, (entry_id, kind) in enumerate(zip(ids, kinds)):
+            v = columns["v_entry"] == i
+            a = columns["a_entry"] == i
+            added += self.add(entry_id, Fingerprint(
+                columns["v_codes"][v], columns["v_t"][v],
+                columns["a_codes"][a], columns["a_t"][a],
+            ), kind=kind, save=False)
+        self.store.set_meta("fingerprints_migrated", datetime.utcnow().isoformat())
+        self.save()
+        logger.info(f"📦 Migrated {added} fingerprints from {path.name}")
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+    def lookup(self, fp: Fingerprint, exclude: tuple = ()) -> Optional[dict]:
+        """
+        Best indexed entry this fingerprint matches, or None:
+        {"id", "kind", "offset", "video", "audio", "overlap"}. A video
+        match wins (its "audio" is set when the audio agrees at the same
+        offset); "video" None means only the audio matched, which shorts
+        sharing a trending sound or music bed do too.
+        """
+        if fp is None or fp.empty or not self.ids:
+            return None
+        excluded = {self._positions[e] for e in exclude if e in self._positions}
+        with self._lock:
+            video = []
+            for query in (fp.video, fp.mirror):
+                if query is not None:
+                    video += self._match_video(query, fp.video_t, excluded)
+            audio = self._match_audio(fp, excluded)
+        if video:
+            best = max(video, key=lambda m: m["video"])
+            agreeing = [
+                a["audio"] for a in audio
+                if a["entry"] == best["entry"] and abs(a["offset"] - best["offset"]) <= 1
+            ]
+            best["audio"] = max(agreeing, default=None)
+        elif audio:
+            best = max(audio, key=lambda m: m["audio"])
+        else:
+            return None
+        best["id"] = self.ids[best.pop("entry")]
+        best["kind"] = self.kinds[self._positions[best["id"]]]
+        return best
+
+    def _votes(self, table: _Table, q_t, q_idx, rows, excluded: set) -> list:
+        """Most-voted (entry, offset) pairs among candidate rows."""
+        if not len(rows):
+            return []
+        entries = table.entry[rows].astype(np.int64)
+        offsets = table.t[rows].astype(np.int64) - q_t[q_idx].astype(np.int64)
+        keys, counts = np.unique(entries * 65536 + (offsets + 32768), return_counts=True)
+        top = np.argsort(counts)[::-1]
+        votes = []
+        for k in keys[top]:
+            entry, offset = int(k // 65536), int(k % 65536) - 32768
+            if entry not in excluded:
+                votes.append((entry, offset))
+            if len(votes) >= TOP_OFFSETS:
+                break
+        return votes
+
+    @staticmethod
+    def _aligned(table: _Table, entry: int, offset: int, codes, q_t):
+        """(query codes, stored codes) at the same media time under `offset`."""
+        rows = table.rows_of(entry)
+        _, q_i, s_i = np.intersect1d(q_t.astype(np.int64) + offset,
+                                     table.t[rows].astype(np.int64),
+                                     return_indices=True)
+        return codes[q_i].astype(np.uint64), table.codes[rows][s_i].astype(np.uint64)
+
+    def _match_video(self, query, q_t, excluded: set) -> list:
+        q_idx, rows = self.video.candidates(query)
+        found = []
+        for entry, offset in self._votes(self.video, q_t, q_idx, rows, excluded):
+            ours, theirs = self._aligned(self.video, entry, offset, query, q_t)
+            if len(ours) < MIN_OVERLAP:
+                continue
+            ratio = float(np.mean(popcount(ours ^ theirs) <= VIDEO_RADIUS))
+            if ratio >= MIN_VIDEO_MATCH:
+                found.append({"entry": entry, "offset": offset, "video": round(ratio, 3),
+                              "audio": None, "overlap": len(ours)})
+        return found
+
+    def _match_audio(self, fp: Fingerprint, excluded: set) -> list:
+        q_idx, rows = self.audio.candidates(fp.audio)
+        found = []
+        for entry, offset in self._votes(self.audio, fp.audio_t, q_idx, rows, excluded):
+            ours, theirs = self._aligned(self.audio, entry, offset, fp.audio, fp.audio_t)
+            if len(ours) < MIN_OVERLAP:
+                continue
+            ber = float(popcount(ours ^ theirs).sum()) / (32 * len(ours))
+            if ber <= AUDIO_MAX_BER:
+                found.append({"entry": entry, "offset": offset, "video": None,
+                              "audio": round(1 - ber, 3), "overlap": len(ours)})
+        return found
+
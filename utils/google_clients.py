@@ -0,0 +1,106 @@
+"""
+Google Clients — Lazy, shared YouTube API service factory.
+
+Cold-start friendly:
+- Discovery document loaded once per process (on-disk cache → bundled
+  googleapiclient copy → network), parsed once, shared by every client
+- API-key and OAuth services built on first use, never at import time
+- Public (API-key) calls fall back to the OAuth client when no key is set
+"""
+
+import json
+import logging
+import threading
+import urllib.request
+from pathlib import Path
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+DISCOVERY_URL = "https://www.googleapis.com/discovery/v1/apis/{api}/{version}/rest"
+
+
+class YouTubeServiceFactory:
+    """Builds YouTube Data API services from one cached discovery document."""
+
+    def __init__(self, cache_dir: Path, api_key: str = None,
+                 credentials_loader: Callable = None,
+                 api: str = "youtube", version: str = "v3"):
+        self.cache_file = Path(cache_dir) / f"{api}.{version}.json"
+        self.api_key = api_key
+        self.credentials_loader = credentials_loader
+        self.api = api
+        self.version = version
+        self._document = None
+        self._public = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Discovery document
+    # ------------------------------------------------------------------
+    def discovery_document(self) -> dict:
+        """Parsed discovery document, loaded at most once per process."""
+        with self._lock:
+            if self._document is None:
+                self._document = self._load_document()
+            return self._document
+
+    def _load_document(self) -> dict:
+        # 1. On-disk cache from a previous run
+        if self.cache_file.exists():
+            try:
+                with open(self.cache_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.warning(f"⚠️ Discovery cache unreadable: {e}")
+
+        # 2. Copy bundled with googleapiclient
+        content = None
+        try:
+            from googleapiclient.discovery_cache import get_static_doc
+            content = get_static_doc(self.api, self.version)
+        except ImportError:
+            pass
+
+        # 3. Network
+        if not content:
+            url = DISCOVERY_URL.format(api=self.api, version=self.version)
+            logger.info(f"🌐 Fetching discovery document: {url}")
+            with urllib.request.urlopen(url, timeout=30) as resp:
+                content = resp.read().decode("utf-8")
+
+        document = json.loads(content)
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_file, "w", encoding="utf-8") as f:
+                f.write(content)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not cache discovery document: {e}")
+        return document
+
+    # ------------------------------------------------------------------
+    # Services
+    # ------------------------------------------------------------------
+    def public(self):
+        """API-key client for search/videos reads (built on first use)."""
+        if self._public is None:
+            if self.api_key:
+                self._public = self._build(developerKey=self.api_key)
+                logger.info("✅ YouTube Data API OK")
+            elif self.credentials_loader:
+                creds = self.credentials_loader()
+                if creds is None:
+                    return None
+                logger.info("ℹ️ No YOUTUBE_API_KEY — using OAuth client for reads")
+                self._public = self.authorized(creds)
+            else:
+                logger.error("❌ YOUTUBE_API_KEY missing")
+        return self._public
+
+    def authorized(self, credentials):
+        """OAuth client; cheap to call per thread (document is shared)."""
+        return self._build(credentials=credentials)
+
+    def _build(self, **kwargs):
+        from googleapiclient.discovery import build_from_document
+        return build_from_document(self.discovery_document(), **kwargs)
@@ -0,0 +1,49 @@
+"""
+Lazy — Build expensive objects (and import their modules) on first use.
+
+Features:
+- Drop-in stand-in for a module-level singleton: the first attribute
+  access runs the factory, later ones go straight to the real object
+- Thread-safe (one build even when prefetch/upload workers race)
+- `is_built()` lets shutdown code skip objects that were never needed
+"""
+
+import threading
+from typing import Callable
+
+
+class Lazy:
+    """Proxy that creates its target with `factory()` on first attribute access."""
+
+    __slots__ = ("_factory", "_name", "_target", "_lock")
+
+    def __init__(self, factory: Callable[[], object], name: str = None):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_name", name or getattr(factory, "__name__", "object"))
+        object.__setattr__(self, "_target", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _resolve(self):
+        target = self._target
+        if target is None:
+            with self._lock:
+                target = self._target
+                if target is None:
+                    target = self._factory()
+                    object.__setattr__(self, "_target", target)
+        return target
+
+    def __getattr__(self, name: str):
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name: str, value):
+        setattr(self._resolve(), name, value)
+
+    def __repr__(self) -> str:
+        state = repr(self._target) if self._target is not None else "not built"
+        return f"<Lazy {self._name}: {state}>"
+
+
+def is_built(obj) -> bool:
+    """False only for a Lazy whose target hasn't been created yet."""
+    return not isinstance(obj, Lazy) or obj._target is not None
@@ -0,0 +1,199 @@
+"""
+Media Info — One ffprobe per file, shared by every stage.
+
+Features:
+- Streams, format and (optionally) the video keyframe index in a
+  single ffprobe call
+- Compact `__slots__` record instead of raw ffprobe JSON
+- Cached by path + mtime + size, so a rewritten file is probed again
+- Frame rates parsed as exact fractions (30000/1001), never eval'd
+"""
+
+import json
+import logging
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from fractions import Fraction
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+STREAM_ENTRIES = (
+    "index,codec_type,codec_name,width,height,r_frame_rate,avg_frame_rate,"
+    "duration,sample_rate,channels"
+)
+FORMAT_ENTRIES = "duration,bit_rate"
+PACKET_ENTRIES = "stream_index,pts_time,flags"
+
+
+class MediaInfo:
+    """What the pipeline needs to know about one media file."""
+
+    __slots__ = (
+        "path", "size", "duration", "bit_rate",
+        "width", "height", "fps", "video_codec",
+        "audio_codec", "sample_rate", "channels",
+        "keyframes",
+    )
+
+    def __init__(self, path: str, size: int = 0, duration: float = 0.0,
+                 bit_rate: int = 0, width: int = 0, height: int = 0,
+                 fps: Fraction = None, video_codec: str = None,
+                 audio_codec: str = None, sample_rate: int = 0,
+                 channels: int = 0, keyframes: tuple = None):
+        self.path = path
+        self.size = size
+        self.duration = duration
+        self.bit_rate = bit_rate
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.video_codec = video_codec
+        self.audio_codec = audio_codec
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.keyframes = keyframes      # sorted pts seconds, None = not probed
+
+    @property
+    def has_video(self) -> bool:
+        return self.video_codec is not None
+
+    @property
+    def has_audio(self) -> bool:
+        return self.audio_codec is not None
+
+    @property
+    def aspect(self) -> float:
+        return self.width / self.height if self.height else 0.0
+
+    def nearest_keyframe(self, t: float, window: float = 2.0) -> float:
+        """Closest keyframe to `t` within `window` seconds (else `t`)."""
+        if not self.keyframes:
+            return t
+        best = min(self.keyframes, key=lambda k: abs(k - t))
+        return best if abs(best - t) <= window else t
+
+    def __repr__(self) -> str:
+        return (
+            f"MediaInfo({os.path.basename(self.path)!r}, {self.width}x{self.height}, "
+            f"{self.duration:.1f}s, fps={self.fps}, v={self.video_codec}, "
+            f"a={self.audio_codec})"
+        )
+
+
+def parse_rate(value: str) -> Optional[Fraction]:
+    """ffprobe frame rate ("30000/1001", "25/1", "0/0") as a Fraction."""
+    try:
+        rate = Fraction(value)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    return rate if rate > 0 else None
+
+
+class MediaProber:
+    """Probes files with ffprobe and caches the results."""
+
+    def __init__(self, max_entries: int = 256, timeout: float = 60.0):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._cache = OrderedDict()     # (path, mtime_ns, size) → MediaInfo
+        self._lock = threading.Lock()
+
+    def probe(self, path: str, keyframes: bool = False) -> Optional[MediaInfo]:
+        """
+        MediaInfo for `path`, or None if it can't be read.
+        With keyframes=True the video keyframe times are included (read
+        from packet flags, no decoding).
+        """
+        try:
+            st = os.stat(path)
+        except (OSError, TypeError):
+            return None
+        key = (str(path), st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            info = self._cache.get(key)
+            if info and (info.keyframes is not None or not keyframes):
+                self._cache.move_to_end(key)
+                return info
+
+        info = self._ffprobe(str(path), st.st_size, keyframes)
+        if info is None:
+            return None
+        with self._lock:
+            self._cache[key] = info
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return info
+
+    def _ffprobe(self, path: str, size: int, keyframes: bool) -> Optional[MediaInfo]:
+        entries = f"format={FORMAT_ENTRIES}:stream={STREAM_ENTRIES}"
+        if keyframes:
+            entries += f":packet={PACKET_ENTRIES}"
+        cmd = ["ffprobe", "-v", "error", "-of", "json",
+               "-show_entries", entries, path]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True,
+                                    timeout=self.timeout)
+            data = json.loads(result.stdout or "{}")
+        except Exception as e:
+            logger.warning(f"⚠️ ffprobe failed for {os.path.basename(path)}: {e}")
+            return None
+        if not data.get("streams"):
+            logger.warning(f"⚠️ ffprobe found no streams in {os.path.basename(path)}")
+            return None
+        return self._parse(path, size, data, keyframes)
+
+    @staticmethod
+    def _parse(path: str, size: int, data: dict, keyframes: bool) -> MediaInfo:
+        fmt = data.get("format", {})
+        info = MediaInfo(path, size=size,
+                         duration=_float(fmt.get("duration")),
+                         bit_rate=int(_float(fmt.get("bit_rate"))))
+        video_index = None
+        for stream in data["streams"]:
+            kind = stream.get("codec_type")
+            if kind == "video" and info.video_codec is None:
+                video_index = stream.get("index")
+                info.video_codec = stream.get("codec_name", "unknown")
+                info.width = int(stream.get("width") or 0)
+                info.height = int(stream.get("height") or 0)
+                info.fps = (parse_rate(stream.get("avg_frame_rate"))
+                            or parse_rate(stream.get("r_frame_rate")))
+                info.duration = info.duration or _float(stream.get("duration"))
+            elif kind == "audio" and info.audio_codec is None:
+                info.audio_codec = stream.get("codec_name", "unknown")
+                info.sample_rate = int(_float(stream.get("sample_rate")))
+                info.channels = int(stream.get("channels") or 0)
+
+        if keyframes:
+            info.keyframes = tuple(sorted(
+                _float(p.get("pts_time"))
+                for p in data.get("packets", [])
+                if p.get("stream_index") == video_index
+                and "K" in p.get("flags", "") and p.get("pts_time") not in (None, "N/A")
+            ))
+        return info
+
+
+def _float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_prober() -> MediaProber:
+    """Process-wide prober shared by the governor and every engine."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = MediaProber()
+        return _default
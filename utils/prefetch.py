@@ -0,0 +1,180 @@
+"""
+Prefetch Queue — Download the next candidates while the current one renders.
+
+Keeps the top-K ranked candidates downloading in the background so the
+render stage always finds a local source:
+- Bounded worker pool (concurrent downloads)
+- Disk cap on finished-but-unconsumed sources
+- Ready sources handed out before in-flight ones; failed downloads are
+  dropped (and reported) as soon as they fail
+- Optional pin/release hooks keep queued sources out of cache eviction,
+  and `lookup` revalidates a finished download before handing it out
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchQueue:
+    """Background source downloads for ranked candidates."""
+
+    def __init__(self, fetch: Callable[[dict], str], depth: int = 3,
+                 workers: int = 2, max_bytes: int = 3 * 1024 ** 3,
+                 lookup: Callable[[dict], Optional[str]] = None,
+                 pin: Callable[[dict], None] = None,
+                 release: Callable[[dict], None] = None,
+                 on_failed: Callable[[dict, BaseException], None] = None):
+        self.fetch = fetch
+        self.lookup = lookup
+        self.pin = pin
+        self.release = release
+        self.on_failed = on_failed
+        self.depth = depth
+        self.max_bytes = max_bytes
+        self._queued = []       # video_data waiting for a worker
+        self._jobs = {}         # video_id → (video_data, Future)
+        self._lock = threading.RLock()  # done-callbacks may run inline
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="prefetch"
+        )
+        self._workers = workers
+
+    # ------------------------------------------------------------------
+    # Queue management
+    # ------------------------------------------------------------------
+    def ids(self) -> set:
+        """IDs queued or downloading (exclude them from discovery)."""
+        with self._lock:
+            return {v["id"] for v in self._queued} | set(self._jobs)
+
+    def free_slots(self) -> int:
+        with self._lock:
+            return max(0, self.depth - len(self._queued) - len(self._jobs))
+
+    def offer(self, candidates: list):
+        """Add ranked candidates (best first) up to the queue depth."""
+        with self._lock:
+            known = {v["id"] for v in self._queued} | set(self._jobs)
+            for video_data in candidates:
+                if len(self._queued) + len(self._jobs) >= self.depth:
+                    break
+                if video_data["id"] not in known:
+                    self._queued.append(video_data)
+                    known.add(video_data["id"])
+        self._pump()
+
+    def next(self, exclude: set = None) -> Optional[dict]:
+        """Best candidate to render next: finished downloads first."""
+        exclude = exclude or set()
+        with self._lock:
+            jobs = [(v, f) for v, f in self._jobs.values() if v["id"] not in exclude]
+            for video_data, future in jobs:
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    return video_data
+            if jobs:
+                return jobs[0][0]
+            for video_data in self._queued:
+                if video_data["id"] not in exclude:
+                    return video_data
+        return None
+
+    def source(self, video_data: dict) -> str:
+        """Local source path; waits for the prefetch or fetches directly."""
+        with self._lock:
+            job = self._jobs.pop(video_data["id"], None)
+            self._queued = [v for v in self._queued if v["id"] != video_data["id"]]
+
+        try:
+            if job is None:
+                return self.fetch(video_data)
+            if not job[1].done():
+                logger.info(f"⏳ Waiting for prefetch of {video_data['id']}...")
+            path = job[1].result()
+            if self.lookup:
+                # Evicted from the cache since it finished: fetch it again
+                path = self.lookup(video_data) or self.fetch(video_data)
+            return path
+        finally:
+            if job is not None:
+                self._release(video_data)
+            self._pump()
+
+    def discard(self, video_id: str):
+        """Forget a candidate (its download keeps running if started)."""
+        with self._lock:
+            job = self._jobs.pop(video_id, None)
+            self._queued = [v for v in self._queued if v["id"] != video_id]
+        if job is not None:
+            self._release(job[0])
+        self._pump()
+
+    def shutdown(self):
+        """Stop starting new downloads and wait for running ones."""
+        with self._lock:
+            self._queued.clear()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    # ------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------
+    def _pump(self):
+        """Start queued downloads while workers and disk budget allow."""
+        with self._lock:
+            while self._queued:
+                running = sum(1 for _, f in self._jobs.values() if not f.done())
+                if running >= self._workers:
+                    return
+                if self._ready_bytes() >= self.max_bytes:
+                    logger.info("💽 Prefetch disk cap reached, holding downloads")
+                    return
+
+                video_data = self._queued.pop(0)
+                logger.info(f"⬇️ Prefetching {video_data['id']} in background")
+                if self.pin:
+                    self.pin(video_data)
+                future = self._executor.submit(self.fetch, video_data)
+                self._jobs[video_data["id"]] = (video_data, future)
+                future.add_done_callback(
+                    lambda f, v=video_data: self._on_done(v, f)
+                )
+
+    def _on_done(self, video_data: dict, future: Future):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            logger.warning(f"⚠️ Prefetch of {video_data['id']} failed: {error}")
+            with self._lock:
+                # Still queued (nobody is waiting on it): drop and report it
+                job = self._jobs.get(video_data["id"])
+                dropped = job is not None and job[1] is future
+                if dropped:
+                    del self._jobs[video_data["id"]]
+            if dropped:
+                self._release(video_data)
+                if self.on_failed:
+                    try:
+                        self.on_failed(video_data, error)
+                    except Exception as e:
+                        logger.warning(f"⚠️ Could not record prefetch failure: {e}")
+        self._pump()
+
+    def _release(self, video_data: dict):
+        if self.release:
+            self.release(video_data)
+
+    def _ready_bytes(self) -> int:
+        """Bytes held by finished, unconsumed downloads (lock held)."""
+        total = 0
+        for _, future in self._jobs.values():
+            if future.done() and not future.cancelled() and future.exception() is None:
+                try:
+                    total += os.path.getsize(future.result())
+                except OSError:
+                    pass
+        return total
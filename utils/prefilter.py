@@ -0,0 +1,261 @@
+"""
+Prefilter — Reject unsuitable sources from metadata, before any download.
+
+Features:
+- Ordered chain of small filters, cheapest first, each answering
+  "keep" or (FailureCause, reason) for one candidate
+- Two stages: "search" filters read only the search snippet (free, run
+  before the candidate costs a videos.list slot); "details" filters read
+  the batched videos.list metadata
+- Checks: live/upcoming broadcasts, source length (vertical shorts may
+  be shorter), 360°/3D projections, age restriction, region blocks and,
+  optionally, missing captions
+- Checked/rejected counters per filter, kept per run in the state DB
+  and summed across runs (`stats --json`); state snapshots carry them
+"""
+
+import logging
+import uuid
+from typing import Optional
+
+from utils.failures import FailureCause
+from utils.state_store import StateStore
+
+logger = logging.getLogger(__name__)
+
+SHORT_MAX_SECONDS = 60      # longest upload YouTube treats as a Short
+SHORTS_MARKERS = ("#shorts", "#short")
+
+_COUNTS_UPSERT = (
+    "INSERT INTO prefilter_counts (run_id, filter, checked, rejected) "
+    "VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(run_id, filter) DO UPDATE SET "
+    "checked = checked + excluded.checked, rejected = rejected + excluded.rejected"
+)
+
+
+def is_vertical_short(details: dict) -> bool:
+    """
+    Aspect hint: videos.list doesn't expose frame size for other people's
+    uploads, so a Short (≤ 60 s, tagged #shorts) stands in for "vertical".
+    """
+    if not details or details.get("duration_seconds", 0) > SHORT_MAX_SECONDS:
+        return False
+    text = " ".join([
+        details.get("title", ""), details.get("description", ""),
+        *("#" + t.lstrip("#") for t in details.get("tags", [])),
+    ]).lower()
+    return any(marker in text for marker in SHORTS_MARKERS)
+
+
+# ---------------------------------------------------------------------------
+# Filters
+# ---------------------------------------------------------------------------
+class SourceFilter:
+    """One check; `check` returns None to keep or (cause, reason) to reject."""
+
+    name = "filter"
+    cost = 0                    # lower runs first
+    stages = ("details",)
+
+    def check(self, video_data: dict, details: dict = None) -> Optional[tuple]:
+        raise NotImplementedError
+
+
+class LiveFilter(SourceFilter):
+    """Live and upcoming broadcasts have no fixed length to cut from."""
+
+    name = "live"
+    cost = 0
+    stages = ("search", "details")
+
+    def check(self, video_data, details=None):
+        state = (details or video_data).get("live") or "none"
+        if state != "none":
+            return FailureCause.LIVE, f"broadcast is {state}"
+        return None
+
+
+class DurationFilter(SourceFilter):
+    """Long enough for an intro skip plus a clip, short enough to download."""
+
+    name = "duration"
+    cost = 1
+
+    def __init__(self, min_seconds: int = 30, short_min_seconds: int = 15,
+                 max_seconds: int = 3600):
+        self.min_seconds = min_seconds
+        self.short_min_seconds = short_min_seconds
+        self.max_seconds = max_seconds
+
+    def min_for(self, details: dict) -> int:
+        """Vertical shorts have no intro to skip, so they may be shorter."""
+        return self.short_min_seconds if is_vertical_short(details) else self.min_seconds
+
+    def check(self, video_data, details=None):
+        duration = details["duration_seconds"]
+        if duration < self.min_for(details):
+            return FailureCause.TOO_SHORT, f"only {duration}s"
+        if self.max_seconds and duration > self.max_seconds:
+            return FailureCause.TOO_LONG, f"{duration // 60} min long"
+        return None
+
+
+class ProjectionFilter(SourceFilter):
+    """360° and stereoscopic 3D frames don't crop to a vertical short."""
+
+    name = "projection"
+    cost = 1
+
+    def check(self, video_data, details=None):
+        if details.get("projection", "rectangular") != "rectangular":
+            return FailureCause.UNSUITABLE_FORMAT, f"{details['projection']} projection"
+        if details.get("dimension", "2d") != "2d":
+            return FailureCause.UNSUITABLE_FORMAT, f"{details['dimension']} video"
+        return None
+
+
+class ContentRatingFilter(SourceFilter):
+    """Age-restricted videos need a signed-in download and can't be monetized."""
+
+    name = "content_rating"
+    cost = 2
+
+    def check(self, video_data, details=None):
+        if (details.get("content_rating") or {}).get("ytRating") == "ytAgeRestricted":
+            return FailureCause.AGE_RESTRICTED, "age-restricted"
+        return None
+
+
+class RegionFilter(SourceFilter):
+    """The source must play where the downloader runs."""
+
+    name = "region"
+    cost = 2
+
+    def __init__(self, region: str = "US"):
+        self.region = region.upper()
+
+    def check(self, video_data, details=None):
+        restriction = details.get("region_restriction") or {}
+        allowed = restriction.get("allowed")
+        if (allowed is not None and self.region not in allowed) or \
+                self.region in restriction.get("blocked", ()):
+            return FailureCause.REGION_BLOCKED, f"not available in {self.region}"
+        return None
+
+
+class CaptionFilter(SourceFilter):
+    """Sources with captions give Whisper-free transcripts and better hooks."""
+
+    name = "captions"
+    cost = 3
+
+    def check(self, video_data, details=None):
+        if not details.get("caption"):
+            return FailureCause.NO_CAPTIONS, "no captions"
+        return None
+
+
+def default_filters(min_seconds: int = 30, short_min_seconds: int = 15,
+                    max_seconds: int = 3600, region: str = "US",
+                    require_captions: bool = False) -> list:
+    filters = [
+        LiveFilter(),
+        DurationFilter(min_seconds, short_min_seconds, max_seconds),
+        ProjectionFilter(),
+        ContentRatingFilter(),
+    ]
+    if region:
+        filters.append(RegionFilter(region))
+    if require_captions:
+        filters.append(CaptionFilter())
+    return filters
+
+
+# ---------------------------------------------------------------------------
+# Chain
+# ---------------------------------------------------------------------------
+class PrefilterChain:
+    """Runs candidates through the filters of a stage, cheapest first."""
+
+    def __init__(self, filters: list, store: StateStore = None):
+        self.filters = sorted(filters, key=lambda f: f.cost)
+        self.store = store
+        self.run_id = uuid.uuid4().hex[:12]
+        if store:
+            self._migrate_meta()
+
+    def min_source_seconds(self, details: dict) -> int:
+        """Shortest usable source for these details (0 without a duration filter)."""
+        for f in self.filters:
+            if isinstance(f, DurationFilter):
+                return f.min_for(details)
+        return 0
+
+    def run(self, candidates: list, stage: str = "details",
+            details: dict = None) -> tuple:
+        """
+        (passed, rejected): candidates that passed every filter of `stage`
+        (order kept) and [(video_data, cause, reason)] for the rest. In the
+        details stage, candidates without details pass (the analysis
+        decides once they resolve).
+        """
+        filters = [f for f in self.filters if stage in f.stages]
+        counts = {f.name: [0, 0] for f in filters}
+        passed, rejected = [], []
+        for video_data in candidates:
+            d = None
+            if stage == "details":
+                d = (details or {}).get(video_data["id"])
+                if not d:
+                    passed.append(video_data)
+                    continue
+            for f in filters:
+                counts[f.name][0] += 1
+                verdict = f.check(video_data, d)
+                if verdict:
+                    counts[f.name][1] += 1
+                    rejected.append((video_data, *verdict))
+                    break
+            else:
+                passed.append(video_data)
+
+        if rejected:
+            logger.info(
+                f"🚫 Prefilter ({stage}): {len(rejected)}/{len(candidates)} rejected "
+                + ", ".join(f"{name} {n}" for name, (_, n) in counts.items() if n)
+            )
+        self._record(counts)
+        return passed, rejected
+
+    def _record(self, counts: dict):
+        if not self.store or not any(checked for checked, _ in counts.values()):
+            return
+        for name, (checked, rejected) in counts.items():
+            self.store.write(_COUNTS_UPSERT, (self.run_id, name, checked, rejected))
+
+    def _migrate_meta(self):
+        """Totals kept in the meta table by older versions become one run."""
+        totals = self.store.get_meta("prefilter")
+        if not totals:
+            return
+        for name, entry in totals.items():
+            self.store.write(
+                "INSERT OR IGNORE INTO prefilter_counts (run_id, filter, checked, "
+                "rejected) VALUES ('legacy', ?, ?, ?)",
+                (name, entry.get("checked", 0), entry.get("rejected", 0)),
+            )
+        self.store.set_meta("prefilter", None)
+
+    def stats(self) -> dict:
+        """{filter: {checked, rejected}} accumulated across runs."""
+        if not self.store:
+            return {}
+        return {
+            r["filter"]: {"checked": r["checked"], "rejected": r["rejected"]}
+            for r in self.store.query(
+                "SELECT filter, SUM(checked) AS checked, SUM(rejected) AS rejected "
+                "FROM prefilter_counts GROUP BY filter"
+            )
+        }
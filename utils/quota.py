@@ -0,0 +1,100 @@
+"""
+Quota Ledger — Today's YouTube Data API spend, shared by searches and uploads.
+
+Features:
+- One daily budget per API project: search.list calls and uploads
+  (videos.insert, thumbnails.set, videos.list) draw on the same units
+- Spend on record is derived from the search log and the uploads table,
+  which state snapshots merge, so a fresh CI runner sees what earlier
+  runs spent today
+- "Today" is the API's quota day: it resets at midnight Pacific time
+- Calls reserved in this process are added on top until the day rolls over
+- Optional per-kind caps (e.g. a smaller daily search budget)
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+from utils.state_store import StateStore
+
+logger = logging.getLogger(__name__)
+
+# YouTube Data API quotas reset at midnight Pacific time
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+except Exception:   # no tz database (e.g. Windows without tzdata)
+    QUOTA_TZ = timezone(timedelta(hours=-8), "PST")
+    logger.info("ℹ️ No tz database — quota day assumes PST (UTC-8) all year")
+
+# YouTube Data API quota costs (units)
+QUOTA_COST = {
+    "search.list": 100,
+    "videos.insert": 1600,
+    "thumbnails.set": 50,
+    "videos.list": 1,
+}
+
+# kind → (rows logged since the quota day began, units each row cost)
+_RECORDED = {
+    "search": (
+        "SELECT COUNT(*) AS n FROM searches WHERE searched_at >= ?",
+        QUOTA_COST["search.list"],
+    ),
+    "upload": (
+        "SELECT COUNT(*) AS n FROM uploads WHERE timestamp >= ?",
+        QUOTA_COST["videos.insert"] + QUOTA_COST["thumbnails.set"],
+    ),
+}
+
+
+class QuotaLedger:
+    """Reserves API units against the project's daily budget."""
+
+    def __init__(self, store: StateStore, daily_units: int = 10000):
+        self.store = store
+        self.daily_units = daily_units
+        self._day = None
+        self._spent = {}            # kind → units on record + reserved here
+        self._lock = threading.Lock()
+
+    def _today(self) -> dict:
+        """Spend per kind this quota day; re-read from the store when it changes."""
+        midnight = datetime.now(QUOTA_TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+        if midnight != self._day:
+            self._day = midnight
+            # Rows are stamped with naive UTC times
+            since = midnight.astimezone(timezone.utc).replace(tzinfo=None).isoformat()
+            self._spent = {
+                kind: self.store.query_one(sql, (since,))["n"] * cost
+                for kind, (sql, cost) in _RECORDED.items()
+            }
+        return self._spent
+
+    def spent(self, kind: str = None) -> int:
+        """Units spent today, by `kind` or in total."""
+        with self._lock:
+            spent = self._today()
+            return spent.get(kind, 0) if kind else sum(spent.values())
+
+    def left(self, kind: str = None, cap: int = None) -> int:
+        """Units left today, within `cap` for `kind` when given."""
+        with self._lock:
+            spent = self._today()
+            left = self.daily_units - sum(spent.values())
+            if cap is not None:
+                left = min(left, cap - spent.get(kind, 0))
+            return max(0, left)
+
+    def reserve(self, kind: str, *calls: str, cap: int = None) -> bool:
+        """Take the units of `calls`; False if the budget (or `cap`) is spent."""
+        cost = sum(QUOTA_COST[c] for c in calls)
+        with self._lock:
+            spent = self._today()
+            if sum(spent.values()) + cost > self.daily_units:
+                return False
+            if cap is not None and spent.get(kind, 0) + cost > cap:
+                return False
+            spent[kind] = spent.get(kind, 0) + cost
+            return True
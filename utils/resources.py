@@ -0,0 +1,170 @@
+"""
+Resource Governor — CPU/memory-aware budgets for FFmpeg and Whisper jobs.
+
+Features:
+- Knows the host: usable cores (affinity), MemAvailable, load average
+- Caps how many heavy jobs run at once (cores and memory bound)
+- Hands each job a thread budget (-threads, -filter_threads,
+  x264-params, Whisper cpu_threads) so parallel stages don't
+  oversubscribe the CPU
+- Timeouts scaled by input duration, resolution and thread budget
+  instead of a fixed 600 s
+"""
+
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+from utils.media_info import MediaProber, default_prober
+
+logger = logging.getLogger(__name__)
+
+# Rough peak memory of one 1080p libx264 encode (filters + lookahead)
+JOB_MEMORY_MB = 700
+MIN_THREADS = 2
+
+# ffmpeg options that take no value
+FLAGS = {"-y", "-n", "-shortest", "-an", "-vn", "-sn", "-nostdin", "-hide_banner"}
+
+
+def usable_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+
+def available_memory_mb() -> int:
+    """MemAvailable from /proc/meminfo (falls back to a 4 GB guess)."""
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return 4096
+
+
+def load_average() -> float:
+    try:
+        return os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return 0.0
+
+
+class ResourceGovernor:
+    """Admits heavy media jobs and sizes their thread budgets."""
+
+    def __init__(self, max_jobs: int = 0, threads_per_job: int = 0,
+                 job_memory_mb: int = JOB_MEMORY_MB, prober: MediaProber = None):
+        self.cores = usable_cores()
+        self.job_memory_mb = job_memory_mb
+        self.max_jobs = max_jobs or self._auto_max_jobs()
+        self.threads_per_job = threads_per_job
+        self._active = 0
+        self._cond = threading.Condition()
+        self.prober = prober or default_prober()
+        logger.info(
+            f"🧮 Governor: {self.cores} cores, {available_memory_mb()} MB free, "
+            f"≤{self.max_jobs} concurrent media jobs"
+        )
+
+    def _auto_max_jobs(self) -> int:
+        by_cpu = max(1, self.cores // MIN_THREADS)
+        by_mem = max(1, available_memory_mb() // self.job_memory_mb)
+        return min(by_cpu, by_mem)
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+    @contextmanager
+    def job(self, label: str = "job"):
+        """Wait for a slot; yields the thread budget for this job."""
+        with self._cond:
+            while self._active >= self.max_jobs:
+                self._cond.wait()
+            self._active += 1
+            threads = self.thread_budget()
+        logger.debug(f"🧮 {label}: {threads} threads ({self._active}/{self.max_jobs} jobs)")
+        try:
+            yield threads
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify()
+
+    def thread_budget(self) -> int:
+        """Threads for one job: idle cores shared among the job slots."""
+        if self.threads_per_job:
+            return self.threads_per_job
+        # Load from other processes (beyond our own jobs) eats into the budget
+        foreign = max(0.0, load_average() - self._active * MIN_THREADS)
+        idle = max(1, int(self.cores - foreign))
+        return max(1, idle // self.max_jobs)
+
+    # ------------------------------------------------------------------
+    # FFmpeg integration
+    # ------------------------------------------------------------------
+    @staticmethod
+    def apply(cmd: list, threads: int) -> list:
+        """
+        Copy of an ffmpeg command with thread limits: the job's budget is
+        split across its outputs (a multi-output export runs one encoder
+        per output in the same process).
+        """
+        if not cmd or cmd[0] != "ffmpeg":
+            return cmd
+        outputs, prev = [], None
+        for i, arg in enumerate(cmd[1:], 1):
+            # A positional argument not consumed by an option is an output path
+            takes_value = prev is not None and prev.startswith("-") and prev not in FLAGS
+            if not arg.startswith("-") and not takes_value:
+                outputs.append(i)
+            prev = None if takes_value else arg
+        per_output = max(1, threads // max(1, len(outputs)))
+
+        out, start = [cmd[0], "-filter_threads", str(threads)], 1
+        for i in outputs:
+            segment = cmd[start:i]
+            out += segment + ["-threads", str(per_output)]
+            if "libx264" in segment and "-x264-params" not in segment:
+                out += ["-x264-params",
+                        f"threads={per_output}:lookahead-threads={max(1, per_output // 2)}"]
+            out.append(cmd[i])
+            start = i + 1
+        return out + cmd[start:]
+
+    def timeout(self, input_path: str, threads: int = None,
+                duration: float = None, height: int = None) -> float:
+        """Seconds an ffmpeg job on this input may take before it is killed."""
+        if duration is None or height is None:
+            probed_duration, probed_height = self.shape(input_path)
+            duration = probed_duration if duration is None else duration
+            height = probed_height if height is None else height
+        threads = threads or self.thread_budget()
+        # ~3 s of encode per media second at 1080p on 2 threads (1.5 s
+        # from 4 threads up), scaled by pixel count, plus start-up slack
+        pixels = max(0.25, (height / 1080) ** 2)
+        return 120 + duration * 1.5 * pixels * max(1.0, 4 / threads)
+
+    def shape(self, path: str) -> tuple:
+        """(duration seconds, video height) of a media file, cached."""
+        info = self.prober.probe(path)
+        if info is None:
+            return 600.0, 1080
+        return info.duration or 600.0, info.height or 1080
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_governor() -> ResourceGovernor:
+    """Process-wide governor for engines built without one."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ResourceGovernor()
+        return _default
@@ -0,0 +1,335 @@
+"""
+Resumable Uploader — Restart-safe YouTube resumable uploads.
+
+Speaks the resumable upload protocol directly so the session survives
+the process:
+- Session URI and acknowledged byte offset persisted to disk, keyed by
+  file hash + metadata (changed metadata opens a new session)
+- Exponential backoff with jitter on 5xx, connection resets and expired
+  sessions; the retry budget resets whenever a chunk makes progress
+- Resume from the last byte the server acknowledged
+- Expired sessions (404/410) restarted, counted as retries
+- Chunk size adapted to measured throughput (shared across uploads)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+YOUTUBE_UPLOAD_URL = "https://www.googleapis.com/upload/youtube/v3/videos"
+
+RETRYABLE_STATUS = {500, 502, 503, 504}
+RETRYABLE_ERRORS = (
+    urllib.error.URLError, ConnectionError, socket.timeout, TimeoutError,
+)
+
+# Chunks must be a multiple of 256 KiB (except the last one)
+CHUNK_ALIGN = 256 * 1024
+
+
+class UploadError(Exception):
+    """Non-retryable upload failure."""
+
+
+class SessionExpired(Exception):
+    """The server no longer knows the session URI."""
+
+
+class _Retryable(Exception):
+    """Transient failure; the caller backs off and resumes."""
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """308 means 'Resume Incomplete' here, never a redirect."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class UploadSessionStore:
+    """Persists open upload sessions keyed by file hash + metadata."""
+
+    def __init__(self, session_file: Path):
+        self.session_file = Path(session_file)
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        if self.session_file.exists():
+            try:
+                with open(self.session_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.warning(f"⚠️ Error loading {self.session_file.name}: {e}")
+        return {}
+
+    def _write(self, data: dict):
+        tmp = self.session_file.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, self.session_file)
+
+    def get(self, session_key: str) -> Optional[dict]:
+        with self._lock:
+            return self._load().get(session_key)
+
+    def save(self, session_key: str, session: dict):
+        with self._lock:
+            data = self._load()
+            data[session_key] = session
+            self._write(data)
+
+    def delete(self, session_key: str):
+        with self._lock:
+            data = self._load()
+            if data.pop(session_key, None) is not None:
+                self._write(data)
+
+
+class ResumableUploader:
+    """Uploads a file through a persisted resumable session."""
+
+    def __init__(self, sessions: UploadSessionStore,
+                 endpoint: str = YOUTUBE_UPLOAD_URL,
+                 chunk_size: int = 10 * 1024 * 1024,
+                 max_retries: int = 8,
+                 backoff_base: float = 1.0,
+                 backoff_cap: float = 64.0,
+                 timeout: float = 120.0,
+                 adaptive: bool = True,
+                 target_chunk_seconds: float = 8.0,
+                 min_chunk: int = 1024 * 1024,
+                 max_chunk: int = 64 * 1024 * 1024):
+        self.sessions = sessions
+        self.endpoint = endpoint
+        self.chunk_size = self._align(chunk_size)
+        self.adaptive = adaptive
+        self.target_chunk_seconds = target_chunk_seconds
+        self.min_chunk = self._align(min_chunk)
+        self.max_chunk = self._align(max_chunk)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.timeout = timeout
+        self._opener = urllib.request.build_opener(_NoRedirect)
+        self._throughput = None  # bytes/s, EWMA over every chunk this run
+        self._lock = threading.Lock()
+
+    def upload(self, video_path: str, metadata: dict,
+               token_provider: Callable[[], str],
+               part: str = "snippet,status",
+               content_type: str = "video/mp4") -> dict:
+        """Upload video_path with metadata; returns the API response body."""
+        size = os.path.getsize(video_path)
+        session_key = self._session_key(video_path, metadata, part)
+        retries = 0
+        acked = -1
+
+        while True:
+            try:
+                session = self._open_session(
+                    video_path, session_key, size, metadata,
+                    token_provider, part, content_type,
+                )
+                return self._send(video_path, session_key, size, session, token_provider)
+            except SessionExpired:
+                # Also what a wrong endpoint answers: back off, don't spin
+                self.sessions.delete(session_key)
+                acked = -1
+                reason = "upload session expired"
+            except _Retryable as e:
+                reason = str(e)
+
+            # Failures are budgeted per stall, not per file: any progress
+            # since the last failure resets the count
+            saved = self.sessions.get(session_key)
+            offset = saved["offset"] if saved else 0
+            if offset > acked >= 0:
+                retries = 0
+            acked = offset
+
+            retries += 1
+            if retries > self.max_retries:
+                raise UploadError(f"Giving up after {self.max_retries} retries: {reason}")
+            delay = min(self.backoff_cap, self.backoff_base * 2 ** (retries - 1))
+            delay += random.uniform(0, delay / 2)
+            logger.warning(
+                f"  ⚠️ Upload interrupted ({reason}), retry {retries}/"
+                f"{self.max_retries} in {delay:.1f}s"
+            )
+            time.sleep(delay)
+
+    # ------------------------------------------------------------------
+    # Protocol
+    # ------------------------------------------------------------------
+    def _open_session(self, video_path: str, session_key: str, size: int,
+                      metadata: dict, token_provider,
+                      part: str, content_type: str) -> dict:
+        """Reuse the persisted session for this file, or start a new one."""
+        session = self.sessions.get(session_key)
+        if session and session.get("size") == size:
+            offset = self._query_offset(session["uri"], size, token_provider)
+            if isinstance(offset, dict):
+                # Server already has the whole file
+                session["response"] = offset
+                return session
+            session["offset"] = offset
+            self.sessions.save(session_key, session)
+            logger.info(f"  🔁 Resuming upload at byte {offset}/{size}")
+            return session
+
+        body = json.dumps(metadata).encode("utf-8")
+        req = urllib.request.Request(
+            f"{self.endpoint}?uploadType=resumable&part={part}",
+            data=body, method="POST",
+            headers={
+                "Authorization": f"Bearer {token_provider()}",
+                "Content-Type": "application/json; charset=UTF-8",
+                "X-Upload-Content-Length": str(size),
+                "X-Upload-Content-Type": content_type,
+            },
+        )
+        status, headers, _ = self._request(req)
+        uri = headers.get("Location")
+        if status not in (200, 201) or not uri:
+            raise UploadError(f"Could not open upload session (HTTP {status})")
+
+        session = {
+            "uri": uri,
+            "offset": 0,
+            "size": size,
+            "path": os.path.abspath(video_path),
+            "created": time.time(),
+        }
+        self.sessions.save(session_key, session)
+        logger.info("  📨 Upload session opened")
+        return session
+
+    def _send(self, video_path: str, session_key: str, size: int,
+              session: dict, token_provider) -> dict:
+        """Send chunks from the acknowledged offset until completion."""
+        if "response" in session:
+            self.sessions.delete(session_key)
+            return session["response"]
+
+        offset = session["offset"]
+        with open(video_path, "rb") as f:
+            while True:
+                f.seek(offset)
+                chunk = f.read(self._next_chunk_size())
+                end = offset + len(chunk) - 1
+                req = urllib.request.Request(
+                    session["uri"], data=chunk, method="PUT",
+                    headers={
+                        "Authorization": f"Bearer {token_provider()}",
+                        "Content-Length": str(len(chunk)),
+                        "Content-Range": f"bytes {offset}-{end}/{size}",
+                    },
+                )
+                started = time.monotonic()
+                status, headers, payload = self._request(req)
+                self._record_throughput(len(chunk), time.monotonic() - started)
+
+                if status in (200, 201):
+                    self.sessions.delete(session_key)
+                    logger.info("  📤 Upload progress: 100%")
+                    return json.loads(payload or b"{}")
+                if status != 308:
+                    raise UploadError(f"Unexpected HTTP {status} during upload")
+
+                offset = self._parse_range(headers.get("Range"))
+                session["offset"] = offset
+                self.sessions.save(session_key, session)
+                logger.info(f"  📤 Upload progress: {int(offset / size * 100)}%")
+
+    def _query_offset(self, uri: str, size: int, token_provider):
+        """Ask the server how many bytes it has (dict if already complete)."""
+        req = urllib.request.Request(
+            uri, data=b"", method="PUT",
+            headers={
+                "Authorization": f"Bearer {token_provider()}",
+                "Content-Length": "0",
+                "Content-Range": f"bytes */{size}",
+            },
+        )
+        status, headers, payload = self._request(req)
+        if status in (200, 201):
+            return json.loads(payload or b"{}")
+        if status == 308:
+            return self._parse_range(headers.get("Range"))
+        raise UploadError(f"Unexpected HTTP {status} querying upload status")
+
+    def _request(self, req: urllib.request.Request):
+        """Perform a request, mapping failures to retry/expiry exceptions."""
+        try:
+            with self._opener.open(req, timeout=self.timeout) as resp:
+                return resp.status, resp.headers, resp.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 308:
+                return 308, e.headers, b""
+            if e.code in (404, 410):
+                raise SessionExpired()
+            if e.code in RETRYABLE_STATUS:
+                raise _Retryable(f"HTTP {e.code}")
+            detail = e.read()[:300].decode("utf-8", "replace")
+            raise UploadError(f"HTTP {e.code}: {detail}")
+        except RETRYABLE_ERRORS as e:
+            raise _Retryable(str(e) or type(e).__name__)
+
+    # ------------------------------------------------------------------
+    # Adaptive chunking
+    # ------------------------------------------------------------------
+    def _next_chunk_size(self) -> int:
+        """Size the next chunk to take ~target_chunk_seconds at current speed."""
+        with self._lock:
+            rate = self._throughput
+        if not self.adaptive or not rate:
+            return self.chunk_size
+        size = int(rate * self.target_chunk_seconds)
+        return self._align(min(self.max_chunk, max(self.min_chunk, size)))
+
+    def _record_throughput(self, nbytes: int, seconds: float):
+        """Fold one chunk's throughput into the running estimate."""
+        if seconds <= 0 or nbytes < CHUNK_ALIGN:
+            return
+        rate = nbytes / seconds
+        with self._lock:
+            if self._throughput is None:
+                self._throughput = rate
+            else:
+                self._throughput = 0.7 * self._throughput + 0.3 * rate
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _align(size: int) -> int:
+        """Round down to a 256 KiB multiple (at least one unit)."""
+        return max(CHUNK_ALIGN, size - size % CHUNK_ALIGN)
+
+    @staticmethod
+    def _parse_range(range_header: Optional[str]) -> int:
+        """'bytes=0-1234' → next offset 1235; missing header → 0."""
+        if not range_header:
+            return 0
+        return int(range_header.rsplit("-", 1)[-1]) + 1
+
+    @staticmethod
+    def _session_key(path: str, metadata: dict, part: str) -> str:
+        """SHA-256 of the file contents, the metadata and the parts sent."""
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(block)
+        h.update(json.dumps([metadata, part], sort_keys=True, default=str).encode("utf-8"))
+        return h.hexdigest()
@@ -0,0 +1,218 @@
+"""
+State Snapshot — Compact, versioned, mergeable export of the state store.
+
+Features:
+- One gzip'd JSON file with every table CI runs must share (a few
+  hundred KB instead of a SQLite file plus its WAL)
+- Byte-for-byte reproducible for the same state (sorted rows, fixed
+  gzip mtime), so unchanged state makes no commit
+- Versioned: older snapshots are upgraded on import, newer ones refused
+- Importing merges instead of overwriting, CRDT-style, so two runs that
+  started from the same snapshot can both be folded in, in any order:
+    videos       last-writer-wins, 'processed' beats any failure
+    failures     last-writer-wins on (last_failed_at, attempts); on a tie
+                 the earliest retry_after wins (dropped once processed)
+    uploads      grow-only set
+    sessions     append-only log (deduplicated by content)
+    candidates   grow-only set, earliest discovery kept
+    snapshots    grow-only set of (video_id, taken_at) samples
+    upload_stats last-writer-wins on fetched_at
+    searches     grow-only log of (channel, searched_at) search calls
+    fingerprints grow-only set of perceptual fingerprints (union by id)
+    prefilter_counts  grow-only counters per (run, filter), merged by MAX
+  Rollups and channel statistics are derived data: not exported, rebuilt
+  after an import (AnalyticsTracker / ChannelScheduler.rebuild)
+"""
+
+import gzip
+import json
+import logging
+import os
+import socket
+from datetime import datetime
+from pathlib import Path
+
+from utils.state_store import StateStore
+
+logger = logging.getLogger(__name__)
+
+FORMAT = "youtyann-state"
+VERSION = 1
+
+# table → (exported columns, merge statement for one row)
+TABLES = {
+    "videos": (
+        ("video_id", "status", "updated_at"),
+        "INSERT INTO videos (video_id, status, updated_at) VALUES (?, ?, ?) "
+        "ON CONFLICT(video_id) DO UPDATE SET status = excluded.status, "
+        "updated_at = excluded.updated_at "
+        "WHERE (excluded.status = 'processed', excluded.updated_at) "
+        "> (videos.status = 'processed', videos.updated_at)",
+    ),
+    "failures": (
+        ("video_id", "cause", "attempts", "last_failed_at", "retry_after"),
+        "INSERT INTO failures (video_id, cause, attempts, last_failed_at, "
+        "retry_after) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT(video_id) DO UPDATE SET cause = excluded.cause, "
+        "attempts = excluded.attempts, last_failed_at = excluded.last_failed_at, "
+        # Same failure on both sides (e.g. a legacy one backfilled by each
+        # fresh CI runner): keep the earlier retry, or it never comes due
+        "retry_after = CASE WHEN (excluded.last_failed_at, excluded.attempts) "
+        "> (failures.last_failed_at, failures.attempts) THEN excluded.retry_after "
+        "ELSE MIN(excluded.retry_after, failures.retry_after) END "
+        "WHERE (excluded.last_failed_at, excluded.attempts) "
+        ">= (failures.last_failed_at, failures.attempts)",
+    ),
+    "uploads": (
+        ("video_id", "source_id", "source_channel", "niche", "title",
+         "duration", "timestamp", "effects", "publish_hour"),
+        "INSERT OR IGNORE INTO uploads (video_id, source_id, source_channel, "
+        "niche, title, duration, timestamp, effects, publish_hour) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    ),
+    "sessions": (
+        ("success", "attempts", "rate", "timestamp"),
+        "INSERT INTO sessions (success, attempts, rate, timestamp) "
+        "SELECT ?1, ?2, ?3, ?4 WHERE NOT EXISTS (SELECT 1 FROM sessions "
+        "WHERE timestamp = ?4 AND success IS ?1 AND attempts IS ?2)",
+    ),
+    "candidates": (
+        ("video_id", "title", "channel", "niche", "url", "discovered_at", "query"),
+        "INSERT INTO candidates (video_id, title, channel, niche, url, "
+        "discovered_at, query) VALUES (?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT(video_id) DO UPDATE SET title = excluded.title, "
+        "channel = excluded.channel, niche = excluded.niche, url = excluded.url, "
+        "discovered_at = excluded.discovered_at, query = excluded.query "
+        "WHERE excluded.discovered_at < candidates.discovered_at",
+    ),
+    "snapshots": (
+        ("video_id", "taken_at", "views", "likes", "comments", "published_at"),
+        "INSERT OR IGNORE INTO snapshots (video_id, taken_at, views, likes, "
+        "comments, published_at) VALUES (?, ?, ?, ?, ?, ?)",
+    ),
+    "upload_stats": (
+        ("video_id", "views", "likes", "comments", "fetched_at"),
+        "INSERT INTO upload_stats (video_id, views, likes, comments, fetched_at) "
+        "VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT(video_id) DO UPDATE SET views = excluded.views, "
+        "likes = excluded.likes, comments = excluded.comments, "
+        "fetched_at = excluded.fetched_at "
+        "WHERE (excluded.fetched_at, excluded.views) "
+        "> (upload_stats.fetched_at, upload_stats.views)",
+    ),
+    "searches": (
+        ("channel", "searched_at", "results", "fresh"),
+        "INSERT OR IGNORE INTO searches (channel, searched_at, results, fresh) "
+        "VALUES (?, ?, ?, ?)",
+    ),
+    "fingerprints": (
+        ("entry_id", "kind", "added_at", "video", "video_t", "audio", "audio_t"),
+        "INSERT OR IGNORE INTO fingerprints (entry_id, kind, added_at, video, "
+        "video_t, audio, audio_t) VALUES (?, ?, ?, ?, ?, ?, ?)",
+    ),
+    "prefilter_counts": (
+        ("run_id", "filter", "checked", "rejected"),
+        "INSERT INTO prefilter_counts (run_id, filter, checked, rejected) "
+        "VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(run_id, filter) DO UPDATE SET "
+        "checked = MAX(checked, excluded.checked), "
+        "rejected = MAX(rejected, excluded.rejected)",
+    ),
+}
+
+# Rules applied after every import (keep the merge order-independent)
+POST_MERGE = (
+    "DELETE FROM failures WHERE video_id IN "
+    "(SELECT video_id FROM videos WHERE status = 'processed')",
+)
+
+# version → function upgrading a snapshot dict to version + 1
+UPGRADES = {}
+
+
+def export_snapshot(store: StateStore, path: Path) -> dict:
+    """Write the store to `path` (atomically); returns rows per table."""
+    path = Path(path)
+    tables = {}
+    for table, (columns, _) in TABLES.items():
+        rows = store.query(f"SELECT {', '.join(columns)} FROM {table}")
+        tables[table] = {
+            "columns": list(columns),
+            "rows": sorted((list(r) for r in rows), key=_sort_key),
+        }
+    snapshot = {
+        "format": FORMAT,
+        "version": VERSION,
+        "tables": tables,
+    }
+    data = json.dumps(snapshot, ensure_ascii=False, separators=(",", ":"),
+                      sort_keys=True).encode("utf-8")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as raw:
+        # mtime=0 and no file name: same state → same bytes
+        with gzip.GzipFile(filename="", fileobj=raw, mode="wb", mtime=0) as gz:
+            gz.write(data)
+    os.replace(tmp, path)
+
+    counts = {table: len(t["rows"]) for table, t in tables.items()}
+    logger.info(
+        f"📤 State snapshot → {path.name} ({path.stat().st_size // 1024} KB, "
+        f"{sum(counts.values())} rows)"
+    )
+    return counts
+
+
+def import_snapshot(store: StateStore, path: Path) -> dict:
+    """
+    Merge the snapshot at `path` into the store; returns rows read per
+    table. Raises ValueError for files that aren't a readable snapshot.
+    """
+    path = Path(path)
+    try:
+        with gzip.open(path, "rb") as f:
+            snapshot = json.loads(f.read().decode("utf-8"))
+    except (OSError, EOFError, ValueError) as e:
+        raise ValueError(f"Unreadable state snapshot {path}: {e}") from e
+    if not isinstance(snapshot, dict) or snapshot.get("format") != FORMAT:
+        raise ValueError(f"{path} is not a {FORMAT} snapshot")
+
+    version = snapshot.get("version", 0)
+    if version > VERSION:
+        raise ValueError(
+            f"{path} is snapshot version {version}; this build reads up to {VERSION}"
+        )
+    while version < VERSION:
+        snapshot = UPGRADES[version](snapshot)
+        version += 1
+
+    counts = {}
+    store.flush()
+    with store.connection() as conn:
+        for table, (columns, merge_sql) in TABLES.items():
+            entry = snapshot["tables"].get(table)
+            if not entry:
+                continue
+            index = [entry["columns"].index(c) if c in entry["columns"] else None
+                     for c in columns]
+            rows = [
+                tuple(row[i] if i is not None else None for i in index)
+                for row in entry["rows"]
+            ]
+            conn.executemany(merge_sql, rows)
+            counts[table] = len(rows)
+        for sql in POST_MERGE:
+            conn.execute(sql)
+
+    store.set_meta("last_snapshot_import", {
+        "file": path.name,
+        "at": datetime.utcnow().isoformat(),
+        "host": socket.gethostname(),
+    })
+    logger.info(f"📥 Merged state snapshot {path.name}: {counts}")
+    return counts
+
+
+def _sort_key(row: list) -> tuple:
+    return tuple((v is None, str(v)) for v in row)
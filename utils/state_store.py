@@ -0,0 +1,365 @@
+"""
+State Store — Embedded SQLite store for all persistent bot state.
+
+Replaces processed_ids.json / failed_ids.json / analytics.json:
+- WAL mode (concurrent readers + one writer, safe across workers)
+- Indexed by video_id, niche and timestamp (no arbitrary truncation)
+- Batched writes (executemany in one transaction)
+- One-time migration of the legacy JSON files
+- Columns added to existing tables by later versions are ALTERed in
+"""
+
+import atexit
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+LEGACY_TIMESTAMP = "1970-01-01T00:00:00"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key     TEXT PRIMARY KEY,
+    value   TEXT
+);
+
+CREATE TABLE IF NOT EXISTS videos (
+    video_id    TEXT PRIMARY KEY,
+    status      TEXT NOT NULL,
+    updated_at  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_videos_status ON videos(status, updated_at);
+
+CREATE TABLE IF NOT EXISTS failures (
+    video_id        TEXT PRIMARY KEY,
+    cause           TEXT NOT NULL,
+    attempts        INTEGER NOT NULL DEFAULT 1,
+    last_failed_at  TEXT NOT NULL,
+    retry_after     TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_failures_retry ON failures(retry_after);
+
+CREATE TABLE IF NOT EXISTS uploads (
+    video_id        TEXT PRIMARY KEY,
+    source_id       TEXT,
+    source_channel  TEXT,
+    niche           TEXT,
+    title           TEXT,
+    duration        REAL,
+    timestamp       TEXT NOT NULL,
+    effects         TEXT,
+    publish_hour    INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_uploads_niche ON uploads(niche);
+CREATE INDEX IF NOT EXISTS idx_uploads_timestamp ON uploads(timestamp);
+CREATE INDEX IF NOT EXISTS idx_uploads_source ON uploads(source_id);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    success     INTEGER,
+    attempts    INTEGER,
+    rate        REAL,
+    timestamp   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_timestamp ON sessions(timestamp);
+
+CREATE TABLE IF NOT EXISTS candidates (
+    video_id        TEXT PRIMARY KEY,
+    title           TEXT,
+    channel         TEXT,
+    niche           TEXT,
+    url             TEXT,
+    discovered_at   TEXT NOT NULL,
+    query           TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_candidates_niche ON candidates(niche);
+CREATE INDEX IF NOT EXISTS idx_candidates_discovered ON candidates(discovered_at);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    video_id        TEXT NOT NULL,
+    taken_at        REAL NOT NULL,
+    views           INTEGER NOT NULL,
+    likes           INTEGER NOT NULL,
+    comments        INTEGER NOT NULL,
+    published_at    REAL,
+    PRIMARY KEY (video_id, taken_at)
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_taken ON snapshots(taken_at);
+
+CREATE TABLE IF NOT EXISTS upload_stats (
+    video_id    TEXT PRIMARY KEY,
+    views       INTEGER NOT NULL,
+    likes       INTEGER NOT NULL,
+    comments    INTEGER NOT NULL,
+    fetched_at  TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS rollups (
+    dimension   TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    uploads     INTEGER NOT NULL DEFAULT 0,
+    measured    INTEGER NOT NULL DEFAULT 0,
+    views       INTEGER NOT NULL DEFAULT 0,
+    likes       INTEGER NOT NULL DEFAULT 0,
+    comments    INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, key)
+);
+
+CREATE TABLE IF NOT EXISTS searches (
+    channel         TEXT NOT NULL,
+    searched_at     TEXT NOT NULL,
+    results         INTEGER NOT NULL,
+    fresh           INTEGER NOT NULL,
+    PRIMARY KEY (channel, searched_at)
+);
+
+CREATE TABLE IF NOT EXISTS fingerprints (
+    entry_id        TEXT PRIMARY KEY,
+    kind            TEXT NOT NULL,
+    added_at        TEXT NOT NULL,
+    -- base64 of little-endian arrays (utils.fingerprint)
+    video           TEXT NOT NULL,
+    video_t         TEXT NOT NULL,
+    audio           TEXT NOT NULL,
+    audio_t         TEXT NOT NULL
+);
+
+-- Prefilter counters, one row per (process run, filter): each run only
+-- grows its own rows, so snapshots merge them with MAX
+CREATE TABLE IF NOT EXISTS prefilter_counts (
+    run_id          TEXT NOT NULL,
+    filter          TEXT NOT NULL,
+    checked         INTEGER NOT NULL DEFAULT 0,
+    rejected        INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, filter)
+);
+
+CREATE TABLE IF NOT EXISTS channel_stats (
+    channel         TEXT PRIMARY KEY,
+    searches        INTEGER NOT NULL DEFAULT 0,
+    results         INTEGER NOT NULL DEFAULT 0,
+    fresh           INTEGER NOT NULL DEFAULT 0,
+    uploads         INTEGER NOT NULL DEFAULT 0,
+    failures        INTEGER NOT NULL DEFAULT 0,
+    last_searched   TEXT
+);
+"""
+
+# Columns added after a table first shipped: (table, column, type)
+ADDED_COLUMNS = (
+    ("uploads", "effects", "TEXT"),
+    ("uploads", "publish_hour", "INTEGER"),
+    ("candidates", "query", "TEXT"),
+)
+
+
+class StateStore:
+    """Thread-safe SQLite store with buffered, batched writes."""
+
+    def __init__(self, db_path: Path, legacy_dir: Path = None,
+                 batch_size: int = 50, flush_interval: float = 2.0):
+        self.db_path = Path(db_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._local = threading.local()
+        self._pending = []          # [(sql, params)]
+        self._pending_since = None
+        self._write_lock = threading.Lock()
+
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+            self._add_columns(conn)
+
+        if legacy_dir is not None:
+            self._migrate_json(Path(legacy_dir))
+
+        atexit.register(self.close)
+
+    # ------------------------------------------------------------------
+    # Connections
+    # ------------------------------------------------------------------
+    def connection(self) -> sqlite3.Connection:
+        """Per-thread connection (sqlite3 objects are not shareable)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def write(self, sql: str, params: tuple = ()):
+        """Queue a write; flushed in batches."""
+        with self._write_lock:
+            self._pending.append((sql, params))
+            if self._pending_since is None:
+                self._pending_since = time.monotonic()
+            due = (
+                len(self._pending) >= self.batch_size
+                or time.monotonic() - self._pending_since >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def write_many(self, sql: str, rows: list):
+        """Execute a bulk write immediately in one transaction."""
+        self.flush()
+        with self.connection() as conn:
+            conn.executemany(sql, rows)
+
+    def flush(self):
+        """Commit all queued writes in a single transaction."""
+        with self._write_lock:
+            pending, self._pending = self._pending, []
+            self._pending_since = None
+        if not pending:
+            return
+
+        # Group consecutive identical statements for executemany
+        groups = []
+        for sql, params in pending:
+            if groups and groups[-1][0] == sql:
+                groups[-1][1].append(params)
+            else:
+                groups.append((sql, [params]))
+
+        with self.connection() as conn:
+            for sql, rows in groups:
+                conn.executemany(sql, rows)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def query(self, sql: str, params: tuple = ()) -> list:
+        """Run a read query after flushing queued writes."""
+        self.flush()
+        return self.connection().execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params: tuple = ()):
+        rows = self.query(sql, params)
+        return rows[0] if rows else None
+
+    # ------------------------------------------------------------------
+    # Meta key/value
+    # ------------------------------------------------------------------
+    def get_meta(self, key: str, default=None):
+        row = self.query_one("SELECT value FROM meta WHERE key = ?", (key,))
+        return json.loads(row["value"]) if row else default
+
+    def set_meta(self, key: str, value):
+        self.write(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, json.dumps(value)),
+        )
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def close(self):
+        """Flush and checkpoint the WAL into the main database file."""
+        try:
+            self.flush()
+            conn = getattr(self._local, "conn", None)
+            if conn is not None:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except Exception as e:
+            logger.warning(f"⚠️ State store close error: {e}")
+
+    # ------------------------------------------------------------------
+    # Migration
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _add_columns(conn: sqlite3.Connection):
+        """ALTER in the ADDED_COLUMNS a database created by an older version lacks."""
+        existing = {}
+        for table, column, kind in ADDED_COLUMNS:
+            if table not in existing:
+                existing[table] = {
+                    r["name"] for r in conn.execute(f"PRAGMA table_info({table})")
+                }
+            if column not in existing[table]:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+                existing[table].add(column)
+
+    def _migrate_json(self, legacy_dir: Path):
+        """Import the legacy JSON state files once."""
+        if self.get_meta("json_migrated"):
+            return
+
+        now = datetime.utcnow().isoformat()
+        video_rows = []
+        for name, status in (("failed_ids.json", "failed"),
+                             ("processed_ids.json", "processed")):
+            for video_id in _load_id_list(legacy_dir / name):
+                # Unknown age: dated at the epoch so any merged state
+                # snapshot (utils.state_snapshot) wins over these rows
+                video_rows.append((video_id, status, LEGACY_TIMESTAMP))
+
+        analytics = {}
+        analytics_file = legacy_dir / "analytics.json"
+        if analytics_file.exists():
+            try:
+                with open(analytics_file, "r", encoding="utf-8") as f:
+                    analytics = json.load(f)
+            except Exception as e:
+                logger.warning(f"⚠️ Error loading {analytics_file.name}: {e}")
+
+        upload_rows = [
+            (u.get("video_id"), u.get("source_id"), u.get("source_channel"),
+             u.get("niche"), u.get("title"), u.get("duration"),
+             u.get("timestamp") or now)
+            for u in analytics.get("uploads", []) if u.get("video_id")
+        ]
+        session_rows = [
+            (s.get("success"), s.get("attempts"), s.get("rate"),
+             s.get("timestamp") or now)
+            for s in analytics.get("sessions", [])
+        ]
+
+        with self.connection() as conn:
+            # processed rows come last so they win over stale failures
+            conn.executemany(
+                "INSERT OR REPLACE INTO videos (video_id, status, updated_at) "
+                "VALUES (?, ?, ?)", video_rows,
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO uploads (video_id, source_id, source_channel, "
+                "niche, title, duration, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                upload_rows,
+            )
+            conn.executemany(
+                "INSERT INTO sessions (success, attempts, rate, timestamp) "
+                "VALUES (?, ?, ?, ?)", session_rows,
+            )
+        self.set_meta("json_migrated", now)
+        self.flush()
+        logger.info(
+            f"📦 Migrated legacy JSON state: {len(video_rows)} IDs, "
+            f"{len(upload_rows)} uploads, {len(session_rows)} sessions"
+        )
+
+
+def _load_id_list(file_path: Path) -> list:
+    """Read a legacy ID cache file (list or {"ids": [...]})."""
+    if not file_path.exists():
+        return []
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as e:
+        logger.warning(f"⚠️ Error loading {file_path.name}: {e}")
+        return []
+    if isinstance(data, dict):
+        data = data.get("ids", [])
+    return [v for v in data if isinstance(v, str)]
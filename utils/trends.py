@@ -0,0 +1,200 @@
+"""
+Trend Tracker — View-velocity momentum for candidate videos.
+
+Features:
+- View/like/comment snapshots of every candidate, appended per run
+  (one row per video per run, from the batched videos.list details)
+- Velocity and acceleration from the last three samples, computed for
+  the whole candidate pool at once with NumPy
+- The publish time acts as a zero-view origin, so a video seen for the
+  first time still gets its lifetime views/hour
+- Momentum = projected views/hour a few hours ahead, weighted by the
+  recent like/comment rate (same weighting as the signal index)
+"""
+
+import calendar
+import logging
+import time
+from datetime import datetime
+
+from utils.state_store import StateStore
+
+logger = logging.getLogger(__name__)
+
+NUMPY_AVAILABLE = False
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    logger.info("ℹ️ numpy not installed — trend momentum disabled")
+
+SAMPLES = 3                 # latest snapshots used per video
+MIN_INTERVAL_S = 15 * 60    # closer snapshots of one video are skipped
+MIN_DT_H = 0.25             # floor for time deltas (hours)
+MAX_ENGAGEMENT = 0.5
+
+
+def _epoch(iso: str) -> float:
+    """YouTube publishedAt ("2024-01-02T03:04:05Z") as epoch seconds."""
+    try:
+        return float(calendar.timegm(
+            datetime.strptime(iso, "%Y-%m-%dT%H:%M:%SZ").timetuple()
+        ))
+    except (TypeError, ValueError):
+        return None
+
+
+class TrendTracker:
+    """Stores stat snapshots and ranks videos by view momentum."""
+
+    def __init__(self, store: StateStore, horizon_hours: float = 6.0,
+                 keep_days: int = 30, default_age_hours: float = 14 * 24):
+        self.store = store
+        self.horizon_hours = horizon_hours
+        self.keep_days = keep_days
+        self.default_age_hours = default_age_hours
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+    def record(self, details: dict, now: float = None) -> int:
+        """
+        Snapshot {video_id: details} (views/likes/comments/published_at as
+        returned by videos.list). Returns the number of rows written.
+        """
+        if not details:
+            return 0
+        now = now or time.time()
+        ids = list(details)
+        marks = ",".join("?" * len(ids))
+        latest = {
+            r["video_id"]: r["taken_at"] for r in self.store.query(
+                f"SELECT video_id, MAX(taken_at) AS taken_at FROM snapshots "
+                f"WHERE video_id IN ({marks}) GROUP BY video_id", tuple(ids),
+            )
+        }
+        rows = [
+            (video_id, now, int(d.get("views") or 0), int(d.get("likes") or 0),
+             int(d.get("comments") or 0), _epoch(d.get("published_at")))
+            for video_id, d in details.items()
+            if now - latest.get(video_id, 0) >= MIN_INTERVAL_S
+        ]
+        if rows:
+            self.store.write_many(
+                "INSERT OR IGNORE INTO snapshots (video_id, taken_at, views, "
+                "likes, comments, published_at) VALUES (?, ?, ?, ?, ?, ?)", rows,
+            )
+        self.store.write(
+            "DELETE FROM snapshots WHERE taken_at < ?",
+            (now - self.keep_days * 86400,),
+        )
+        return len(rows)
+
+    def watchlist(self, since_hours: float = 72, limit: int = 20) -> list:
+        """
+        Candidates snapshotted recently, most viewed first. Snapshotting
+        them again is what measures their acceleration.
+        Returns candidate dicts (id, title, url, channel, niche).
+        """
+        rows = self.store.query(
+            "SELECT c.video_id, c.title, c.channel, c.niche, c.url, "
+            "MAX(s.views) AS views FROM snapshots s "
+            "JOIN candidates c ON c.video_id = s.video_id "
+            "WHERE s.taken_at >= ? GROUP BY s.video_id "
+            "ORDER BY views DESC LIMIT ?",
+            (time.time() - since_hours * 3600, limit),
+        )
+        return [
+            {"id": r["video_id"], "title": r["title"], "url": r["url"],
+             "channel": r["channel"], "niche": r["niche"]}
+            for r in rows
+        ]
+
+    # ------------------------------------------------------------------
+    # Momentum
+    # ------------------------------------------------------------------
+    def momentum(self, video_ids: list) -> dict:
+        """
+        {video_id: {velocity, acceleration, momentum, samples}} for the
+        videos with at least one snapshot. Velocity is views/hour over
+        the latest interval, acceleration views/hour², momentum the
+        engagement-weighted views/hour projected `horizon_hours` ahead.
+        """
+        if not NUMPY_AVAILABLE or not video_ids:
+            return {}
+        ids = list(dict.fromkeys(video_ids))
+        marks = ",".join("?" * len(ids))
+        rows = self.store.query(
+            f"SELECT video_id, taken_at, views, likes, comments, published_at, rn "
+            f"FROM (SELECT *, ROW_NUMBER() OVER (PARTITION BY video_id "
+            f"ORDER BY taken_at DESC) AS rn FROM snapshots "
+            f"WHERE video_id IN ({marks})) WHERE rn <= {SAMPLES}",
+            tuple(ids),
+        )
+        if not rows:
+            return {}
+
+        position = {video_id: i for i, video_id in enumerate(ids)}
+        n = len(ids)
+        # Columns: 0 = latest snapshot, 1 = previous, 2 = the one before.
+        # One extra column so the publish origin always has a free slot.
+        t = np.full((n, SAMPLES + 1), np.nan)
+        counts = np.zeros((3, n, SAMPLES + 1))
+        published = np.full(n, np.nan)
+        row = np.fromiter((position[r["video_id"]] for r in rows), np.int64, len(rows))
+        col = np.fromiter((r["rn"] - 1 for r in rows), np.int64, len(rows))
+        t[row, col] = [r["taken_at"] / 3600 for r in rows]
+        counts[:, row, col] = [[r["views"] for r in rows], [r["likes"] for r in rows],
+                               [r["comments"] for r in rows]]
+        published[row] = [r["published_at"] if r["published_at"] else np.nan
+                          for r in rows]
+
+        # The publish time is a zero-view sample right after the real ones
+        samples = np.sum(~np.isnan(t), axis=1)
+        t[np.arange(n), samples] = published / 3600
+        views, likes, comments = counts
+
+        dt_recent = np.maximum(t[:, 0] - t[:, 1], MIN_DT_H)
+        dt_prev = np.maximum(t[:, 1] - t[:, 2], MIN_DT_H)
+        velocity = np.maximum(views[:, 0] - views[:, 1], 0) / dt_recent
+        previous = np.maximum(views[:, 1] - views[:, 2], 0) / dt_prev
+        acceleration = (velocity - previous) / np.maximum((t[:, 0] - t[:, 2]) / 2, MIN_DT_H)
+
+        # First sighting without a publish time: lifetime over the lookback
+        unknown = np.isnan(velocity)
+        velocity[unknown] = views[unknown, 0] / self.default_age_hours
+        acceleration = np.nan_to_num(acceleration, nan=0.0)
+
+        # Extrapolate, but never beyond 3× or below 0× the current pace
+        projected = velocity + np.clip(acceleration * self.horizon_hours,
+                                       -velocity, 2 * velocity)
+
+        d_views = views[:, 0] - views[:, 1]
+        d_reactions = (likes[:, 0] - likes[:, 1]) + 5 * (comments[:, 0] - comments[:, 1])
+        lifetime = (likes[:, 0] + 5 * comments[:, 0]) / np.maximum(views[:, 0], 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            recent = np.where(d_views > 0, d_reactions / d_views, np.nan)
+        engagement = np.clip(np.where(np.isnan(recent), lifetime, recent),
+                             0, MAX_ENGAGEMENT)
+        score = projected * (1 + 10 * engagement)
+
+        return {
+            video_id: {
+                "velocity": round(float(velocity[i]), 1),
+                "acceleration": round(float(acceleration[i]), 2),
+                "momentum": round(float(score[i]), 1),
+                "samples": int(samples[i]),
+            }
+            for video_id, i in position.items() if samples[i]
+        }
+
+    def rank(self, candidates: list) -> list:
+        """Candidates sorted by momentum, best first (unknown ones last)."""
+        trends = self.momentum([v["id"] for v in candidates])
+        for video_data in candidates:
+            if video_data["id"] in trends:
+                video_data["trend"] = trends[video_data["id"]]
+        return sorted(
+            candidates,
+            key=lambda v: -(v.get("trend") or {}).get("momentum", -1.0),
+        )
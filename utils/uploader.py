@@ -0,0 +1,175 @@
+"""
+YouTube Uploader — Run-scoped upload component.
+
+Features:
+- Authorized credentials loaded and refreshed once per run
+- One cached API service per worker thread (httplib2 is not thread-safe)
+- Adaptive chunk sizing via ResumableUploader
+- Thumbnail set overlapped with post-upload processing checks
+- Concurrent uploads of finished shorts within the daily quota budget
+  (shared with searches through QuotaLedger)
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from google.auth.transport.requests import Request as GoogleAuthRequest
+from googleapiclient.http import MediaFileUpload
+
+from utils.quota import QuotaLedger
+from utils.resumable_upload import ResumableUploader
+
+logger = logging.getLogger(__name__)
+
+
+class YouTubeUploader:
+    """Uploads finished shorts, sharing auth and services across a run."""
+
+    def __init__(self, credentials_loader: Callable, service_builder: Callable,
+                 resumable: ResumableUploader, quota: QuotaLedger, max_workers: int = 2,
+                 processing_timeout: float = 90.0):
+        self.credentials_loader = credentials_loader
+        self.service_builder = service_builder
+        self.resumable = resumable
+        self.quota = quota
+        self.processing_timeout = processing_timeout
+        self._creds = None
+        self._creds_lock = threading.Lock()
+        self._local = threading.local()
+        self._uploads = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="upload"
+        )
+        self._side_calls = ThreadPoolExecutor(
+            max_workers=max_workers * 2, thread_name_prefix="upload-meta"
+        )
+
+    # ------------------------------------------------------------------
+    # Auth
+    # ------------------------------------------------------------------
+    def credentials(self):
+        """Return run-cached credentials, refreshing the token when stale."""
+        with self._creds_lock:
+            if self._creds is None:
+                self._creds = self.credentials_loader()
+            if self._creds is not None and not self._creds.valid:
+                self._creds.refresh(GoogleAuthRequest())
+            return self._creds
+
+    def access_token(self) -> str:
+        return self.credentials().token
+
+    def service(self):
+        """Authorized API client, built once per worker thread."""
+        service = getattr(self._local, "service", None)
+        if service is None:
+            service = self.service_builder(self.credentials())
+            self._local.service = service
+        return service
+
+    # ------------------------------------------------------------------
+    # Quota
+    # ------------------------------------------------------------------
+    def _reserve(self, *calls: str) -> bool:
+        """Reserve quota units for API calls; False if today's budget is spent."""
+        return self.quota.reserve("upload", *calls)
+
+    # ------------------------------------------------------------------
+    # Uploads
+    # ------------------------------------------------------------------
+    def submit(self, video_path: str, thumb_path: str, body: dict) -> Future:
+        """Queue an upload; the future resolves to the YouTube ID or None."""
+        return self._uploads.submit(self.upload, video_path, thumb_path, body)
+
+    def upload(self, video_path: str, thumb_path: str, body: dict) -> Optional[str]:
+        """
+        Upload one short, then set its thumbnail and check processing.
+        Returns the YouTube ID once the video exists (even if processing
+        then fails: uploading it again would only post a duplicate), or
+        None if it was never inserted.
+        """
+        try:
+            if self.credentials() is None:
+                return None
+        except Exception as e:
+            logger.error(f"❌ Could not refresh YouTube credentials: {e}")
+            return None
+        if not self._reserve("videos.insert"):
+            logger.error("❌ YouTube API quota exhausted for today")
+            return None
+
+        try:
+            response = self.resumable.upload(video_path, body, self.access_token)
+            yt_id = response["id"]
+        except Exception as e:
+            logger.error(f"❌ Upload error: {e}")
+            return None
+        logger.info(f"🎉 UPLOADED: https://youtube.com/shorts/{yt_id}")
+
+        # Thumbnail and processing checks are independent — overlap them
+        thumb = self._side_calls.submit(self._set_thumbnail, yt_id, thumb_path)
+        processing = self._side_calls.submit(self._check_processing, yt_id)
+        try:
+            thumb.result()
+            status = processing.result()
+        except Exception as e:
+            logger.warning(f"⚠️ Post-upload checks failed for {yt_id}: {e}")
+            status = "unknown"
+        if status in ("rejected", "failed", "terminated"):
+            logger.error(f"❌ {yt_id} ended '{status}' on YouTube; not re-uploading")
+        return yt_id
+
+    def _set_thumbnail(self, yt_id: str, thumb_path: str):
+        """Set the custom thumbnail (best effort)."""
+        if not thumb_path or not self._reserve("thumbnails.set"):
+            return
+        try:
+            self.service().thumbnails().set(
+                videoId=yt_id, media_body=MediaFileUpload(thumb_path),
+            ).execute()
+            logger.info("🖼️ Custom thumbnail set!")
+        except Exception as e:
+            logger.warning(f"⚠️ Could not set thumbnail: {e}")
+
+    def _check_processing(self, yt_id: str) -> str:
+        """Poll processing status until it settles or the timeout passes."""
+        deadline = time.monotonic() + self.processing_timeout
+        delay = 5.0
+        status = "unknown"
+        while time.monotonic() < deadline and self._reserve("videos.list"):
+            try:
+                resp = self.service().videos().list(
+                    part="status,processingDetails", id=yt_id,
+                ).execute()
+            except Exception as e:
+                logger.warning(f"⚠️ Processing check failed: {e}")
+                return status
+
+            items = resp.get("items", [])
+            if not items:
+                return status
+            upload_status = items[0].get("status", {}).get("uploadStatus")
+            if upload_status == "rejected":
+                reason = items[0]["status"].get("rejectionReason", "?")
+                logger.error(f"❌ Upload rejected by YouTube: {reason}")
+                return "rejected"
+
+            status = items[0].get("processingDetails", {}).get(
+                "processingStatus", upload_status or "unknown"
+            )
+            if status in ("succeeded", "failed", "terminated") or upload_status == "processed":
+                logger.info(f"  🏁 Processing: {status}")
+                return status
+
+            time.sleep(delay)
+            delay = min(delay * 1.5, 20.0)
+
+        logger.info(f"  ⏳ Processing still '{status}', not waiting further")
+        return status
+
+    def shutdown(self):
+        """Wait for queued uploads and release worker threads."""
+        self._uploads.shutdown(wait=True)
+        self._side_calls.shutdown(wait=True)
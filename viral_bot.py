@@ -22,84 +22,207 @@ Stack: FFmpeg + Whisper + OpenCV + Gemini + Pillow + yt-dlp
 """
 
 import os
-import sys
+import argparse
+import hashlib
+import importlib.util
 import json
 import logging
-import random
-import tempfile
-import subprocess
 import re
+import shutil
+import tempfile
+import time
 from datetime import datetime, timedelta
-from typing import Optional
-
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-from google import genai
-
-# Internal modules
-from engines.ffmpeg_editor import FFmpegEditor
-from engines.subtitle_engine import SubtitleEngine
-from engines.thumbnail_engine import ThumbnailEngine
-from engines.seo_engine import SEOEngine
-from engines.originality_engine import OriginalityEngine
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+# Internal modules (light ones only: engines, Google clients, yt-dlp,
+# Whisper and NumPy are imported by the factories below on first use)
 from utils.cache import CacheManager
-from utils.analytics import AnalyticsTracker
+from utils.analytics import AnalyticsTracker, effect_preset
+from utils.state_store import StateStore
+from utils.failures import FailureCause, PipelineFailure
+from utils.artifact_store import ArtifactStore
+from utils.google_clients import YouTubeServiceFactory
+from utils.prefetch import PrefetchQueue
+from utils.quota import QUOTA_COST, QuotaLedger
+from utils.resources import ResourceGovernor
+from utils.ffmpeg_runner import FFmpegRunner
+from utils.lazy import Lazy, is_built
+from utils.prefilter import is_vertical_short
+from utils.state_snapshot import export_snapshot, import_snapshot
 from config.settings import Settings
 
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
+
 # ---------------------------------------------------------------------------
 # LOGGER
 # ---------------------------------------------------------------------------
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("youtyann.log", encoding="utf-8"),
-    ],
-)
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
 logger = logging.getLogger(__name__)
 
+
+def log_to_file(path: str = "youtyann.log"):
+    """Also write the log to `path` (pipeline commands only, not `stats`)."""
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    logging.getLogger().addHandler(handler)
+
 # ---------------------------------------------------------------------------
 # INIT
 # ---------------------------------------------------------------------------
+DOWNLOAD_FORMAT = (
+    "bestvideo[height<=1080][ext=mp4]+bestaudio[ext=m4a]"
+    "/best[height<=1080][ext=mp4]/best[ext=mp4]/best"
+)
+
 settings = Settings()
-cache = CacheManager(settings.BASE_DIR)
-analytics = AnalyticsTracker(settings.BASE_DIR)
-ffmpeg = FFmpegEditor()
-subtitles = SubtitleEngine()
-thumbnails = ThumbnailEngine()
-seo = SEOEngine(settings.GEMINI_API_KEY)
-originality = OriginalityEngine()
+# Low-bitrate analysis proxy (itag 18 is the 360p muxed mp4 most videos have)
+PROXY_FORMAT = (
+    f"18/best[height<={settings.PROXY_HEIGHT}][ext=mp4]"
+    f"/best[height<={settings.PROXY_HEIGHT}]/worst"
+)
+
+# The state DB opens (and migrates legacy JSON) on first use, not on import
+state = Lazy(lambda: StateStore(settings.STATE_DB, legacy_dir=settings.BASE_DIR), "state")
+cache = Lazy(lambda: CacheManager(state), "cache")
+analytics = Lazy(lambda: AnalyticsTracker(state), "analytics")
+# One daily API budget: searches and uploads spend the same project quota
+quota = Lazy(lambda: QuotaLedger(state, settings.YOUTUBE_QUOTA_UNITS), "quota")
+governor = Lazy(lambda: ResourceGovernor(settings.MAX_MEDIA_JOBS, settings.FFMPEG_THREADS),
+                "governor")
+runner = FFmpegRunner(governor, stall_timeout=settings.FFMPEG_STALL_TIMEOUT)
+
+
+# Engines and heavy clients: each factory imports its module, so commands
+# that never render (stats, discover) never load OpenCV, Whisper or yt-dlp
+def _trends():
+    from utils.trends import TrendTracker
+    return TrendTracker(
+        state, horizon_hours=settings.TREND_HORIZON_HOURS,
+        default_age_hours=settings.LOOKBACK_DAYS * 24,
+    )
+
+
+def _channels():
+    from utils.channel_scheduler import ChannelScheduler
+    return ChannelScheduler(
+        state, settings.CHANNELS_BY_NICHE, analytics,
+        daily_units=settings.SEARCH_QUOTA_UNITS,
+        cooldown_hours=settings.SEARCH_COOLDOWN_HOURS, quota=quota,
+    )
+
+
+def _prefilters():
+    from utils.prefilter import PrefilterChain, default_filters
+    return PrefilterChain(default_filters(
+        min_seconds=settings.MIN_SOURCE_SECONDS,
+        short_min_seconds=settings.SHORT_MIN_SOURCE_SECONDS,
+        max_seconds=int(settings.MAX_SOURCE_MINUTES * 60),
+        region=settings.SOURCE_REGION,
+        require_captions=settings.REQUIRE_CAPTIONS,
+    ), state)
+
+
+def _ffmpeg():
+    from engines.ffmpeg_editor import FFmpegEditor
+    return FFmpegEditor(runner)
+
+
+def _subtitles():
+    from engines.subtitle_engine import SubtitleEngine
+    return SubtitleEngine(settings.WHISPER_MODEL, runner=runner,
+                          download_root=settings.WHISPER_MODEL_DIR)
+
+
+def _thumbnails():
+    from engines.thumbnail_engine import ThumbnailEngine
+    return ThumbnailEngine(runner)
+
+
+def _seo():
+    from engines.seo_engine import SEOEngine
+    return SEOEngine(settings.GEMINI_API_KEY)
+
+
+def _originality():
+    from engines.originality_engine import OriginalityEngine
+    return OriginalityEngine(runner)
+
+
+def _exporter():
+    from engines.export_engine import ExportEngine
+    from engines.hook_renderer import HookRenderer
+    hooks = HookRenderer(settings.CACHE_DIR / "hooks", settings.HOOK_FONT_SIZE)
+    return ExportEngine(settings.EXPORT_PLATFORMS, runner, hooks=hooks)
+
+
+def _fingerprints():
+    from utils.fingerprint import FingerprintIndex
+    return FingerprintIndex(state, legacy_path=settings.FINGERPRINT_INDEX)
+
+
+def _downloader():
+    from engines.downloader import VideoDownloader
+    return VideoDownloader(
+        settings.TEMP_DIR / "downloads", DOWNLOAD_FORMAT, settings.CACHE_DIR,
+        cookies=os.environ.get("YOUTUBE_COOKIES", ""),
+        ratelimit=settings.DOWNLOAD_RATE_LIMIT,
+    )
+
+
+trends = Lazy(_trends)
+channels = Lazy(_channels)
+prefilters = Lazy(_prefilters)
+ffmpeg = Lazy(_ffmpeg)
+subtitles = Lazy(_subtitles)
+thumbnails = Lazy(_thumbnails)
+seo = Lazy(_seo)
+originality = Lazy(_originality)
+exporter = Lazy(_exporter)
+# find_spec checks for NumPy without paying for its import
+fingerprints = (
+    Lazy(_fingerprints)
+    if settings.PERCEPTUAL_DEDUP and importlib.util.find_spec("numpy") else None
+)
+downloader = Lazy(_downloader)
+artifacts = Lazy(lambda: ArtifactStore(
+    settings.ARTIFACT_DIR,
+    max_bytes=int(settings.ARTIFACT_MAX_GB * 1024 ** 3),
+), "artifacts")
 
 # ---------------------------------------------------------------------------
-# YOUTUBE & GEMINI CLIENTS
+# YOUTUBE & GEMINI CLIENTS (built lazily on first use)
 # ---------------------------------------------------------------------------
-youtube = None
-client_gemini = None
+_gemini = None
 
-try:
-    if settings.YOUTUBE_API_KEY:
-        youtube = build("youtube", "v3", developerKey=settings.YOUTUBE_API_KEY)
-        logger.info("✅ YouTube Data API OK")
-    else:
-        logger.error("❌ YOUTUBE_API_KEY missing")
 
-    if settings.GEMINI_API_KEY:
-        client_gemini = genai.Client(api_key=settings.GEMINI_API_KEY)
-        logger.info("✅ Gemini Client OK")
-    else:
-        logger.error("❌ GEMINI_API_KEY missing")
-except Exception as e:
-    logger.error(f"Fatal init error: {e}")
-    sys.exit(1)
+def youtube_service():
+    """Read-only YouTube Data API client (API key, or OAuth fallback)."""
+    return youtube_clients.public()
+
+
+def gemini_client():
+    """Gemini client, created on first use."""
+    global _gemini
+    if _gemini is None:
+        if settings.GEMINI_API_KEY:
+            from google import genai
+            _gemini = genai.Client(api_key=settings.GEMINI_API_KEY)
+            logger.info("✅ Gemini Client OK")
+        else:
+            logger.error("❌ GEMINI_API_KEY missing")
+    return _gemini
 
 
 # ---------------------------------------------------------------------------
 # YOUTUBE CREDENTIALS (OAuth for upload)
 # ---------------------------------------------------------------------------
-def get_youtube_credentials() -> Optional[Credentials]:
+def get_youtube_credentials() -> Optional["Credentials"]:
     """Load OAuth2 credentials from env or local file."""
+    from google.oauth2.credentials import Credentials
+
     token_data = None
     env_token = os.environ.get("YOUTUBE_TOKEN_JSON")
 
@@ -138,24 +261,96 @@ def get_youtube_credentials() -> Optional[Credentials]:
         return None
 
 
+youtube_clients = YouTubeServiceFactory(
+    settings.CACHE_DIR / "discovery",
+    api_key=settings.YOUTUBE_API_KEY,
+    credentials_loader=get_youtube_credentials,
+)
+
+
+def _youtube_uploader():
+    from utils.resumable_upload import ResumableUploader, UploadSessionStore
+    from utils.uploader import YouTubeUploader
+    return YouTubeUploader(
+        get_youtube_credentials,
+        youtube_clients.authorized,
+        ResumableUploader(
+            UploadSessionStore(settings.UPLOAD_SESSION_FILE),
+            endpoint=settings.UPLOAD_ENDPOINT,
+            max_retries=settings.UPLOAD_MAX_RETRIES,
+        ),
+        quota,
+        max_workers=settings.UPLOAD_CONCURRENCY,
+    )
+
+
+youtube_uploader = Lazy(_youtube_uploader)
+
+
 # ---------------------------------------------------------------------------
 # SEARCH TRENDING VIDEO
 # ---------------------------------------------------------------------------
-def search_trending_video() -> Optional[dict]:
+def search_trending_video(exclude: set = None) -> Optional[dict]:
     """Find the most viral short from configured channels."""
-    if not youtube:
-        return None
+    found = discover_candidates(limit=1, exclude=exclude)
+    return found[0] if found else None
 
-    # Niche-focused channels organized by category for better targeting
-    channels_by_niche = settings.CHANNELS_BY_NICHE
-    all_channels = []
-    for niche, channels in channels_by_niche.items():
-        all_channels.extend([(ch, niche) for ch in channels])
 
-    random.shuffle(all_channels)
-    logger.info(f"🔍 Scanning {len(all_channels)} channels for viral shorts...")
+def discover_candidates(limit: int = 3, exclude: set = None) -> list:
+    """
+    Up to `limit` candidates: due retries first, then the pool of
+    watched and freshly searched videos ranked by view momentum.
+    """
+    exclude = set(exclude or ())
+    found = []
+
+    # Transient failures that are due come first: no search quota spent,
+    # and their cached artifacts make the retry cheap. Their metadata is
+    # checked again (a broadcast that was live may have ended).
+    retries = [v for v in cache.retry_candidates(limit) if v["id"] not in exclude]
+    if retries:
+        retries = prefilter(retries, "details", get_videos_details([v["id"] for v in retries]))
+    for video_data in retries:
+        if video_data["id"] not in exclude:
+            logger.info(
+                f"🔁 Retrying '{video_data['title']}' "
+                f"(last failure: {video_data['retry_of']})"
+            )
+            found.append(video_data)
+            exclude.add(video_data["id"])
+    if len(found) >= limit:
+        return found[:limit]
 
-    for target_channel, niche in all_channels:
+    youtube = youtube_service()
+    if not youtube:
+        return found
+
+    # Rank a pool a few times larger than needed. Up to half of it comes
+    # from earlier runs' candidates: re-snapshotting them costs no search
+    # quota and is what reveals which ones are accelerating.
+    pool_size = (limit - len(found)) * max(1, settings.TREND_POOL_FACTOR)
+    watched = trends.watchlist(
+        since_hours=min(72, settings.LOOKBACK_DAYS * 24), limit=pool_size
+    )
+    known = cache.known_ids([v["id"] for v in watched])
+    pool = [v for v in watched if v["id"] not in exclude and v["id"] not in known]
+    pool = pool[:max(0, pool_size // 2)]
+    exclude.update(v["id"] for v in pool)
+
+    # Channels in bandit order (expected shorts per search call); each
+    # call spends 100 units of the daily search budget
+    plan = channels.plan()
+    logger.info(
+        f"🔍 Scanning up to {len(plan)} channels for viral shorts "
+        f"({channels.quota_left()} search units left today)..."
+    )
+
+    for target_channel, niche in plan:
+        if len(pool) >= pool_size:
+            break
+        if not channels.reserve():
+            logger.warning("🪫 Daily search quota spent, ranking what was found")
+            break
         try:
             params = dict(
                 part="snippet",
@@ -171,65 +366,201 @@ def search_trending_video() -> Optional[dict]:
 
             response = youtube.search().list(**params).execute()
             items = response.get("items", [])
-            if not items:
-                continue
 
-            random.shuffle(items)
-            for video in items:
+            known = cache.known_ids([v["id"]["videoId"] for v in items])
+            fresh = [v for v in items
+                     if v["id"]["videoId"] not in exclude and v["id"]["videoId"] not in known]
+            channels.record_search(target_channel, len(items), len(fresh))
+            for video in fresh:
                 video_id = video["id"]["videoId"]
-                if cache.is_processed(video_id):
-                    continue
-
-                title = video["snippet"]["title"]
-                logger.info(
-                    f"✅ Found: '{title}' from {target_channel} "
-                    f"(https://youtu.be/{video_id})"
-                )
-                return {
+                video_data = {
                     "id": video_id,
-                    "title": title,
+                    "title": video["snippet"]["title"],
                     "url": f"https://www.youtube.com/watch?v={video_id}",
                     "channel": video["snippet"]["channelTitle"],
                     "niche": niche,
+                    "query": target_channel,
+                    "live": video["snippet"].get("liveBroadcastContent", "none"),
                 }
+                # Fresh results beyond the pool still join the watchlist:
+                # their search units are already spent
+                cache.record_candidate(video_data)
+                exclude.add(video_id)
+                if len(pool) < pool_size and prefilter([video_data], "search"):
+                    pool.append(video_data)
         except Exception as e:
             logger.error(f"  ❌ Error searching '{target_channel}': {e}")
             continue
 
-    return None
+    return found + rank_by_momentum(pool)[:limit - len(found)]
+
+
+def prefilter(candidates: list, stage: str, details: dict = None) -> list:
+    """
+    Candidates that pass the metadata prefilter of `stage`; the rest are
+    marked failed with their cause (retried or dropped by its policy)
+    before anything is downloaded.
+    """
+    passed, rejected = prefilters.run(candidates, stage, details)
+    for video_data, cause, reason in rejected:
+        logger.info(f"🚫 Skipping '{video_data.get('title')}': {reason}")
+        cache.mark_failed(video_data["id"], cause)
+        channels.observe(video_data["id"], cause)
+    return passed
+
+
+def rank_by_momentum(pool: list) -> list:
+    """Snapshot the pool's stats (batched videos.list) and sort by momentum."""
+    if not pool:
+        return []
+    # Same cached details analyze_candidates reads: no extra quota later
+    details = get_videos_details([v["id"] for v in pool])
+    pool = prefilter(pool, "details", details)
+    trends.record({v["id"]: details[v["id"]] for v in pool if v["id"] in details})
+    ranked = trends.rank(pool)
+
+    # How our uploads from the same niche/channel did (rollups, no rescan)
+    affinity = analytics.affinity(ranked)
+    if affinity:
+        for video_data in ranked:
+            trend = video_data.get("trend")
+            if trend:
+                trend["affinity"] = affinity[video_data["id"]]
+                trend["momentum"] = round(trend["momentum"] * trend["affinity"], 1)
+        ranked.sort(key=lambda v: -(v.get("trend") or {}).get("momentum", -1.0))
+    logger.info(f"📈 Ranked {len(ranked)} candidates by view momentum")
+    for video_data in ranked[:3]:
+        trend = video_data.get("trend")
+        if trend:
+            logger.info(
+                f"📈 '{video_data['title']}' from {video_data['channel']}: "
+                f"{trend['velocity']:.0f} views/h, "
+                f"accel {trend['acceleration']:+.0f}/h², "
+                f"momentum {trend['momentum']:.0f}"
+            )
+    return ranked
+
+
+# ---------------------------------------------------------------------------
+# PREFETCH (download the next candidates while the current one renders)
+# ---------------------------------------------------------------------------
+def _prefetch_failed(video_data: dict, error: BaseException):
+    """A queued download failed: record its cause before anyone picks it."""
+    cause = error.cause if isinstance(error, PipelineFailure) else FailureCause.DOWNLOAD_FAILED
+    cache.mark_failed(video_data["id"], cause)
+    channels.observe(video_data["id"], cause)
+
+
+# Queued sources are pinned in the artifact store until rendered or
+# dropped, so the prefetch budget has to fit inside the store's
+prefetch = PrefetchQueue(
+    lambda video_data: fetch_source(video_data),    # defined below
+    depth=settings.PREFETCH_DEPTH,
+    workers=settings.PREFETCH_WORKERS,
+    max_bytes=int(min(settings.PREFETCH_MAX_GB, settings.ARTIFACT_MAX_GB / 2) * 1024 ** 3),
+    lookup=lambda video_data: artifacts.get(_source_key(video_data["id"])),
+    pin=lambda video_data: artifacts.pin(video_data["id"]),
+    release=lambda video_data: artifacts.release(video_data["id"]),
+    on_failed=_prefetch_failed,
+)
+
+
+_ranked = []    # analysed candidates not yet queued, best first
+
+
+def top_up_prefetch(exclude: set = None):
+    """Refill the prefetch queue with the best analysed candidates."""
+    slots = prefetch.free_slots()
+    if not slots:
+        return
+    exclude = (exclude or set()) | prefetch.ids()
+    _ranked[:] = [v for v in _ranked if v["id"] not in exclude]
+    if len(_ranked) < slots:
+        found = discover_candidates(
+            limit=max(slots, settings.ANALYSIS_BATCH_SIZE),
+            exclude=exclude | {v["id"] for v in _ranked},
+        )
+        _ranked[:] = analyze_candidates(_ranked + found)
+    offered, _ranked[:] = _ranked[:slots], _ranked[slots:]
+    prefetch.offer(offered)
+
+
+def next_candidate(exclude: set = None) -> Optional[dict]:
+    """Next candidate to render, preferring sources already downloaded."""
+    top_up_prefetch(exclude)
+    return prefetch.next(exclude)
 
 
 # ---------------------------------------------------------------------------
 # VIDEO DETAILS
 # ---------------------------------------------------------------------------
+_details = {}   # video_id → details (one videos.list per 50 IDs per run)
+
+
 def get_video_details(video_id: str) -> Optional[dict]:
     """Get title, description, duration, stats."""
-    try:
-        response = (
-            youtube.videos()
-            .list(part="snippet,contentDetails,statistics", id=video_id)
-            .execute()
-        )
-        if not response.get("items"):
-            return None
+    return get_videos_details([video_id]).get(video_id)
 
-        item = response["items"][0]
-        iso_dur = item["contentDetails"]["duration"]
-        duration_seconds = _parse_iso_duration(iso_dur)
 
-        return {
-            "title": item["snippet"]["title"],
-            "description": item["snippet"]["description"][:2000],
-            "duration_iso": iso_dur,
-            "duration_seconds": duration_seconds,
-            "views": item["statistics"].get("viewCount", "0"),
-            "likes": item["statistics"].get("likeCount", "0"),
-            "tags": item["snippet"].get("tags", []),
-            "language": item["snippet"].get("defaultLanguage", "en"),
-        }
-    except Exception as e:
-        logger.error(f"❌ Error getting video details: {e}")
-        return None
+def get_videos_details(video_ids: list, fresh: bool = False) -> dict:
+    """
+    Details for many videos, batched 50 IDs per videos.list call. `fresh`
+    refetches memoized ones (current statistics) and raises when the API
+    can't be reached instead of returning what it has.
+    """
+    missing = [v for v in dict.fromkeys(video_ids) if fresh or v not in _details]
+    youtube = youtube_service() if missing else None
+    if missing and not youtube and fresh:
+        raise RuntimeError("no YouTube client")
+    for i in range(0, len(missing) if youtube else 0, 50):
+        try:
+            response = (
+                youtube.videos()
+                .list(part="snippet,contentDetails,statistics",
+                      id=",".join(missing[i:i + 50]), maxResults=50)
+                .execute()
+            )
+        except Exception as e:
+            if fresh:
+                raise
+            logger.error(f"❌ Error getting video details: {e}")
+            continue
+
+        for item in response.get("items", []):
+            iso_dur = item["contentDetails"]["duration"]
+            _details[item["id"]] = {
+                "title": item["snippet"]["title"],
+                "description": item["snippet"]["description"][:2000],
+                "duration_iso": iso_dur,
+                "duration_seconds": _parse_iso_duration(iso_dur),
+                "views": item["statistics"].get("viewCount", "0"),
+                "likes": item["statistics"].get("likeCount", "0"),
+                "comments": item["statistics"].get("commentCount", "0"),
+                "published_at": item["snippet"].get("publishedAt", ""),
+                "tags": item["snippet"].get("tags", []),
+                "language": item["snippet"].get("defaultLanguage", "en"),
+                "live": item["snippet"].get("liveBroadcastContent", "none"),
+                "caption": item["contentDetails"].get("caption") == "true",
+                "projection": item["contentDetails"].get("projection", "rectangular"),
+                "dimension": item["contentDetails"].get("dimension", "2d"),
+                "content_rating": item["contentDetails"].get("contentRating", {}),
+                "region_restriction": item["contentDetails"].get("regionRestriction", {}),
+            }
+    return {v: _details[v] for v in video_ids if v in _details}
+
+
+def _signal_index(details: dict) -> float:
+    """Views/hour since publishing, weighted by like and comment rates."""
+    views = int(details.get("views") or 0)
+    likes = int(details.get("likes") or 0)
+    comments = int(details.get("comments") or 0)
+    try:
+        published = datetime.strptime(details["published_at"], "%Y-%m-%dT%H:%M:%SZ")
+        hours = max(1.0, (datetime.utcnow() - published).total_seconds() / 3600)
+    except (KeyError, ValueError):
+        hours = settings.LOOKBACK_DAYS * 24
+    engagement = (likes + 5 * comments) / views if views else 0.0
+    return round(views / hours * (1 + 10 * engagement), 1)
 
 
 def _parse_iso_duration(iso: str) -> int:
@@ -243,123 +574,144 @@ def _parse_iso_duration(iso: str) -> int:
 # ---------------------------------------------------------------------------
 # DOWNLOAD VIDEO with yt-dlp
 # ---------------------------------------------------------------------------
-def download_full_video(youtube_url: str) -> Optional[str]:
+def download_full_video(youtube_url: str) -> str:
     """
-    Download the full video locally with yt-dlp.
-
-    Strategy (in order):
-    1. iOS client — bypasses YouTube bot checks on datacenter IPs (no cookies needed)
-    2. android_vr client — alternative bypass
-    3. web_creator client — fallback
-    Each attempt with cookies if available, then without.
+    Download the full video locally with yt-dlp (in-process).
+    Raises PipelineFailure (BOT_BLOCK / DOWNLOAD_FAILED) on failure.
     """
-    logger.info(f"📥 Downloading: {youtube_url}")
+    return downloader.download(youtube_url)
 
-    output_path = str(settings.TEMP_DIR / "source_%(id)s.%(ext)s")
 
-    # Player clients to try — iOS bypasses bot checks on CI IPs
-    player_clients = ["ios", "android_vr", "web_creator"]
+def _source_key(video_id: str) -> str:
+    return artifacts.key(video_id, "source", {"format": DOWNLOAD_FORMAT})
 
-    base_cmd = [
-        "yt-dlp",
-        "-f", "bestvideo[height<=1080][ext=mp4]+bestaudio[ext=m4a]/best[height<=1080][ext=mp4]/best[ext=mp4]/best",
-        "--merge-output-format", "mp4",
-        "-o", output_path,
-        "--no-playlist",
-        "--no-check-certificates",
-    ]
 
-    # Write cookie file once if available
-    cookie_file_path = None
-    cookies_content = os.environ.get("YOUTUBE_COOKIES", "")
-    if cookies_content:
-        try:
-            cookie_file = tempfile.NamedTemporaryFile(
-                mode="w", suffix=".txt", delete=False, encoding="utf-8"
-            )
-            if not cookies_content.strip().startswith("# Netscape HTTP Cookie File"):
-                cookie_file.write("# Netscape HTTP Cookie File\n")
-            cookie_file.write(cookies_content)
-            cookie_file.flush()
-            cookie_file.close()
-            cookie_file_path = cookie_file.name
-        except Exception as e:
-            logger.warning(f"⚠️ Could not write cookie file: {e}")
+def fetch_source(video_data: dict) -> str:
+    """Cached source path, downloading it if needed (prefetch-safe)."""
+    source_key = _source_key(video_data["id"])
+    source_path = artifacts.get(source_key)
+    if not source_path:
+        downloaded = download_full_video(video_data["url"])
+        source_path = artifacts.put(source_key, downloaded, move=True)
+    return source_path
 
-    def _run(client: str, use_cookies: bool) -> Optional[str]:
-        cmd = list(base_cmd) + [
-            "--extractor-args", f"youtube:player_client={client}",
-        ]
-        if use_cookies and cookie_file_path:
-            cmd.extend(["--cookies", cookie_file_path])
-        cmd.append(youtube_url)
 
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-            if result.returncode != 0:
-                err = result.stderr
-                if use_cookies and "cookies are no longer valid" in err:
-                    return "EXPIRED_COOKIES"
-                if "Sign in to confirm" in err or "bot" in err.lower():
-                    return "BOT_BLOCK"
-                logger.warning(f"  ⚠️ [{client}] failed: {err[:200]}")
-                return None
-
-            for f in settings.TEMP_DIR.glob("source_*"):
-                logger.info(f"✅ Downloaded: {f.name} (client={client})")
-                return str(f)
-            return None
-        except Exception as e:
-            logger.warning(f"  ⚠️ [{client}] exception: {e}")
-            return None
+def fetch_proxy(video_data: dict) -> Optional[str]:
+    """
+    Low-res analysis proxy (cached), or None to analyse the full source.
+
+    Derived from the full source when it is already local, otherwise
+    fetched as a small stream so a candidate can be judged (and
+    rejected) before its full-quality download is needed.
+    """
+    mode = settings.PROXY_MODE
+    if mode == "off":
+        return None
+
+    video_id = video_data["id"]
+    proxy_key = artifacts.key(video_id, "proxy", {"height": settings.PROXY_HEIGHT})
+    proxy_path = artifacts.get(proxy_key)
+    if proxy_path:
+        return proxy_path
 
     try:
-        for client in player_clients:
-            logger.info(f"  🎯 Trying player client: {client}")
-
-            # Try with cookies first if available
-            if cookie_file_path:
-                res = _run(client, use_cookies=True)
-                if res == "EXPIRED_COOKIES":
-                    logger.warning("🍪 Cookies expired, skipping cookies for all clients")
-                    cookie_file_path = None  # disable for remaining attempts
-                    res = _run(client, use_cookies=False)
-            else:
-                res = _run(client, use_cookies=False)
+        source_path = artifacts.get(_source_key(video_id))
+        if not source_path and mode == "derive":
+            source_path = prefetch.source(video_data)
+        if source_path and mode in ("auto", "derive"):
+            out = str(settings.TEMP_DIR / "proxy.mp4")
+            ffmpeg.make_proxy(source_path, out, settings.PROXY_HEIGHT)
+            return artifacts.put(proxy_key, out, move=True)
+        if mode in ("auto", "fetch"):
+            downloaded = downloader.download(
+                video_data["url"], fmt=PROXY_FORMAT, tag="proxy"
+            )
+            return artifacts.put(proxy_key, downloaded, move=True)
+    except PipelineFailure:
+        raise
+    except Exception as e:
+        logger.warning(f"⚠️ No analysis proxy ({e}), using the full source")
+    return None
 
-            if res and res not in ("EXPIRED_COOKIES", "BOT_BLOCK"):
-                return res
 
-            if res != "BOT_BLOCK":
-                # Non-bot error — no point trying other clients
-                break
+def analysis_media(video_data: dict) -> str:
+    """File the analysis stages read: the proxy, else the full source."""
+    return fetch_proxy(video_data) or prefetch.source(video_data)
+
 
-        logger.error("❌ All player clients blocked by YouTube")
+# ---------------------------------------------------------------------------
+# PERCEPTUAL DEDUP (same moment re-uploaded under another video ID)
+# ---------------------------------------------------------------------------
+def check_duplicate(video_data: dict):
+    """
+    Fingerprint the analysis proxy and reject sources whose video matches
+    one we've already used or a short we've posted (audio alone is only
+    logged: shorts share sounds). Returns the fingerprint so it can be
+    indexed after upload (None when dedup is off).
+    """
+    if fingerprints is None:
         return None
-    finally:
-        if cookie_file_path:
-            try:
-                os.unlink(cookie_file_path)
-            except Exception:
-                pass
+    from utils.fingerprint import extract_fingerprint
+    fp = extract_fingerprint(
+        analysis_media(video_data), settings.FINGERPRINT_SECONDS, runner
+    )
+    match = fingerprints.lookup(fp, exclude=(video_data["id"],))
+    if match and match["video"] is None:
+        # Same sound, different pictures: trending audio, not a re-upload
+        logger.info(
+            f"🎵 {video_data['id']} shares audio with {match['kind']} {match['id']} "
+            f"(audio {match['audio']}, {match['overlap']}s), keeping it"
+        )
+    elif match:
+        logger.warning(
+            f"🧬 {video_data['id']} duplicates {match['kind']} {match['id']} "
+            f"(video {match['video']}, audio {match['audio']}, "
+            f"{match['overlap']}s at {match['offset']:+d}s)"
+        )
+        raise PipelineFailure(FailureCause.DUPLICATE, f"Duplicate of {match['id']}")
+    return fp
+
+
+def remember_fingerprints(source_id: str, upload_id: str, rendered: dict):
+    """Index the source we used and the short we posted (best effort)."""
+    if fingerprints is None:
+        return
+    from utils.fingerprint import extract_fingerprint
+    try:
+        fingerprints.add(source_id, rendered.get("fingerprint"), kind="source", save=False)
+        fingerprints.add(
+            upload_id,
+            extract_fingerprint(rendered["final_path"], settings.FINGERPRINT_SECONDS, runner),
+            kind="upload", save=False,
+        )
+        fingerprints.save()
+    except Exception as e:
+        logger.warning(f"⚠️ Could not index fingerprints of {upload_id}: {e}")
 
 
 # ---------------------------------------------------------------------------
 # ANALYZE WITH GEMINI (v20: enhanced with transcript analysis)
 # ---------------------------------------------------------------------------
-def analyze_video(video_data: dict, source_path: str) -> Optional[dict]:
+def analyze_video(video_data: dict, source_key: str = None) -> Optional[dict]:
     """Use Gemini to identify the best viral clip + generate SEO metadata."""
     logger.info("🧠 Gemini analyzing video...")
 
     details = get_video_details(video_data["id"])
     if not details:
-        return None
+        raise PipelineFailure(FailureCause.UNAVAILABLE, "No video details")
 
     duration_secs = details["duration_seconds"]
+    if duration_secs < prefilters.min_source_seconds(details):
+        # Missed by the prefilter (details unresolved at discovery): the
+        # intro skip plus a 15s minimum clip cannot fit
+        raise PipelineFailure(
+            FailureCause.TOO_SHORT, f"Source is only {duration_secs}s"
+        )
+    vertical_short = is_vertical_short(details)
     is_english = settings.LANG_MODE in ("EN", "BOTH")
 
     # Get transcript if available (via yt-dlp subtitles or Whisper)
-    transcript_text = subtitles.extract_transcript(source_path)
+    transcript_text = _cached_transcript(video_data, source_key)
 
     prompt = f"""
 You are an ELITE viral content strategist and video editor for TikTok/YouTube Shorts/Reels.
@@ -371,6 +723,7 @@ VIDEO INFO:
 - Views: {details['views']}
 - Likes: {details['likes']}
 - Duration: {details['duration_iso']} ({duration_secs}s total)
+- Format: {"already a vertical short (no intro to skip)" if vertical_short else "regular video"}
 - Description: {details['description'][:500]}
 - Tags: {', '.join(details.get('tags', [])[:10])}
 {f'- Transcript excerpt: {transcript_text[:1500]}' if transcript_text else ''}
@@ -382,7 +735,7 @@ YOUR TASK:
 4. Generate VIRAL metadata optimized for maximum CTR and engagement
 
 CONSTRAINTS:
-- start_time >= 15 (skip intros)
+- start_time >= {0 if vertical_short else 15} ({"keep the opening, it is the hook" if vertical_short else "skip intros"})
 - end_time <= {duration_secs} (video length)
 - Clip duration: 15-58 seconds
 - viral_title: 2-5 words, MAXIMUM clickbait energy, use power words
@@ -406,6 +759,24 @@ Respond ONLY with valid JSON:
 }}
 """
 
+    result = _gemini_json(prompt)
+    if not isinstance(result, dict):
+        return None
+    result = _normalize_analysis(result, duration_secs, 0.0 if vertical_short else 15.0)
+    logger.info(
+        f"✅ Gemini OK: '{result['viral_title']}' "
+        f"({result['start_time']}s–{result['end_time']}s) "
+        f"Energy: {result['energy_level']}"
+    )
+    return result
+
+
+def _gemini_json(prompt: str):
+    """Run a JSON-mode prompt through the first Gemini model that answers."""
+    client_gemini = gemini_client()
+    if not client_gemini:
+        return None
+
     # Try multiple Gemini models
     try:
         available = [m.name for m in client_gemini.models.list()]
@@ -424,39 +795,7 @@ Respond ONLY with valid JSON:
                 contents=prompt,
                 config={"response_mime_type": "application/json"},
             )
-            result = json.loads(resp.text)
-
-            # Validate and clamp clip times
-            start = max(15.0, float(result.get("start_time", 20)))
-            end = min(float(duration_secs), float(result.get("end_time", 78)))
-
-            if end - start < 15:
-                end = start + 30
-            if end - start > 58:
-                end = start + 58
-            if end > duration_secs:
-                end = float(duration_secs)
-            if end - start < 10:
-                start = min(30.0, duration_secs * 0.2)
-                end = start + 45.0
-
-            result["start_time"] = round(start, 1)
-            result["end_time"] = round(end, 1)
-
-            # Ensure all required fields exist
-            result.setdefault("hook_text", "WAIT FOR IT... 🤯")
-            result.setdefault("description", f"🔥 {result.get('viral_title', 'Epic moment')} #shorts #viral")
-            result.setdefault("tags", ["#shorts", "#viral", "#trending"])
-            result.setdefault("energy_level", "high")
-            result.setdefault("suggested_effects", ["zoom_pulse"])
-
-            logger.info(
-                f"✅ Gemini OK: '{result['viral_title']}' "
-                f"({result['start_time']}s–{result['end_time']}s) "
-                f"Energy: {result['energy_level']}"
-            )
-            return result
-
+            return json.loads(resp.text)
         except Exception as e:
             logger.warning(f"⚠️ Model '{clean}' failed: {e}")
             continue
@@ -465,173 +804,462 @@ Respond ONLY with valid JSON:
     return None
 
 
+def _normalize_analysis(result: dict, duration_secs: float,
+                        min_start: float = 15.0) -> dict:
+    """
+    Clamp clip times to the source and fill in missing fields. `min_start`
+    is the intro to skip (0 for sources that are already shorts).
+    """
+    start = max(min_start, float(result.get("start_time", min_start + 5)))
+    end = min(float(duration_secs), float(result.get("end_time", 78)))
+
+    if end - start < 15:
+        end = start + 30
+    if end - start > 58:
+        end = start + 58
+    if end > duration_secs:
+        end = float(duration_secs)
+    if end - start < 10:
+        start = min(30.0, duration_secs * 0.2) if min_start else 0.0
+        end = min(start + 45.0, float(duration_secs))
+
+    result["start_time"] = round(start, 1)
+    result["end_time"] = round(end, 1)
+
+    # Ensure all required fields exist
+    result.setdefault("viral_title", "Epic moment")
+    result.setdefault("hook_text", "WAIT FOR IT... 🤯")
+    result.setdefault("description", f"🔥 {result.get('viral_title', 'Epic moment')} #shorts #viral")
+    result.setdefault("tags", ["#shorts", "#viral", "#trending"])
+    result.setdefault("energy_level", "high")
+    result.setdefault("suggested_effects", ["zoom_pulse"])
+    return result
+
+
+def _analysis_key(video_id: str) -> str:
+    return artifacts.key(
+        video_id, "analysis", {"lang": settings.LANG_MODE},
+        parent=_source_key(video_id),
+    )
+
+
+def analyze_candidates(candidates: list) -> list:
+    """
+    Rank candidates with one Gemini call for the whole batch.
+
+    Each candidate is summarised (metadata, cached transcript snippet,
+    signal index); the clip proposals that come back are cached per video
+    under the same key process_video reads, so no further LLM call is
+    needed for them. Returns the usable candidates, best first.
+    """
+    details = get_videos_details([v["id"] for v in candidates])
+    scored, pending = [], []
+    for video_data in candidates:
+        d = details.get(video_data["id"])
+        if not d:
+            # Not resolvable right now; analyze_video decides later
+            scored.append((0, video_data))
+            continue
+        cached = artifacts.get_json(_analysis_key(video_data["id"]))
+        if cached:
+            scored.append((cached.get("viral_score", 0), video_data))
+        else:
+            pending.append((video_data, d))
+
+    for i in range(0, len(pending), settings.ANALYSIS_BATCH_SIZE):
+        scored += _analyze_batch(pending[i:i + settings.ANALYSIS_BATCH_SIZE])
+
+    # Gemini's score decides; momentum breaks ties and orders unscored ones
+    scored.sort(key=lambda x: (
+        -x[0], -(x[1].get("trend") or {}).get("momentum", 0.0)
+    ))
+    return [video_data for _, video_data in scored]
+
+
+def _analyze_batch(batch: list) -> list:
+    """One structured prompt for [(video_data, details)] → [(score, video_data)]."""
+    is_english = settings.LANG_MODE in ("EN", "BOTH")
+    summaries = []
+    for video_data, d in batch:
+        transcript = artifacts.get_json(artifacts.key(
+            video_data["id"], "transcript", {"model": settings.WHISPER_MODEL},
+            parent=_source_key(video_data["id"]),
+        )) or {}
+        summaries.append({
+            "video_id": video_data["id"],
+            "title": d["title"],
+            "channel": video_data["channel"],
+            "niche": video_data["niche"],
+            "duration_seconds": d["duration_seconds"],
+            "vertical_short": is_vertical_short(d),
+            "views": d["views"],
+            "likes": d["likes"],
+            "signal_index": _signal_index(d),
+            "momentum": (video_data.get("trend") or {}).get("momentum"),
+            "description": d["description"][:200],
+            "tags": d.get("tags", [])[:5],
+            "transcript": transcript.get("text", "")[:300],
+        })
+
+    logger.info(f"🧠 Gemini ranking {len(batch)} candidates in one call...")
+    prompt = f"""
+You are an ELITE viral content strategist and video editor for TikTok/YouTube Shorts/Reels.
+
+CANDIDATES (signal_index = lifetime views/hour weighted by engagement;
+momentum = the same, measured over recent runs and projected a few hours ahead,
+null if not tracked yet — high momentum means the video is trending NOW;
+vertical_short = the source is already a vertical short with no intro):
+{json.dumps(summaries, ensure_ascii=False, indent=1)}
+
+YOUR TASK, for EVERY candidate:
+1. Score its viral potential as a short (viral_score 0-100)
+2. Identify the SINGLE most viral-worthy moment (15-58 seconds)
+3. The clip MUST have a strong HOOK in the first 2-3 seconds
+4. Skip intros/outros/sponsor segments (avoid first 15-30s and last 15s)
+5. Generate VIRAL metadata optimized for maximum CTR and engagement
+
+CONSTRAINTS:
+- start_time >= 15 (skip intros), or >= 0 when vertical_short is true
+- end_time <= the candidate's duration_seconds
+- Clip duration: 15-58 seconds
+- viral_title: 2-5 words, MAXIMUM clickbait energy, use power words
+- hook_text: 5-8 words shown in first 3 seconds (pattern interrupt)
+- description: 150-300 chars, SEO-optimized with emojis and CTA
+- tags: 8-12 relevant hashtags for discovery
+
+{"Write ALL text in ENGLISH for global reach and higher CPM." if is_english else "Write in SPANISH for Hispanic market."}
+
+Respond ONLY with a valid JSON array, one object per candidate:
+[{{
+    "video_id": "<candidate video_id>",
+    "viral_score": <0-100>,
+    "start_time": <seconds>,
+    "end_time": <seconds>,
+    "viral_title": "<clickbait title>",
+    "hook_text": "<attention-grabbing overlay text>",
+    "description": "<SEO description with emojis and CTA>",
+    "tags": ["#tag1", "#tag2", ...],
+    "summary": "<why this moment will go viral>",
+    "energy_level": "<low|medium|high|extreme>",
+    "suggested_effects": ["zoom_pulse", "shake", "speed_ramp"]
+}}, ...]
+"""
+    results = _gemini_json(prompt)
+    if isinstance(results, dict):
+        results = results.get("candidates", [])
+    by_id = {r.get("video_id"): r for r in results or [] if isinstance(r, dict)}
+
+    scored = []
+    for video_data, d in batch:
+        result = by_id.get(video_data["id"])
+        if not result:
+            # Left for a single-video analysis when it comes up
+            scored.append((0, video_data))
+            continue
+        try:
+            result = _normalize_analysis(
+                result, d["duration_seconds"], 0.0 if is_vertical_short(d) else 15.0
+            )
+            score = float(result.get("viral_score") or 0)
+        except (TypeError, ValueError):
+            scored.append((0, video_data))
+            continue
+        result["viral_score"] = score
+        artifacts.put_json(_analysis_key(video_data["id"]), result)
+        scored.append((score, video_data))
+    logger.info(f"✅ Batch analysis: {len(by_id)}/{len(batch)} proposals cached")
+    return scored
+
+
+def _cached_transcript(video_data: dict, source_key: str = None) -> str:
+    """Transcribe the source (via its proxy) once and reuse it across retries."""
+    key = artifacts.key(
+        video_data["id"], "transcript", {"model": settings.WHISPER_MODEL},
+        parent=source_key,
+    )
+    cached = artifacts.get_json(key)
+    if cached is not None:
+        return cached.get("text", "")
+
+    text = subtitles.extract_transcript(analysis_media(video_data))
+    if text:
+        artifacts.put_json(key, {"text": text})
+    return text
+
+
 # ---------------------------------------------------------------------------
 # FULL PIPELINE: Download → Cut → Edit → Subtitle → Thumbnail → Upload
 # ---------------------------------------------------------------------------
-def process_video(video_data: dict) -> Optional[str]:
+def process_video(video_data: dict) -> dict:
     """
-    Complete processing pipeline:
-    1. Download full video
-    2. Analyze with Gemini
+    Complete render pipeline (upload is queued separately):
+    0. Perceptual dedup against used sources and posted shorts (proxy)
+    1. Analyze with Gemini (on a low-res proxy)
+    2. Full-quality source (prefetched in background)
     3. Cut clip segment
     4. Smart vertical crop (face detection)
     5. Add originality effects (zoom, speed ramps, color grading)
     6. Generate & burn subtitles
-    7. Add hook text overlay
+    7. Export platform variants with hook overlay (one decode)
     8. Generate thumbnail
-    9. Upload to YouTube Shorts
+
+    Returns the finished short (paths + analysis) ready for upload.
+    Raises PipelineFailure with the cause of any failure.
     """
-    source_path = None
-    try:
-        # Step 1: Download
-        source_path = download_full_video(video_data["url"])
-        if not source_path:
-            return None
+    video_id = video_data["id"]
+    with runner.recording() as runs:
+        try:
+            # Step 0: Perceptual dedup on the low-res proxy, before the
+            # full-quality source is needed
+            fingerprint = check_duplicate(video_data)
+
+            # Step 1: Analyze (cached so a retry re-cuts the same clip);
+            # reads only the proxy, so rejects never need the full source
+            source_key = _source_key(video_id)
+            analysis_key = _analysis_key(video_id)
+            analysis = artifacts.get_json(analysis_key)
+            if not analysis:
+                analysis = analyze_video(video_data, source_key)
+                if not analysis:
+                    raise PipelineFailure(FailureCause.GEMINI_FAILURE, "No analysis")
+                artifacts.put_json(analysis_key, analysis)
+
+            # Step 2: Full-quality source for the render (prefetched, cached
+            # or downloaded now)
+            source_path = prefetch.source(video_data)
+
+            # Steps 3-8: the edit itself
+            rendered = render_short(video_id, source_path, source_key, analysis)
+            rendered["stage_metrics"] = runner.summarize(runs)
+            rendered["fingerprint"] = fingerprint
+            return rendered
+
+        except PipelineFailure as e:
+            logger.error(f"❌ Pipeline failed [{e.cause}]: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"❌ Pipeline error: {e}", exc_info=True)
+            raise PipelineFailure(FailureCause.RENDER_FAILURE, str(e)) from e
+        finally:
+            # Cleanup temp files
+            _cleanup_temp()
+            _log_stage_metrics(runs)
 
-        # Step 2: Analyze
-        analysis = analyze_video(video_data, source_path)
-        if not analysis:
-            return None
 
-        start = analysis["start_time"]
-        end = analysis["end_time"]
-        duration = end - start
-
-        # Step 3: Cut clip
-        logger.info(f"✂️ Cutting clip: {start}s → {end}s ({duration:.1f}s)")
-        clip_path = str(settings.TEMP_DIR / "clip.mp4")
-        ffmpeg.cut_segment(source_path, clip_path, start, end)
-
-        # Step 4: Smart vertical crop with face detection
-        logger.info("👤 Smart vertical crop...")
-        cropped_path = str(settings.TEMP_DIR / "cropped.mp4")
-        ffmpeg.smart_vertical_crop(clip_path, cropped_path)
-
-        # Step 5: Originality effects
-        logger.info("🎨 Adding originality effects...")
-        effects_path = str(settings.TEMP_DIR / "effects.mp4")
-        originality.apply_effects(
-            cropped_path, effects_path,
-            energy=analysis.get("energy_level", "high"),
-            effects=analysis.get("suggested_effects", []),
+def render_short(video_id: str, source_path: str, source_key: str,
+                 analysis: dict) -> dict:
+    """
+    Cut, crop, effects, subtitles, exports and thumbnail for one analysed
+    source. Every stage is cached under `source_key`.
+    """
+    # Probed once; every stage below gets its shape passed down
+    source_info = runner.probe(source_path)
+
+    start = analysis["start_time"]
+    end = analysis["end_time"]
+    if source_info and start < source_info.duration < end:
+        logger.warning(f"⚠️ Clip end {end}s past source end, clamping")
+        end = source_info.duration
+    duration = end - start
+    src_height = source_info.height if source_info else None
+
+    # Step 3: Cut clip
+    logger.info(f"✂️ Cutting clip: {start}s → {end}s ({duration:.1f}s)")
+    clip_key = artifacts.key(
+        video_id, "clip", {"start": start, "end": end}, parent=source_key
+    )
+    clip_path = _render_stage(
+        clip_key, "clip.mp4",
+        lambda out: ffmpeg.cut_segment(source_path, out, start, end),
+        duration=duration, height=src_height,
+    )
+
+    # Step 4: Smart vertical crop with face detection
+    logger.info("👤 Smart vertical crop...")
+    cropped_key = artifacts.key(
+        video_id, "cropped",
+        {"width": ffmpeg.width, "height": ffmpeg.height}, parent=clip_key,
+    )
+    cropped_path = _render_stage(
+        cropped_key, "cropped.mp4",
+        lambda out: ffmpeg.smart_vertical_crop(clip_path, out, info=source_info),
+        duration=duration, height=src_height,
+    )
+
+    # Step 5: Originality effects
+    logger.info("🎨 Adding originality effects...")
+    energy = analysis.get("energy_level", "high")
+    effects = analysis.get("suggested_effects", [])
+    effects_key = artifacts.key(
+        video_id, "effects", {"energy": energy, "effects": effects},
+        parent=cropped_key,
+    )
+    effects_path = _render_stage(
+        effects_key, "effects.mp4",
+        lambda out: originality.apply_effects(
+            cropped_path, out, energy=energy, effects=effects,
+        ),
+        duration=duration, height=ffmpeg.height,
+    )
+
+    # Step 6: Generate & burn subtitles
+    logger.info("📝 Generating subtitles...")
+    subtitled_key = artifacts.key(
+        video_id, "subtitled", {"model": settings.WHISPER_MODEL},
+        parent=effects_key,
+    )
+    subtitled_path = _render_stage(
+        subtitled_key, "subtitled.mp4",
+        lambda out: subtitles.burn_subtitles(effects_path, out),
+        duration=duration, height=ffmpeg.height,
+    )
+
+    # Step 7: Platform exports (hook overlay in each safe area)
+    logger.info("📦 Exporting platform variants...")
+    hook_text = analysis.get("hook_text", "")
+    exports = _export_stage(
+        video_id, subtitled_key, subtitled_path, hook_text, duration
+    )
+    upload_platform = "youtube_shorts" if "youtube_shorts" in exports else next(iter(exports))
+    final_path = exports[upload_platform]
+    final_key = _export_key(video_id, subtitled_key, hook_text, upload_platform)
+
+    # Step 8: Generate thumbnail
+    logger.info("🖼️ Generating thumbnail...")
+    thumb_key = artifacts.key(
+        video_id, "thumbnail",
+        {"title": analysis["viral_title"], "energy": energy},
+        parent=final_key,
+    )
+    thumb_path = _render_stage(
+        thumb_key, "thumbnail.jpg",
+        lambda out: thumbnails.generate(
+            final_path, out, title=analysis["viral_title"], energy=energy,
+        ),
+        height=ffmpeg.height,
+    )
+
+    return {
+        "final_path": final_path,
+        "thumb_path": thumb_path,
+        "exports": exports,
+        "analysis": analysis,
+        "duration": duration,
+    }
+
+
+def _render_stage(key: str, filename: str, render, duration: float = None,
+                  height: int = None) -> str:
+    """
+    Return the cached artifact for a stage, or render and store it.
+    `duration`/`height` describe the stage input (spares its FFmpeg runs
+    a probe).
+    """
+    cached = artifacts.get(key)
+    if cached:
+        return cached
+
+    output_path = str(settings.TEMP_DIR / filename)
+    with runner.stage(Path(filename).stem, duration=duration, height=height):
+        render(output_path)
+    if not os.path.exists(output_path):
+        return output_path
+    return artifacts.put(key, output_path, move=True)
+
+
+def _log_stage_metrics(runs: list):
+    """One line per render stage: FFmpeg wall time, media speed, failures."""
+    for stage, m in runner.summarize(runs).items():
+        speed = f"{m['speed']:.2f}x" if m["speed"] else "n/a"
+        failed = f", {m['failures']} failed" if m["failures"] else ""
+        logger.info(
+            f"  📊 {stage}: {m['runs']} run(s), {m['wall_s']:.1f}s wall, "
+            f"speed {speed}{failed}"
         )
 
-        # Step 6: Generate & burn subtitles
-        logger.info("📝 Generating subtitles...")
-        subtitled_path = str(settings.TEMP_DIR / "subtitled.mp4")
-        subtitles.burn_subtitles(effects_path, subtitled_path)
-
-        # Step 7: Hook text overlay
-        logger.info("🪝 Adding hook overlay...")
-        final_path = str(settings.TEMP_DIR / "final_short.mp4")
-        hook_text = analysis.get("hook_text", "")
-        ffmpeg.add_hook_overlay(subtitled_path, final_path, hook_text)
-
-        # Step 8: Generate thumbnail
-        logger.info("🖼️ Generating thumbnail...")
-        thumb_path = str(settings.TEMP_DIR / "thumbnail.jpg")
-        thumbnails.generate(
-            final_path, thumb_path,
-            title=analysis["viral_title"],
-            energy=analysis.get("energy_level", "high"),
-        )
 
-        # Step 9: Upload to YouTube Shorts
-        logger.info("🚀 Uploading to YouTube Shorts...")
-        yt_id = upload_to_youtube(
-            final_path, thumb_path, analysis, video_data
-        )
+def _export_key(video_id: str, parent: str, hook_text: str, platform: str) -> str:
+    return artifacts.key(
+        video_id, f"export_{platform}",
+        {"hook_text": hook_text, "hook_duration": settings.HOOK_DURATION,
+         "hook_style": exporter.hooks.style, "preset": exporter.PRESETS[platform]},
+        parent=parent,
+    )
 
-        if yt_id:
-            # Track analytics
-            analytics.log_upload(
-                video_id=yt_id,
-                source_id=video_data["id"],
-                source_channel=video_data["channel"],
-                niche=video_data["niche"],
-                title=analysis["viral_title"],
-                duration=duration,
-            )
-            return yt_id
 
-        return None
+def _export_stage(video_id: str, master_key: str, master_path: str,
+                  hook_text: str, duration: float = None) -> dict:
+    """
+    All platform variants ({platform: path}); only the missing ones are
+    encoded, together, from a single decode of the master.
+    """
+    keys = {
+        p: _export_key(video_id, master_key, hook_text, p)
+        for p in exporter.platforms
+    }
+    exports = {p: artifacts.get(k) for p, k in keys.items()}
+    missing = {
+        p: str(settings.TEMP_DIR / f"final_{p}.mp4")
+        for p, path in exports.items() if not path
+    }
+    if missing:
+        with runner.stage("export", height=ffmpeg.height):
+            exporter.export(master_path, missing, hook_text,
+                            hook_duration=settings.HOOK_DURATION, duration=duration)
+        for platform, out in missing.items():
+            exports[platform] = artifacts.put(keys[platform], out, move=True)
 
-    except Exception as e:
-        logger.error(f"❌ Pipeline error: {e}", exc_info=True)
-        return None
-    finally:
-        # Cleanup temp files
-        _cleanup_temp()
+    # Non-YouTube variants are handed off through EXPORT_DIR
+    settings.EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    for platform, path in exports.items():
+        if platform != "youtube_shorts":
+            shutil.copyfile(path, settings.EXPORT_DIR / f"{video_id}_{platform}.mp4")
+    return exports
 
 
 # ---------------------------------------------------------------------------
 # UPLOAD TO YOUTUBE SHORTS
 # ---------------------------------------------------------------------------
-def upload_to_youtube(
-    video_path: str, thumb_path: str, analysis: dict, video_data: dict = None
-) -> Optional[str]:
-    """Upload the processed short to YouTube."""
-    creds = get_youtube_credentials()
-    if not creds:
-        return None
-
-    try:
-        service = build("youtube", "v3", credentials=creds)
-
-        title = analysis["viral_title"][:100]
-        description = analysis.get("description", "")
-        tags_list = [t.replace("#", "") for t in analysis.get("tags", [])]
-
-        # Add standard tags
-        tags_list.extend(["shorts", "viral", "trending"])
-        tags_list = list(set(tags_list))[:30]  # YouTube max 30 tags
-
-        body = {
-            "snippet": {
-                "title": title,
-                "description": description,
-                "tags": tags_list,
-                "categoryId": "24",  # Entertainment
-            },
-            "status": {
-                "privacyStatus": "public",
-                "selfDeclaredMadeForKids": False,
-                "shorts": {"shortsAutoGenerate": True},
-            },
-        }
-
-        media = MediaFileUpload(
-            video_path, chunksize=10 * 1024 * 1024, resumable=True
-        )
-        request = service.videos().insert(
-            part="snippet,status", body=body, media_body=media
-        )
-
-        response = None
-        while response is None:
-            status, response = request.next_chunk()
-            if status:
-                logger.info(f"  📤 Upload progress: {int(status.progress() * 100)}%")
-
-        yt_id = response["id"]
-        logger.info(f"🎉 UPLOADED: https://youtube.com/shorts/{yt_id}")
-
-        # Set thumbnail if possible
-        try:
-            if os.path.exists(thumb_path):
-                service.thumbnails().set(
-                    videoId=yt_id,
-                    media_body=MediaFileUpload(thumb_path),
-                ).execute()
-                logger.info("🖼️ Custom thumbnail set!")
-        except Exception as e:
-            logger.warning(f"⚠️ Could not set thumbnail: {e}")
-
-        return yt_id
-
-    except Exception as e:
-        logger.error(f"❌ Upload error: {e}")
-        return None
+def build_upload_body(analysis: dict, publish_at: datetime = None) -> dict:
+    """
+    YouTube video resource (snippet + status) for a finished short.
+    With a future `publish_at` (UTC) it is uploaded private and YouTube
+    publishes it at that time.
+    """
+    title = analysis["viral_title"][:100]
+    description = analysis.get("description", "")
+    tags_list = [t.replace("#", "") for t in analysis.get("tags", [])]
+
+    # Add standard tags
+    tags_list.extend(["shorts", "viral", "trending"])
+    tags_list = list(dict.fromkeys(tags_list))[:30]  # YouTube max 30 tags
+
+    status = {
+        "privacyStatus": "public",
+        "selfDeclaredMadeForKids": False,
+        "shorts": {"shortsAutoGenerate": True},
+    }
+    if publish_at and publish_at > datetime.utcnow() + timedelta(minutes=1):
+        status["privacyStatus"] = "private"     # required for publishAt
+        status["publishAt"] = publish_at.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+    return {
+        "snippet": {
+            "title": title,
+            "description": description,
+            "tags": tags_list,
+            "categoryId": "24",  # Entertainment
+        },
+        "status": status,
+    }
+
+
+def upload_to_youtube(video_path: str, thumb_path: str,
+                      analysis: dict) -> Optional[str]:
+    """Upload the processed short to YouTube (blocking)."""
+    return youtube_uploader.upload(
+        video_path, thumb_path, build_upload_body(analysis)
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -666,44 +1294,503 @@ def main():
                 f"Shorts/run: {settings.SHORTS_PER_RUN}")
 
     total_success = 0
+    pending = []    # (upload future, video_data, rendered short)
+    in_flight = set()
+    refresh_upload_stats()
 
     for run in range(settings.SHORTS_PER_RUN):
         logger.info(f"\n{'='*60}")
         logger.info(f"📹 SHORT {run + 1}/{settings.SHORTS_PER_RUN}")
         logger.info(f"{'='*60}")
 
-        attempts = 0
-        success = False
-
-        while attempts < settings.MAX_ATTEMPTS and not success:
-            attempts += 1
-            logger.info(f"--- 🔄 Attempt {attempts}/{settings.MAX_ATTEMPTS} ---")
-
-            video_data = search_trending_video()
-            if not video_data:
-                logger.warning("No trending video found, retrying...")
-                continue
-
-            yt_id = process_video(video_data)
-
-            if yt_id:
-                cache.mark_processed(video_data["id"])
-                success = True
-                total_success += 1
-                logger.info(f"✅ Short {run + 1} complete: https://youtube.com/shorts/{yt_id}")
-            else:
-                cache.mark_failed(video_data["id"])
-                logger.warning(f"❌ Attempt {attempts} failed for {video_data['id']}")
-
-        if not success:
+        queued = produce_short(in_flight)
+        if queued:
+            pending.append(queued)
+            # Keep the next sources downloading while this one uploads
+            if run + 1 < settings.SHORTS_PER_RUN:
+                top_up_prefetch(exclude=in_flight)
+        else:
             logger.error(f"☠️ Short {run + 1}: all {settings.MAX_ATTEMPTS} attempts exhausted")
 
+    # Wait for queued uploads; a failed one gets a replacement short
+    while pending:
+        future, video_data, rendered = pending.pop(0)
+        if finish_upload(future.result(), video_data, rendered):
+            total_success += 1
+        else:
+            queued = replace_failed_upload(video_data, rendered, in_flight)
+            if queued:
+                pending.append(queued)
+    analytics.log_session(total_success, _session["attempts"])
+    shutdown()
+
     # Final report
     logger.info(f"\n{'='*60}")
     logger.info(f"📊 SESSION REPORT: {total_success}/{settings.SHORTS_PER_RUN} shorts uploaded")
     logger.info(f"{'='*60}")
     analytics.print_summary()
+    return total_success
+
+
+def produce_short(in_flight: set, publish_at: datetime = None) -> Optional[tuple]:
+    """
+    Render one short (up to MAX_ATTEMPTS candidates) and queue its upload.
+    Returns (upload future, video_data, rendered) or None.
+    """
+    for attempt in range(1, settings.MAX_ATTEMPTS + 1):
+        logger.info(f"--- 🔄 Attempt {attempt}/{settings.MAX_ATTEMPTS} ---")
+        _session["attempts"] += 1
+
+        video_data = next_candidate(exclude=in_flight)
+        if not video_data:
+            logger.warning("No trending video found, retrying...")
+            continue
+
+        # Its source and renders stay in the artifact store until the
+        # upload is finished (released in finish_upload)
+        artifacts.pin(video_data["id"])
+        try:
+            rendered = process_video(video_data)
+        except PipelineFailure as e:
+            artifacts.release(video_data["id"])
+            # Rejected before its source was needed: drop the prefetch
+            prefetch.discard(video_data["id"])
+            cache.mark_failed(video_data["id"], e.cause)
+            channels.observe(video_data["id"], e.cause)
+            logger.warning(f"❌ Attempt {attempt} failed for {video_data['id']}")
+            continue
+
+        # Upload in the background while the next short renders
+        logger.info("🚀 Queued upload to YouTube Shorts...")
+        rendered["publish_at"] = publish_at
+        future = youtube_uploader.submit(
+            rendered["final_path"], rendered["thumb_path"],
+            build_upload_body(rendered["analysis"], publish_at),
+        )
+        in_flight.add(video_data["id"])
+        return future, video_data, rendered
+    return None
+
+
+def finish_upload(yt_id: Optional[str], video_data: dict, rendered: dict) -> bool:
+    """Record the outcome of a queued upload."""
+    artifacts.release(video_data["id"])
+    if yt_id:
+        cache.mark_processed(video_data["id"])
+        channels.observe(video_data["id"], "processed")
+        analytics.log_upload(
+            video_id=yt_id,
+            source_id=video_data["id"],
+            source_channel=video_data["channel"],
+            niche=video_data["niche"],
+            title=rendered["analysis"]["viral_title"],
+            duration=rendered["duration"],
+            effects=effect_preset(
+                rendered["analysis"].get("energy_level"),
+                rendered["analysis"].get("suggested_effects"),
+            ),
+            publish_at=rendered.get("publish_at"),
+        )
+        remember_fingerprints(video_data["id"], yt_id, rendered)
+        logger.info(f"✅ Short complete: https://youtube.com/shorts/{yt_id}")
+        return True
+    # Final render stays in the artifact store → cheap retry later
+    cache.mark_failed(video_data["id"], FailureCause.UPLOAD_FAILURE)
+    logger.warning(f"❌ Upload failed for {video_data['id']}")
+    return False
+
+
+def replace_failed_upload(video_data: dict, rendered: dict,
+                          in_flight: set) -> Optional[tuple]:
+    """
+    Render the next candidate for a slot whose upload failed (uploads run
+    in the background, so the slot's attempt loop has already returned).
+    Once per slot, and only while today's quota can take another upload.
+    """
+    if rendered.get("replaces"):
+        return None
+    if quota.left() < QUOTA_COST["videos.insert"]:
+        logger.warning("🪫 No API quota left today for a replacement upload")
+        return None
+    logger.info(f"🔁 Upload of {video_data['id']} failed, rendering a replacement...")
+    queued = produce_short(in_flight, rendered.get("publish_at"))
+    if queued:
+        queued[2]["replaces"] = video_data["id"]
+    return queued
+
+
+_session = {"attempts": 0}     # candidates tried since start (for log_session)
+
+
+def refresh_upload_stats(force: bool = False) -> int:
+    """Pull our uploads' stats (50 IDs per call) every ANALYTICS_REFRESH_HOURS."""
+    if not force and not analytics.stats_due(settings.ANALYTICS_REFRESH_HOURS):
+        return 0
+    return analytics.refresh_stats(
+        lambda ids: get_videos_details(ids, fresh=True),
+        max_age_hours=0 if force else settings.ANALYTICS_REFRESH_HOURS,
+        recent_days=settings.ANALYTICS_STATS_DAYS,
+    )
+
+
+def publish_slots() -> list:
+    """
+    PUBLISH_SLOTS as (hour, minute) pairs; "auto" takes the AUTO_SLOTS
+    hours whose uploads drew the most views (defaults until measured).
+    """
+    from utils.daemon import parse_slots
+
+    if settings.PUBLISH_SLOTS.strip().lower() != "auto":
+        return parse_slots(settings.PUBLISH_SLOTS)
+    hours = analytics.best_hours(settings.AUTO_SLOTS)
+    if len(hours) < settings.AUTO_SLOTS:
+        return parse_slots(settings.DEFAULT_PUBLISH_SLOTS)
+    return sorted((hour, 0) for hour in hours)
+
+
+def shutdown():
+    """Wait for background work and release the workers that were started."""
+    prefetch.shutdown()
+    if is_built(youtube_uploader):
+        youtube_uploader.shutdown()
+    if is_built(downloader):
+        downloader.close()
+    if is_built(state):
+        state.flush()
+    if is_built(artifacts):
+        artifacts.flush()
+
+
+# ---------------------------------------------------------------------------
+# DAEMON (one warm process instead of a cold cron run per slot)
+# ---------------------------------------------------------------------------
+def run_daemon():
+    """
+    Serve the publish slots from one long-lived process: Whisper, clients,
+    caches and the ranked candidate pool stay loaded between jobs.
+    """
+    from utils.daemon import Daemon
+
+    pending = []    # (upload future, video_data, rendered short)
+    in_flight = set()
+    uploads = {"ok": 0, "failed": 0}
+
+    def reap(wait: bool = False):
+        for item in list(pending):
+            future, video_data, rendered = item
+            if wait or future.done():
+                pending.remove(item)
+                in_flight.discard(video_data["id"])
+                ok = finish_upload(future.result(), video_data, rendered)
+                uploads["ok" if ok else "failed"] += 1
+                if not ok and not wait and not daemon.stopping:
+                    queued = replace_failed_upload(video_data, rendered, in_flight)
+                    if queued:
+                        pending.append(queued)
+
+    def run_job(job) -> dict:
+        # Stats go stale between slots; analyses and sources stay cached
+        _details.clear()
+        if refresh_upload_stats():
+            daemon.replan(publish_slots())
+        attempts = _session["attempts"]
+        produced = []
+        for n in range(job.count):
+            if daemon.stopping:
+                break
+            logger.info(f"📹 Job #{job.id}: short {n + 1}/{job.count}")
+            queued = produce_short(in_flight, job.publish_at)
+            if queued:
+                pending.append(queued)
+                produced.append(queued[1]["id"])
+            reap()
+        if not daemon.stopping:
+            # Next slot's sources download while this one waits
+            top_up_prefetch(exclude=in_flight)
+        analytics.log_session(len(produced), _session["attempts"] - attempts)
+        state.flush()
+        artifacts.flush()
+        return {"shorts": len(produced), "sources": produced}
+
+    def on_stop():
+        reap(wait=True)
+        shutdown()
+        analytics.print_summary()
+
+    def gauges() -> dict:
+        return {
+            "uploads_ok": uploads["ok"],
+            "uploads_failed": uploads["failed"],
+            "uploads_pending": len(pending),
+            "prefetch_queued": len(prefetch.ids()),
+            "ranked_candidates": len(_ranked),
+        }
+
+    daemon = Daemon(
+        run_job,
+        publish_slots(),
+        shorts_per_slot=settings.SHORTS_PER_SLOT,
+        lead_minutes=settings.PUBLISH_LEAD_MINUTES,
+        idle=reap, on_stop=on_stop, gauges=gauges,
+        host=settings.DAEMON_HOST, port=settings.DAEMON_PORT,
+        max_job_shorts=settings.SHORTS_PER_RUN,
+    )
+    daemon.serve_forever()
+    return uploads["ok"]
+
+
+# ---------------------------------------------------------------------------
+# OFFLINE RUNS (--dry-run / --bench): every backend replaced by a local fake
+# ---------------------------------------------------------------------------
+_fake_backends = {}
+
+
+def use_fake_backends(sources: list = None, latency: float = 0.2,
+                      bandwidth_mb: float = 0.0):
+    """
+    Swap YouTube, Gemini, yt-dlp and the upload endpoint for local fakes.
+    State, artifacts and exports go to a scratch directory so an offline
+    run never touches the bot's real state.
+    """
+    global state, cache, analytics, quota, trends, channels, prefilters, artifacts
+    global downloader, fingerprints
+    global youtube_clients, youtube_uploader, _gemini
+    from utils.fake_upload_server import FakeUploadServer
+    from utils.resumable_upload import ResumableUploader, UploadSessionStore
+    from utils.uploader import YouTubeUploader
+    from utils.fakes import (
+        FakeCredentials, FakeGeminiClient, FakeServiceFactory,
+        FakeYouTubeService, Latency, LocalDownloader,
+    )
+
+    if not sources:
+        from benchmarks.render_bench import make_source
+        sources = [make_source("16:9", "720p", 180), make_source("9:16", "1080p", 120)]
+
+    scratch = Path(tempfile.mkdtemp(prefix="youtyann-dry-"))
+    logger.info(f"🧪 Offline backends (latency {latency}s), scratch: {scratch}")
+    settings.EXPORT_DIR = scratch / "exports"
+    state = StateStore(scratch / "youtyann.db")
+    cache = CacheManager(state)
+    analytics = AnalyticsTracker(state)
+    quota = QuotaLedger(state, settings.YOUTUBE_QUOTA_UNITS)
+    trends = Lazy(_trends)
+    channels = Lazy(_channels)
+    prefilters = Lazy(_prefilters)
+    artifacts = ArtifactStore(
+        scratch / "artifacts", max_bytes=int(settings.ARTIFACT_MAX_GB * 1024 ** 3)
+    )
+    if fingerprints is not None:
+        settings.FINGERPRINT_INDEX = scratch / "fingerprints.npz"
+        fingerprints = Lazy(_fingerprints)
+
+    api_latency = Latency(latency)
+    youtube = FakeYouTubeService(api_latency)
+    youtube_clients = FakeServiceFactory(youtube)
+    _gemini = FakeGeminiClient(Latency(latency * 10))
+    downloader = LocalDownloader(
+        sources, settings.TEMP_DIR / "downloads", Latency(latency),
+        bandwidth=bandwidth_mb * 1024 ** 2,
+    )
+    upload_server = FakeUploadServer(latency=latency).start()
+    youtube_uploader = YouTubeUploader(
+        FakeCredentials,
+        youtube_clients.authorized,
+        ResumableUploader(
+            UploadSessionStore(scratch / "upload_sessions.json"),
+            endpoint=upload_server.endpoint,
+            max_retries=settings.UPLOAD_MAX_RETRIES,
+        ),
+        quota,
+        max_workers=settings.UPLOAD_CONCURRENCY,
+    )
+    _fake_backends.update(
+        youtube=youtube, gemini=_gemini, downloader=downloader,
+        upload_server=upload_server, api_latency=api_latency, scratch=scratch,
+    )
+
+
+def bench_report(wall: float, uploaded: int) -> dict:
+    """Summary of an offline run (saved under benchmarks/results)."""
+    fakes = _fake_backends
+    report = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "wall_s": round(wall, 2),
+        "shorts_requested": settings.SHORTS_PER_RUN,
+        "shorts_uploaded": uploaded,
+        "settings": {
+            "prefetch_depth": settings.PREFETCH_DEPTH,
+            "prefetch_workers": settings.PREFETCH_WORKERS,
+            "upload_concurrency": settings.UPLOAD_CONCURRENCY,
+            "analysis_batch_size": settings.ANALYSIS_BATCH_SIZE,
+            "export_platforms": settings.EXPORT_PLATFORMS,
+        },
+        "calls": {
+            **fakes["youtube"].calls,
+            "gemini": fakes["gemini"].calls,
+            "downloads": fakes["downloader"].downloads,
+            "upload_requests": len(fakes["upload_server"].requests),
+        },
+        "injected_api_latency_s": round(fakes["api_latency"].total, 2),
+        "prefilter": prefilters.stats(),
+    }
+    out = settings.BASE_DIR / "benchmarks" / "results" / (
+        f"e2e_{datetime.utcnow():%Y%m%d_%H%M%S}.json"
+    )
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    logger.info(f"📊 Bench: {uploaded} shorts in {wall:.1f}s → {out}")
+    return report
+
+
+# ---------------------------------------------------------------------------
+# LOCAL RENDER (render <file>): the edit pipeline on a file, no APIs
+# ---------------------------------------------------------------------------
+def render_file(path: str, start: float = 0.0, end: float = None,
+                hook_text: str = "", title: str = None,
+                energy: str = "high") -> Optional[dict]:
+    """Render a short from a local video (stages cached like any source)."""
+    path = Path(path).resolve()
+    info = runner.probe(str(path))
+    if info is None:
+        logger.error(f"❌ Not a readable video: {path}")
+        return None
+    st = path.stat()
+    digest = hashlib.sha1(f"{path}|{st.st_size}|{st.st_mtime_ns}".encode()).hexdigest()
+    video_id = f"local-{digest[:11]}"
+    source_key = artifacts.key(
+        video_id, "source", {"file": str(path), "size": st.st_size}
+    )
+    analysis = {
+        "start_time": start,
+        "end_time": min(end or start + 58, info.duration),
+        "viral_title": title or path.stem,
+        "hook_text": hook_text,
+        "energy_level": energy,
+        "suggested_effects": [],
+    }
+    with runner.recording() as runs:
+        try:
+            return render_short(video_id, str(path), source_key, analysis)
+        finally:
+            _cleanup_temp()
+            _log_stage_metrics(runs)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+def cli(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="YoutYann viral shorts bot (default command: run)"
+    )
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Run end to end offline against local fake backends")
+    parser.add_argument("--bench", action="store_true",
+                        help="Same as the bench command")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Same as run --daemon")
+    parser.add_argument("--import-state", nargs="+", metavar="SNAPSHOT",
+                        help="Merge state snapshot(s) into the local state and exit")
+    parser.add_argument("--export-state", nargs="?", metavar="SNAPSHOT",
+                        const=str(settings.STATE_SNAPSHOT),
+                        help="Write the local state as a snapshot and exit")
+    parser.add_argument("--source", nargs="+", help="Local video(s) the fake downloader serves")
+    parser.add_argument("--latency", type=float, default=0.2,
+                        help="Injected latency per fake API call (seconds)")
+    parser.add_argument("--bandwidth", type=float, default=0.0,
+                        help="Simulated download speed in MB/s (0 = instant)")
+
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    run_cmd = commands.add_parser("run", help="Produce SHORTS_PER_RUN shorts")
+    run_cmd.add_argument("--daemon", dest="run_daemon", action="store_true",
+                         help="Stay running and publish at PUBLISH_SLOTS (UTC)")
+    discover_cmd = commands.add_parser("discover", help="List ranked candidates")
+    discover_cmd.add_argument("--limit", type=int, default=10)
+    discover_cmd.add_argument("--analyze", action="store_true",
+                              help="Also rank them with Gemini (caches the proposals)")
+    render_cmd = commands.add_parser("render", help="Render a short from a local file")
+    render_cmd.add_argument("file")
+    render_cmd.add_argument("--start", type=float, default=0.0)
+    render_cmd.add_argument("--end", type=float, help="Default: start + 58 s")
+    render_cmd.add_argument("--hook", default="", help="Hook overlay text")
+    render_cmd.add_argument("--title", help="Thumbnail title (default: file name)")
+    render_cmd.add_argument("--energy", default="high",
+                            choices=["low", "medium", "high", "extreme"])
+    stats_cmd = commands.add_parser("stats", help="Upload and cache statistics")
+    stats_cmd.add_argument("--json", action="store_true", help="Print as JSON")
+    stats_cmd.add_argument("--refresh", action="store_true",
+                           help="Pull the latest stats of our uploads first")
+    stats_cmd.add_argument("--export", metavar="DIR", type=Path,
+                           help="Write uploads and rollups as columnar files")
+    stats_cmd.add_argument("--format", default="csv", choices=["csv", "parquet"])
+    commands.add_parser("bench", help="Dry run + timing report in benchmarks/results")
+    args = parser.parse_args(argv)
+
+    if args.import_state or args.export_state:
+        for snapshot in args.import_state or ():
+            if Path(snapshot).exists():
+                import_snapshot(state, snapshot)
+            else:
+                logger.info(f"ℹ️ No state snapshot at {snapshot}, starting fresh")
+        if args.import_state:
+            analytics.rebuild()
+            channels.rebuild()
+        if args.export_state:
+            export_snapshot(state, args.export_state)
+        state.close()
+        return 0
+
+    command = args.command or ("bench" if args.bench else "run")
+    if command == "stats":
+        if args.refresh:
+            refresh_upload_stats(force=True)
+        if args.export:
+            analytics.export(args.export, args.format)
+        stats = {**cache.get_stats(), "uploads_by_niche": analytics.niche_counts()}
+        if args.json:
+            stats["rollups"] = {d: analytics.rollup(d) for d in ("niche", "channel", "hour", "effects")}
+            stats["channels"] = channels.report()
+            stats["prefilter"] = prefilters.stats()
+            print(json.dumps(stats, indent=2))
+        else:
+            analytics.print_summary()
+            logger.info(f"💾 Cache: {stats['processed']} processed, "
+                        f"{stats['failed']} failed {stats['failed_by_cause']}")
+        return 0
+
+    log_to_file()
+    if command == "render":
+        rendered = render_file(args.file, args.start, args.end, args.hook,
+                               args.title, args.energy)
+        if rendered:
+            print(json.dumps({k: rendered[k] for k in ("final_path", "thumb_path", "exports")},
+                             indent=2))
+        state.flush()
+        return 0 if rendered else 1
+
+    if args.dry_run or command == "bench":
+        use_fake_backends(args.source, args.latency, args.bandwidth)
+    try:
+        if command == "discover":
+            found = discover_candidates(limit=args.limit)
+            if args.analyze:
+                found = analyze_candidates(found)
+            for video_data in found:
+                print(json.dumps(video_data, ensure_ascii=False))
+            state.flush()
+            return 0
+
+        started = time.perf_counter()
+        daemon = args.daemon or getattr(args, "run_daemon", False)
+        uploaded = run_daemon() if daemon else main()
+        if command == "bench":
+            bench_report(time.perf_counter() - started, uploaded)
+        return 0
+    finally:
+        if _fake_backends:
+            _fake_backends["upload_server"].stop()
 
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(cli())